@@ -0,0 +1,288 @@
+"""
+The array_simulation module contains ArraySimulation, an engine for very
+large fleets that keeps rider and driver state in flat arrays instead of
+Rider and Driver objects, and differential_check, which checks it against
+the reference Simulation on random scenarios.
+
+Every rider and driver is an index into parallel arrays of status codes,
+locations, speeds, destinations and patience. Pending events are tuples in
+a heap, ordered by timestamp and then by the order they were made, so
+events spawned for the current timestamp happen after those already
+pending, and events happen in exactly the same order as in Simulation. The
+statistics of the report are accumulated as the events happen, so no
+activity history is kept at all.
+
+Precondition for identical results: actor identifiers are unique.
+
+Like FastSimulation, only the default dispatch policy is implemented, not
+Dispatcher(redispatch=True).
+
+=== Constants ===
+@type WAITING: int
+    The status code of a waiting rider.
+@type CANCELLED: int
+    The status code of a rider who cancelled.
+@type SATISFIED: int
+    The status code of a rider who was picked up.
+"""
+import heapq
+from array import array
+from collections import deque
+from itertools import count
+
+from event import DriverRequest, RiderRequest
+from event_trace import (RIDER_REQUEST, DRIVER_REQUEST, CANCELLATION,
+                         PICKUP_EVENT, DROPOFF_EVENT)
+from location import distance_backend, TRAVEL_TIMES
+
+WAITING = 0
+CANCELLED = 1
+SATISFIED = 2
+
+
+class ArraySimulation:
+    """A simulation engine with struct-of-arrays actor state.
+
+    === Attributes ===
+    @type events_done: int
+        The number of events done by the last run.
+    """
+
+    def __init__(self):
+        """Initialize an ArraySimulation.
+
+        @type self: ArraySimulation
+        @rtype: None
+        """
+        self.events_done = 0
+
+    def run(self, initial_events):
+        """Run the simulation on the list of events in <initial_events>.
+
+        Return a dictionary containing statistics of the simulation, the
+        same as Simulation.run. Rider and Driver objects in the events are
+        read, but not changed.
+
+        Precondition: initial_events contains only DriverRequest and
+        RiderRequest events.
+
+        @type self: ArraySimulation
+        @type initial_events: list[Event]
+        @rtype: dict[str, object]
+
+        >>> from event import create_event_list
+        >>> ArraySimulation().run(create_event_list('events_small.txt')) == {
+        ...     'rider_wait_time': 11.0, 'driver_total_distance': 14.0,
+        ...     'driver_ride_distance': 10.0}
+        True
+        """
+        riders = [e.rider for e in initial_events
+                  if isinstance(e, RiderRequest)]
+        drivers = [e.driver for e in initial_events
+                   if isinstance(e, DriverRequest)]
+        if len(riders) + len(drivers) != len(initial_events):
+            raise ValueError("Only requests can start a simulation.")
+
+        # Rider state.
+        origin_row = array('q', [rider.origin.row for rider in riders])
+        origin_col = array('q', [rider.origin.column for rider in riders])
+        goal_row = array('q', [rider.destination.row for rider in riders])
+        goal_col = array('q', [rider.destination.column for rider in riders])
+        patience = array('q', [rider.patience for rider in riders])
+        status = array('b', [WAITING]) * len(riders)
+        requested = array('q', [0]) * len(riders)
+        settled = array('b', [0]) * len(riders)
+
+        # Driver state. last_row and last_col are where the driver's last
+        # activity happened.
+        row = array('q', [driver.location.row for driver in drivers])
+        col = array('q', [driver.location.column for driver in drivers])
+        speed = array('q', [driver.speed for driver in drivers])
+        dest_row = array('q', row)
+        dest_col = array('q', col)
+        last_row = array('q', row)
+        last_col = array('q', col)
+        seen = array('b', [0]) * len(drivers)
+
+        # Statistics: [wait time, riders who stopped waiting, distance,
+        # ride distance, drivers].
+        totals = [0, 0, 0, 0, 0]
+
+        if distance_backend() is None:
+            def distance(row1, col1, row2, col2):
+                return abs(row2 - row1) + abs(col2 - col1)
+
+            # rounded as in geometry.rounded_quotient
+            def travel_time(row1, col1, row2, col2, rate):
+                time, twice_left = divmod(abs(row2 - row1) +
+                                          abs(col2 - col1), rate)
+                twice_left *= 2
+                if twice_left > rate or (twice_left == rate and time & 1):
+                    return time + 1
+                return time
+        else:
+            distance = travel_time = TRAVEL_TIMES.lookup
+
+        def driver_activity(d, at_row, at_col, ride):
+            # Account for driver d's activity at (at_row, at_col); ride is
+            # True if it is a drop off.
+            if seen[d]:
+                moved = distance(last_row[d], last_col[d], at_row, at_col)
+                totals[2] += moved
+                if ride:
+                    totals[3] += moved
+            else:
+                seen[d] = 1
+                totals[4] += 1
+            last_row[d], last_col[d] = at_row, at_col
+
+        def rider_activity(r, timestamp):
+            # Account for rider r's activity at timestamp, after its request.
+            if not settled[r]:
+                settled[r] = 1
+                totals[0] += timestamp - requested[r]
+                totals[1] += 1
+
+        def start_drive(d, r):
+            # Send driver d to rider r, and return how long it will take.
+            dest_row[d], dest_col[d] = origin_row[r], origin_col[r]
+            return travel_time(row[d], col[d], dest_row[d], dest_col[d],
+                               speed[d])
+
+        # Available drivers, first in, first out, with their locations and
+        # speeds in parallel lists, so a rider's fastest driver is found in
+        # one pass over them.
+        available, waiting = [], deque()
+        free_row, free_col, free_speed = [], [], []
+
+        def fastest(r):
+            # Remove and return the first of the fastest available drivers to
+            # reach rider r.
+            at_row, at_col = origin_row[r], origin_col[r]
+            times = [travel_time(r1, c1, at_row, at_col, rate)
+                     for r1, c1, rate in zip(free_row, free_col, free_speed)]
+            position = times.index(min(times))
+            del free_row[position], free_col[position], free_speed[position]
+            return available.pop(position)
+
+        queue, sequence = [], count()
+        riders_in, drivers_in = 0, 0
+        for event in initial_events:
+            if isinstance(event, RiderRequest):
+                queue.append((event.timestamp, next(sequence), RIDER_REQUEST,
+                              riders_in, -1))
+                riders_in += 1
+            else:
+                queue.append((event.timestamp, next(sequence), DRIVER_REQUEST,
+                              -1, drivers_in))
+                drivers_in += 1
+        heapq.heapify(queue)
+
+        push, pop, done = heapq.heappush, heapq.heappop, 0
+        while queue:
+            now, _, kind, r, d = pop(queue)
+            done += 1
+            if kind == RIDER_REQUEST:
+                requested[r] = now
+                if not available:
+                    waiting.append(r)
+                else:
+                    d = fastest(r)
+                    push(queue, (now + start_drive(d, r), next(sequence),
+                                 PICKUP_EVENT, r, d))
+                push(queue, (now + patience[r], next(sequence),
+                             CANCELLATION, r, -1))
+
+            elif kind == DRIVER_REQUEST:
+                driver_activity(d, row[d], col[d], False)
+                if not waiting:
+                    available.append(d)
+                    free_row.append(row[d])
+                    free_col.append(col[d])
+                    free_speed.append(speed[d])
+                else:
+                    r = waiting.popleft()
+                    push(queue, (now + start_drive(d, r), next(sequence),
+                                 PICKUP_EVENT, r, d))
+
+            elif kind == CANCELLATION:
+                rider_activity(r, now)
+                if status[r] == WAITING:
+                    status[r] = CANCELLED
+
+            elif kind == PICKUP_EVENT:
+                driver_activity(d, dest_row[d], dest_col[d], False)
+                rider_activity(r, now)
+                row[d], col[d] = dest_row[d], dest_col[d]
+                if status[r] == WAITING:
+                    status[r] = SATISFIED
+                    dest_row[d], dest_col[d] = goal_row[r], goal_col[r]
+                    push(queue, (now + travel_time(row[d], col[d],
+                                                   dest_row[d],
+                                                   dest_col[d], speed[d]),
+                                 next(sequence), DROPOFF_EVENT, r, d))
+                elif status[r] == CANCELLED:
+                    push(queue, (now, next(sequence), DRIVER_REQUEST, -1, d))
+
+            else:
+                driver_activity(d, dest_row[d], dest_col[d], True)
+                row[d], col[d] = dest_row[d], dest_col[d]
+                push(queue, (now, next(sequence), DRIVER_REQUEST, -1, d))
+
+        self.events_done = done
+        return {"rider_wait_time": totals[0] / totals[1],
+                "driver_total_distance": totals[2] / totals[4],
+                "driver_ride_distance": totals[3] / totals[4]}
+
+
+def differential_check(trials=20, seed=0):
+    """Run Simulation and ArraySimulation on <trials> random scenarios, and
+    return the seeds of the scenarios where their reports differ.
+
+    @type trials: int
+    @type seed: int
+    @rtype: list[int]
+
+    >>> differential_check(5)
+    []
+    """
+    import random
+    from scenario import random_events
+    from simulation import Simulation
+
+    rng = random.Random(seed)
+    mismatches = []
+    for trial in range(trials):
+        scenario_seed = seed + trial
+        options = dict(num_drivers=rng.randint(1, 30),
+                       num_riders=rng.randint(1, 200),
+                       size=rng.randint(2, 40),
+                       duration=rng.randint(10, 2000),
+                       max_speed=rng.randint(1, 5),
+                       max_patience=rng.randint(1, 60),
+                       seed=scenario_seed)
+        expected = Simulation().run(random_events(**options))
+        if ArraySimulation().run(random_events(**options)) != expected:
+            mismatches.append(scenario_seed)
+    return mismatches
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    print('Mismatching scenarios: {}'.format(differential_check(200)))
+
+    from time import time
+    from fast_simulation import FastSimulation
+    from scenario import random_events
+
+    # A metro-scale fleet.
+    for engine in (FastSimulation(), ArraySimulation()):
+        events = random_events(2000, 100000, size=500, duration=200000,
+                               seed=148)
+        start = time()
+        report = engine.run(events)
+        elapsed = time() - start
+        print('{}: {:.0f} events/sec, {}'.format(
+            type(engine).__name__, engine.events_done / elapsed, report))
@@ -19,17 +19,30 @@ class Dispatcher:
     is registered with the dispatcher, and will be used to fulfill future
     rider requests.
 
+    With redispatch on, a rider who cancels is taken off the waiting list,
+    and a driver on the way to a rider who cancels stops where it is and
+    requests a new rider at once, instead of driving on to the pickup.
+
     === Attributes ===
     @type avail_dr: Queue of Driver
         A Queue of all drivers without a task.
     @type wait_rd: Queue of Rider
         A Queue of all riders who need to be driven.
+    @type redispatch: bool
+        True if drivers on the way to riders who cancel are dispatched again.
     """
 
-    def __init__(self):
+    # === Private Attributes ===
+    # @type _en_route: dict[str, (Pickup, int)]
+    #     The pending Pickup of every rider a driver is on the way to, and
+    #     the time the driver set off, by rider identifier. Only kept with
+    #     redispatch on.
+
+    def __init__(self, redispatch=False):
         """Initialize a Dispatcher.
 
         @type self: Dispatcher
+        @type redispatch: bool
         @rtype: None
         """
         # Used Queue to maintain order by First in First Out, both with Drivers
@@ -37,6 +50,7 @@ class Dispatcher:
         # the list. Drivers by the first in the list that is also the fastest.
 
         self.avail_dr, self.wait_rd = Queue(), Queue()
+        self.redispatch, self._en_route = redispatch, {}
 
     def __str__(self):
         """Return a string representation.
@@ -122,11 +136,11 @@ class Dispatcher:
             shortest_time = fastest_dr.get_travel_time(rider.origin)
 
             # Replace fast_dr with the other one, if the other one can be
-            # faster.
+            # faster. Each driver's travel time is looked up only once.
             for driver in self.avail_dr:
-                if driver.get_travel_time(rider.origin) < shortest_time:
-                    fastest_dr = driver
-                    shortest_time = driver.get_travel_time(rider.origin)
+                time = driver.get_travel_time(rider.origin)
+                if time < shortest_time:
+                    fastest_dr, shortest_time = driver, time
 
             self.avail_dr.spcl_remove(fastest_dr)
             return fastest_dr
@@ -190,3 +204,76 @@ class Dispatcher:
         @rtype: None
         """
         self.wait_rd.spcl_remove(rider)
+
+    def track_pickup(self, pickup, departure):
+        """Record that pickup.driver set off at <departure> to pick up
+        pickup.rider, so the drive can be cut short if the rider cancels.
+
+        @type self: Dispatcher
+        @type pickup: Pickup
+        @type departure: int
+        @rtype: None
+        """
+        if self.redispatch:
+            self._en_route[pickup.rider.identifier] = (pickup, departure)
+
+    def withdraw_pickup(self, rider):
+        """Stop tracking the pending pickup of rider, and return it with the
+        time its driver set off, or None if no driver is on the way.
+
+        @type self: Dispatcher
+        @type rider: Rider
+        @rtype: (Pickup, int) | None
+
+        >>> class Pickup:
+        ...     def __init__(self, rider):
+        ...         self.rider = rider
+        >>> rd = Rider("Lola", Location(0, 0), Location(5, 4), 100)
+        >>> dis = Dispatcher(redispatch=True)
+        >>> pu = Pickup(rd)
+        >>> dis.track_pickup(pu, 7)
+        >>> dis.withdraw_pickup(rd) == (pu, 7)
+        True
+        >>> print(dis.withdraw_pickup(rd))
+        None
+        """
+        return self._en_route.pop(rider.identifier, None)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    from monitor import Monitor, DROPOFF
+    from scenario import random_events
+    from simulation import ConfiguredSimulation
+
+    class RideCounter(Monitor):
+        # A Monitor that also counts completed rides and the time of the
+        # last activity.
+        def __init__(self):
+            super().__init__()
+            self.rides, self.end = 0, 0
+
+        def notify(self, timestamp, category, description, identifier,
+                   location):
+            super().notify(timestamp, category, description, identifier,
+                           location)
+            self.rides += description == DROPOFF
+            self.end = max(self.end, timestamp)
+
+    # Completed rides per driver-hour, taking a time unit as a minute, as
+    # riders get less patient.
+    num_drivers = 100
+    for patience in (60, 20, 10, 5):
+        rates = []
+        for redispatch in (False, True):
+            counter = RideCounter()
+            ConfiguredSimulation(counter,
+                                 dispatcher=Dispatcher(redispatch)).run(
+                random_events(num_drivers, 6000, size=50, duration=3000,
+                              max_speed=2, max_patience=patience, seed=148))
+            rates.append(counter.rides / (num_drivers * counter.end / 60))
+        print('Patience up to {:2}: {:.2f} -> {:.2f} rides per driver-hour '
+              '({:+.0%})'.format(patience, rates[0], rates[1],
+                                 rates[1] / rates[0] - 1))
@@ -1,4 +1,5 @@
-from location import Location, manhattan_distance
+from location import (Location, travel_time, travel_distance,
+                      distance_backend)
 from rider import Rider, SATISFIED
 
 
@@ -78,8 +79,7 @@ class Driver:
         >>> dr2.get_travel_time(Location(0, 0))
         10
         """
-        return round((manhattan_distance(self.location, destination) /
-                      self.speed))
+        return travel_time(self.location, destination, self.speed)
 
     def start_drive(self, location):
         """Start driving to the location and return the time the drive will take.
@@ -115,6 +115,62 @@ class Driver:
         self.location = self.destination
         self.destination = None
 
+    def stop_drive(self, elapsed):
+        """Stop the drive <elapsed> time after it started, at the point the
+        driver has reached by then, and return that location.
+
+        The driver stops on the grid route, along the row first and then
+        along the column, having covered the same share of it as of the
+        drive. Without a distance backend that is elapsed * speed; with one,
+        the drive is measured by the backend, whose route is not known, and
+        the share of it driven is carried over to the grid route.
+
+        Precondition: self.destination is not None.
+
+        @type self: Driver
+        @type elapsed: int
+        @rtype: Location
+
+        >>> dr = Driver('Charles', Location(0, 0), 3)
+        >>> dr.start_drive(Location(4, 5))
+        3
+        >>> print(dr.stop_drive(2))
+        (4, 2)
+        >>> dr.is_idle
+        True
+        >>> dr.start_drive(Location(0, 0))
+        2
+        >>> print(dr.stop_drive(1))
+        (1, 2)
+        >>> from location import set_distance_backend
+        >>> from road_network import RoadNetwork
+        >>> rn = RoadNetwork()
+        >>> rn.add_road(Location(1, 2), Location(5, 2), 8)
+        >>> set_distance_backend(rn)
+        >>> dr.start_drive(Location(5, 2))
+        3
+        >>> print(dr.stop_drive(2))
+        (4, 2)
+        >>> set_distance_backend(None)
+        """
+        covered = elapsed * self.speed
+        row, column = self.location.row, self.location.column
+        rows = self.destination.row - row
+        columns = self.destination.column - column
+        if distance_backend() is not None:
+            length = travel_distance(self.location, self.destination)
+            if length:
+                covered = covered * (abs(rows) + abs(columns)) // length
+        step = min(covered, abs(rows))
+        row += step if rows > 0 else -step
+        step = min(covered - step, abs(columns))
+        column += step if columns > 0 else -step
+        self.location = Location(row, column)
+
+        self.is_idle = True
+        self.destination = None
+        return self.location
+
     def start_ride(self, rider):
         """Start a ride and return the time the ride will take.
 
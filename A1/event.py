@@ -29,6 +29,9 @@ class Event:
     === Attributes ===
     @type timestamp: int
         A timestamp for this event.
+    @type cancelled: bool
+        True if this event was withdrawn before its time; a simulation
+        skips cancelled events.
     """
 
     def __init__(self, timestamp):
@@ -42,8 +45,10 @@ class Event:
 
         >>> Event(7).timestamp
         7
+        >>> Event(7).cancelled
+        False
         """
-        self.timestamp = timestamp
+        self.timestamp, self.cancelled = timestamp, False
 
     # The following six 'magic methods' are overridden to allow for easy
     # comparison of Event instances. All comparisons simply perform the
@@ -250,8 +255,9 @@ class RiderRequest(Event):
 
         if driver is not None:
             travel_time = driver.start_drive(self.rider.origin)
-            events.append(Pickup(self.timestamp + travel_time, self.rider,
-                                 driver))
+            pickup = Pickup(self.timestamp + travel_time, self.rider, driver)
+            dispatcher.track_pickup(pickup, self.timestamp)
+            events.append(pickup)
         events.append(Cancellation(self.timestamp + self.rider.patience,
                                    self.rider))
         return events
@@ -346,8 +352,9 @@ class DriverRequest(Event):
         # arrives at the riders location.
         if rider is not None:
             travel_time = self.driver.start_drive(rider.origin)
-            events.append(Pickup(self.timestamp + travel_time, rider,
-                                 self.driver))
+            pickup = Pickup(self.timestamp + travel_time, rider, self.driver)
+            dispatcher.track_pickup(pickup, self.timestamp)
+            events.append(pickup)
             return events
 
         return events
@@ -389,16 +396,52 @@ class Cancellation(Event):
     def do(self, dispatcher, monitor):
         """Cancel rider's request.
 
+        If the dispatcher redispatches, the rider leaves the waiting list, or
+        the driver on the way to the rider stops, its Pickup is cancelled,
+        and a DriverRequest for it is returned.
+
         @type dispatcher: Dispatcher
         @type monitor: Monitor
-        @rtype: None
+        @rtype: list[Event]
+
+        >>> m = Monitor()
+        >>> d = Dispatcher(redispatch=True)
+        >>> rd = Rider("Lola", Location(0, 0), Location(5, 4), 100)
+        >>> dr = Driver('Charles', Location(6, 0), 2)
+        >>> d.avail_dr.add(dr)
+        >>> pu, cn = RiderRequest(0, rd).do(d, m)
+        >>> print(pu)
+        3 -- Charles: Pick up Lola
+        >>> print(Cancellation(2, rd).do(d, m).pop())
+        2 -- Charles: Request a rider
+        >>> pu.cancelled, rd.status
+        (True, 'cancelled')
+        >>> print(dr.location)
+        (2, 0)
         """
+        events = []
+
         monitor.notify(self.timestamp, RIDER, CANCEL,
                        self.rider.identifier, self.rider.origin)
 
         if self.rider.status == WAITING:
             self.rider.status = CANCELLED
 
+            if dispatcher.redispatch:
+                en_route = dispatcher.withdraw_pickup(self.rider)
+                # No driver is on the way, so the rider is still waiting for
+                # one.
+                if en_route is None:
+                    dispatcher.cancel_ride(self.rider)
+                else:
+                    pickup, departure = en_route
+                    pickup.cancelled = True
+                    pickup.driver.stop_drive(self.timestamp - departure)
+                    events.append(DriverRequest(self.timestamp,
+                                                pickup.driver))
+
+        return events
+
     def __str__(self):
         """Return a string representation of this event.
 
@@ -475,6 +518,7 @@ class Pickup(Event):
         <BLANKLINE>
         """
         events = []
+        dispatcher.withdraw_pickup(self.rider)
 
         monitor.notify(self.timestamp, DRIVER, PICKUP,
                        self.driver.identifier, self.driver.destination)
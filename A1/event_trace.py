@@ -0,0 +1,340 @@
+"""
+The event_trace module records the events of a simulation as compact binary
+records, and reads them back: as the human-readable trace, or as the report
+a Monitor would have produced, without running the simulation again.
+
+A trace starts with MAGIC, followed by records. Each record starts with a
+kind byte. Event records hold the timestamp, the rider and driver numbers
+(-1 when the event has none) and the row and column the event's activities
+happen at. The first time an actor appears, a NAME record maps its number
+to its identifier.
+
+Traces may be compressed with gzip, or with zstd when the zstandard package
+is installed. Compressed traces are detected automatically when read.
+
+Running the module prints a trace file as text, or its report with
+--report:
+
+    python event_trace.py trace.bin [--report]
+
+=== Constants ===
+@type MAGIC: bytes
+    The bytes every trace starts with.
+@type RIDER_REQUEST: int
+    The kind of a RiderRequest record.
+@type DRIVER_REQUEST: int
+    The kind of a DriverRequest record.
+@type CANCELLATION: int
+    The kind of a Cancellation record.
+@type PICKUP_EVENT: int
+    The kind of a Pickup record.
+@type DROPOFF_EVENT: int
+    The kind of a Dropoff record.
+@type NAME: int
+    The kind of a record naming an actor.
+"""
+import gzip
+import struct
+import sys
+
+from event import RiderRequest, DriverRequest, Cancellation, Pickup, Dropoff
+from location import Location
+from monitor import Monitor, RIDER, DRIVER, REQUEST, CANCEL, PICKUP, DROPOFF
+
+MAGIC = b'RTRACE1\n'
+
+RIDER_REQUEST = 0
+DRIVER_REQUEST = 1
+CANCELLATION = 2
+PICKUP_EVENT = 3
+DROPOFF_EVENT = 4
+NAME = 255
+
+# kind, timestamp, rider, driver, row, column
+_EVENT_RECORD = struct.Struct('<Bqiiii')
+# kind, actor number, length of the UTF-8 identifier that follows
+_NAME_RECORD = struct.Struct('<BiH')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+_TEXT = {
+    RIDER_REQUEST: "{0} -- {1}: Request a driver",
+    DRIVER_REQUEST: "{0} -- {2}: Request a rider",
+    CANCELLATION: "{0} -- {1}: Cancel the request",
+    PICKUP_EVENT: "{0} -- {2}: Pick up {1}",
+    DROPOFF_EVENT: "{0} -- {2}: Drop off {1}"
+}
+
+
+class TraceWriter:
+    """A buffered writer of binary event records.
+
+    === Attributes ===
+    @type buffer_size: int
+        The number of bytes gathered before they are written out.
+    """
+
+    # === Private Attributes ===
+    # @type _file: file
+    #     The (possibly compressing) file the trace is written to.
+    # @type _raw: file | None
+    #     The underlying file, when _file compresses into it.
+    # @type _buffer: bytearray
+    #     Records not written to _file yet.
+    # @type _actors: dict[str, int]
+    #     The number given to every actor named so far.
+
+    def __init__(self, filename, compression=None, buffer_size=1 << 16):
+        """Initialize a TraceWriter that writes to the file at <filename>.
+
+        Raise ValueError if the compression is unknown or unavailable.
+
+        @type self: TraceWriter
+        @type filename: str
+        @type compression: str | None
+            None, 'gzip' or 'zstd'.
+        @type buffer_size: int
+        @rtype: None
+        """
+        self._raw = None
+        if compression is None:
+            self._file = open(filename, 'wb')
+        elif compression == 'gzip':
+            # A fixed mtime and no file name keep traces of the same run
+            # byte-identical.
+            self._raw = open(filename, 'wb')
+            self._file = gzip.GzipFile(filename='', mode='wb',
+                                       fileobj=self._raw, mtime=0)
+        elif compression == 'zstd':
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd compression needs the zstandard "
+                                 "package.")
+            self._raw = open(filename, 'wb')
+            self._file = zstandard.ZstdCompressor().stream_writer(self._raw)
+        else:
+            raise ValueError("Unknown compression: {}".format(compression))
+
+        self.buffer_size = buffer_size
+        self._buffer = bytearray(MAGIC)
+        self._actors = {}
+
+    def __enter__(self):
+        """Return self, for use in a with statement.
+
+        @type self: TraceWriter
+        @rtype: TraceWriter
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """Close the trace at the end of a with statement.
+
+        @type self: TraceWriter
+        @rtype: None
+        """
+        self.close()
+
+    def record(self, timestamp, kind, rider, driver, location):
+        """Record an event of <kind> involving the actors with identifiers
+        <rider> and <driver>, at <location>.
+
+        @type self: TraceWriter
+        @type timestamp: int
+        @type kind: int
+        @type rider: str | None
+        @type driver: str | None
+        @type location: Location
+        @rtype: None
+        """
+        # numbering a new actor buffers its name record, which must come
+        # before the event's
+        rider_no, driver_no = self._number(rider), self._number(driver)
+        self._buffer += _EVENT_RECORD.pack(kind, timestamp, rider_no,
+                                           driver_no, location.row,
+                                           location.column)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def record_event(self, event):
+        """Record <event>.
+
+        Precondition: event has not been done yet.
+
+        @type self: TraceWriter
+        @type event: Event
+        @rtype: None
+        """
+        kind = type(event)
+        if kind is RiderRequest:
+            self.record(event.timestamp, RIDER_REQUEST, event.rider.identifier,
+                        None, event.rider.origin)
+        elif kind is DriverRequest:
+            self.record(event.timestamp, DRIVER_REQUEST, None,
+                        event.driver.identifier, event.driver.location)
+        elif kind is Cancellation:
+            self.record(event.timestamp, CANCELLATION, event.rider.identifier,
+                        None, event.rider.origin)
+        elif kind is Pickup:
+            self.record(event.timestamp, PICKUP_EVENT, event.rider.identifier,
+                        event.driver.identifier, event.driver.destination)
+        elif kind is Dropoff:
+            self.record(event.timestamp, DROPOFF_EVENT,
+                        event.rider.identifier, event.driver.identifier,
+                        event.driver.destination)
+
+    def flush(self):
+        """Write out every buffered record.
+
+        @type self: TraceWriter
+        @rtype: None
+        """
+        self._file.write(self._buffer)
+        self._buffer = bytearray()
+
+    def close(self):
+        """Write out every buffered record and close the trace.
+
+        @type self: TraceWriter
+        @rtype: None
+        """
+        self.flush()
+        self._file.close()
+        if self._raw is not None:
+            self._raw.close()
+
+    def _number(self, identifier):
+        # Return the number of the actor with identifier, naming it in the
+        # trace if it is new. Return -1 if identifier is None.
+        #
+        # @type self: TraceWriter
+        # @type identifier: str | None
+        # @rtype: int
+        if identifier is None:
+            return -1
+        if identifier not in self._actors:
+            number = len(self._actors)
+            self._actors[identifier] = number
+            name = identifier.encode()
+            self._buffer += _NAME_RECORD.pack(NAME, number, len(name)) + name
+        return self._actors[identifier]
+
+
+def read_trace(filename):
+    """Yield the event records of the trace at <filename>, in order, as
+    (timestamp, kind, rider, driver, row, column) tuples. rider and driver
+    are identifiers, or None.
+
+    Raise ValueError if the file is not a trace.
+
+    @type filename: str
+    @rtype: generator[(int, int, str | None, str | None, int, int)]
+    """
+    names = {-1: None}
+    event_size, name_size = _EVENT_RECORD.size, _NAME_RECORD.size
+    with _open_trace(filename) as file:
+        data = file.read(len(MAGIC))
+        if data != MAGIC:
+            raise ValueError("{} is not an event trace.".format(filename))
+
+        # Records are decoded from blocks of the file; a record cut off at
+        # the end of a block is kept for the next one.
+        data, position = b'', 0
+        block = file.read(1 << 20)
+        while block:
+            data, position = data[position:] + block, 0
+            end = len(data)
+            while position < end:
+                if data[position] == NAME:
+                    if position + name_size > end:
+                        break
+                    _, number, length = _NAME_RECORD.unpack_from(data,
+                                                                 position)
+                    if position + name_size + length > end:
+                        break
+                    start = position + name_size
+                    names[number] = data[start:start + length].decode()
+                    position = start + length
+                else:
+                    if position + event_size > end:
+                        break
+                    kind, timestamp, rider, driver, row, column = \
+                        _EVENT_RECORD.unpack_from(data, position)
+                    position += event_size
+                    yield (timestamp, kind, names[rider], names[driver],
+                           row, column)
+            block = file.read(1 << 20)
+
+
+def _open_trace(filename):
+    # Return the trace at filename opened for reading, decompressing it if
+    # needed.
+    #
+    # @type filename: str
+    # @rtype: file
+    with open(filename, 'rb') as file:
+        start = file.read(len(_ZSTD_MAGIC))
+    if start.startswith(_GZIP_MAGIC):
+        return gzip.open(filename, 'rb')
+    if start == _ZSTD_MAGIC:
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(
+            open(filename, 'rb'), closefd=True)
+    return open(filename, 'rb')
+
+
+def render(record):
+    """Return the human-readable line for an event record.
+
+    @type record: (int, int, str | None, str | None, int, int)
+    @rtype: str
+
+    >>> render((12, PICKUP_EVENT, 'Dan', 'Arnold', 1, 1))
+    '12 -- Arnold: Pick up Dan'
+    >>> render((1, RIDER_REQUEST, 'Dan', None, 1, 1))
+    '1 -- Dan: Request a driver'
+    """
+    return _TEXT[record[1]].format(record[0], record[2], record[3])
+
+
+def replay_report(filename, monitor=None):
+    """Return the report of the simulation traced in the file at
+    <filename>, by notifying <monitor> of the activities of every event.
+
+    @type filename: str
+    @type monitor: Monitor | None
+        The monitor to notify; a new Monitor if None.
+    @rtype: dict[str, object]
+    """
+    if monitor is None:
+        monitor = Monitor()
+    notify = monitor.notify
+
+    for timestamp, kind, rider, driver, row, column in read_trace(filename):
+        location = Location(row, column)
+        if kind == RIDER_REQUEST:
+            notify(timestamp, RIDER, REQUEST, rider, location)
+        elif kind == DRIVER_REQUEST:
+            notify(timestamp, DRIVER, REQUEST, driver, location)
+        elif kind == CANCELLATION:
+            notify(timestamp, RIDER, CANCEL, rider, location)
+        elif kind == PICKUP_EVENT:
+            notify(timestamp, DRIVER, PICKUP, driver, location)
+            notify(timestamp, RIDER, PICKUP, rider, location)
+        elif kind == DROPOFF_EVENT:
+            notify(timestamp, DRIVER, DROPOFF, driver, location)
+
+    return monitor.report()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        import doctest
+        doctest.testmod()
+    elif '--report' in sys.argv[2:]:
+        print(replay_report(sys.argv[1]))
+    else:
+        for trace_record in read_trace(sys.argv[1]):
+            print(render(trace_record))
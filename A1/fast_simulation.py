@@ -0,0 +1,268 @@
+"""
+The fast_simulation module contains FastSimulation, an engine that runs the
+same simulation as simulation.Simulation with far less overhead per event.
+
+Instead of Event objects in a PriorityQueue, pending events are plain
+(timestamp, sequence, kind, rider index, driver index) tuples in a heap, so
+every comparison happens in C; the sequence number keeps events with equal
+timestamps in the order they were scheduled, exactly as the PriorityQueue
+does. Each kind of event is done by a handler from a table, which pushes the
+events it spawns straight onto the heap instead of returning a list. Riders
+and drivers are dispatched by index, with the same rules as Dispatcher.
+
+Precondition for identical results: actor identifiers are unique.
+
+The Event classes remain the way scenarios are described: run takes the
+same list of DriverRequest and RiderRequest events as Simulation.run.
+
+Only the default dispatch policy is implemented: drivers on the way to a
+rider who cancels drive on to the pickup, as with Dispatcher(), not
+Dispatcher(redispatch=True).
+"""
+import heapq
+from collections import deque
+from itertools import count
+
+from event import DriverRequest, RiderRequest
+from event_trace import (RIDER_REQUEST, DRIVER_REQUEST, CANCELLATION,
+                         PICKUP_EVENT, DROPOFF_EVENT)
+from location import distance_backend
+from monitor import Monitor, RIDER, DRIVER, REQUEST, CANCEL, PICKUP, DROPOFF
+from rider import WAITING, CANCELLED
+
+
+class FastSimulation:
+    """A simulation engine with tuple-encoded events.
+
+    === Attributes ===
+    @type events_done: int
+        The number of events done by the last run.
+    """
+
+    # === Private Attributes ===
+    # @type _monitor: Monitor
+    #     The monitor that records the activities of the simulation.
+    # @type _trace: TraceWriter | None
+    #     The writer every event is recorded with, if any.
+
+    def __init__(self, monitor=None, trace=None):
+        """Initialize a FastSimulation.
+
+        @type self: FastSimulation
+        @type monitor: Monitor | None
+            The monitor to record activities with; a new Monitor if None.
+        @type trace: TraceWriter | None
+            An event_trace.TraceWriter to record every event with, if any.
+        @rtype: None
+        """
+        self._monitor = Monitor() if monitor is None else monitor
+        self._trace = trace
+        self.events_done = 0
+
+    def run(self, initial_events):
+        """Run the simulation on the list of events in <initial_events>.
+
+        Return a dictionary containing statistics of the simulation, the
+        same as Simulation.run.
+
+        Precondition: initial_events contains only DriverRequest and
+        RiderRequest events.
+
+        @type self: FastSimulation
+        @type initial_events: list[Event]
+        @rtype: dict[str, object]
+
+        >>> from event import create_event_list
+        >>> FastSimulation().run(create_event_list('events_small.txt')) == {
+        ...     'rider_wait_time': 11.0, 'driver_total_distance': 14.0,
+        ...     'driver_ride_distance': 10.0}
+        True
+        """
+        riders, drivers, queue = [], [], []
+        sequence = count()
+
+        for event in initial_events:
+            if isinstance(event, RiderRequest):
+                queue.append((event.timestamp, next(sequence), RIDER_REQUEST,
+                              len(riders), -1))
+                riders.append(event.rider)
+            elif isinstance(event, DriverRequest):
+                queue.append((event.timestamp, next(sequence), DRIVER_REQUEST,
+                              -1, len(drivers)))
+                drivers.append(event.driver)
+            else:
+                raise ValueError("Only requests can start a simulation.")
+        heapq.heapify(queue)
+
+        handlers = self._handlers(riders, drivers, queue, sequence)
+        pop = heapq.heappop
+        done = 0
+        while queue:
+            timestamp, _, kind, rider, driver = pop(queue)
+            handlers[kind](timestamp, rider, driver)
+            done += 1
+
+        self.events_done = done
+        if self._trace is not None:
+            self._trace.flush()
+        return self._monitor.report()
+
+    def _handlers(self, riders, drivers, queue, sequence):
+        # Return a table of the handlers for each kind of event, indexed by
+        # kind. Each handler does an event of its kind at a timestamp, given
+        # the indices of its rider and driver in riders and drivers, and
+        # pushes any events it spawns onto queue.
+        #
+        # @type self: FastSimulation
+        # @type riders: list[Rider]
+        # @type drivers: list[Driver]
+        # @type queue: list[tuple]
+        # @type sequence: itertools.count
+        # @rtype: list[(int, int, int) -> None]
+        notify, push = self._monitor.notify, heapq.heappush
+        # Dispatching follows Dispatcher exactly, on indices: available
+        # drivers and waiting riders are both first in, first out, and a
+        # rider gets the first of the fastest available drivers.
+        available, waiting = [], deque()
+        rows = [driver.location.row for driver in drivers]
+        columns = [driver.location.column for driver in drivers]
+        speeds = [driver.speed for driver in drivers]
+        manhattan = distance_backend() is None
+
+        def fastest(rider):
+            # Return the position in available of the first of the fastest
+            # drivers to reach rider.
+            if not manhattan:
+                times = [drivers[d].get_travel_time(rider.origin)
+                         for d in available]
+                return times.index(min(times))
+
+            row, column = rider.origin.row, rider.origin.column
+            best, shortest = 0, None
+            for position, d in enumerate(available):
+                # The travel time, rounded as in geometry.rounded_quotient.
+                time, twice_left = divmod(abs(rows[d] - row) +
+                                          abs(columns[d] - column), speeds[d])
+                twice_left *= 2
+                if twice_left > speeds[d] or (twice_left == speeds[d] and
+                                              time & 1):
+                    time += 1
+                if shortest is None or time < shortest:
+                    best, shortest = position, time
+            return best
+
+        def rider_request(timestamp, r, _):
+            rider = riders[r]
+            notify(timestamp, RIDER, REQUEST, rider.identifier, rider.origin)
+            if not available:
+                waiting.append(r)
+            else:
+                d = available.pop(fastest(rider) if len(available) > 1 else 0)
+                push(queue, (timestamp + drivers[d].start_drive(rider.origin),
+                             next(sequence), PICKUP_EVENT, r, d))
+            push(queue, (timestamp + rider.patience, next(sequence),
+                         CANCELLATION, r, -1))
+
+        def driver_request(timestamp, _, d):
+            driver = drivers[d]
+            notify(timestamp, DRIVER, REQUEST, driver.identifier,
+                   driver.location)
+            if not waiting:
+                available.append(d)
+            else:
+                r = waiting.popleft()
+                push(queue, (timestamp + driver.start_drive(riders[r].origin),
+                             next(sequence), PICKUP_EVENT, r, d))
+
+        def cancellation(timestamp, r, _):
+            rider = riders[r]
+            notify(timestamp, RIDER, CANCEL, rider.identifier, rider.origin)
+            if rider.status == WAITING:
+                rider.status = CANCELLED
+
+        def pickup(timestamp, r, d):
+            rider, driver = riders[r], drivers[d]
+            notify(timestamp, DRIVER, PICKUP, driver.identifier,
+                   driver.destination)
+            notify(timestamp, RIDER, PICKUP, rider.identifier, rider.origin)
+            driver.end_drive()
+            rows[d], columns[d] = driver.location.row, driver.location.column
+            if rider.status == WAITING:
+                push(queue, (timestamp + driver.start_ride(rider),
+                             next(sequence), DROPOFF_EVENT, r, d))
+            elif rider.status == CANCELLED:
+                push(queue, (timestamp, next(sequence), DRIVER_REQUEST, -1, d))
+
+        def dropoff(timestamp, r, d):
+            driver = drivers[d]
+            notify(timestamp, DRIVER, DROPOFF, driver.identifier,
+                   driver.destination)
+            driver.end_ride()
+            rows[d], columns[d] = driver.location.row, driver.location.column
+            push(queue, (timestamp, next(sequence), DRIVER_REQUEST, -1, d))
+
+        handlers = [None] * 5
+        handlers[RIDER_REQUEST], handlers[DRIVER_REQUEST] = (rider_request,
+                                                             driver_request)
+        handlers[CANCELLATION], handlers[PICKUP_EVENT] = cancellation, pickup
+        handlers[DROPOFF_EVENT] = dropoff
+
+        if self._trace is not None:
+            handlers = [self._traced(kind, handler, riders, drivers)
+                        for kind, handler in enumerate(handlers)]
+        return handlers
+
+    def _traced(self, kind, handler, riders, drivers):
+        # Return a handler that records each event of kind with the trace
+        # writer before doing it with handler.
+        #
+        # @type self: FastSimulation
+        # @type kind: int
+        # @type handler: (int, int, int) -> None
+        # @type riders: list[Rider]
+        # @type drivers: list[Driver]
+        # @rtype: (int, int, int) -> None
+        record = self._trace.record
+
+        def traced(timestamp, r, d):
+            rider = riders[r] if r >= 0 else None
+            driver = drivers[d] if d >= 0 else None
+            if kind == DRIVER_REQUEST:
+                location = driver.location
+            elif kind == PICKUP_EVENT or kind == DROPOFF_EVENT:
+                location = driver.destination
+            else:
+                location = rider.origin
+            record(timestamp, kind, rider and rider.identifier,
+                   driver and driver.identifier, location)
+            handler(timestamp, r, d)
+
+        return traced
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    from time import time
+    from scenario import random_events
+    from simulation import Simulation
+
+    # Events per second of the reference engine against this one, on the
+    # same scenario.
+    def scenario():
+        return random_events(300, 6000, size=60, duration=20000, seed=148)
+
+    fast = FastSimulation()
+    start = time()
+    fast_report = fast.run(scenario())
+    fast_time = time() - start
+    start = time()
+    report = Simulation().run(scenario())
+    reference_time = time() - start
+
+    print('Reports identical: {}'.format(report == fast_report))
+    print('Simulation:     {:.0f} events/sec'.format(
+        fast.events_done / reference_time))
+    print('FastSimulation: {:.0f} events/sec ({:.1f}x)'.format(
+        fast.events_done / fast_time, reference_time / fast_time))
@@ -0,0 +1,229 @@
+"""
+The geometry module is the travel-time kernel shared by the drivers, the
+dispatcher and the monitor. Every function works on plain integer
+coordinates, so no Location objects are created and no floating point
+arithmetic is done.
+
+=== Constants ===
+@type FIELD_BITS: int
+    The number of bits each coordinate and the speed take in a memo key.
+"""
+from collections import OrderedDict
+
+FIELD_BITS = 32
+
+
+def grid_distance(row1, col1, row2, col2):
+    """Return the Manhattan distance between (row1, col1) and (row2, col2).
+
+    @type row1: int
+    @type col1: int
+    @type row2: int
+    @type col2: int
+    @rtype: int
+
+    >>> grid_distance(10, 10, 13, 24)
+    17
+    >>> grid_distance(13, 24, 1, 1)
+    35
+    """
+    return abs(row2 - row1) + abs(col2 - col1)
+
+
+def rounded_quotient(distance, speed):
+    """Return distance / speed rounded to the nearest integer, with ties
+    rounded to the even integer, exactly as round(distance / speed).
+
+    Precondition: distance >= 0, speed > 0
+
+    @type distance: int
+    @type speed: int
+    @rtype: int
+
+    >>> rounded_quotient(11, 3)
+    4
+    >>> rounded_quotient(5, 2), rounded_quotient(7, 2)
+    (2, 4)
+    """
+    quotient, remainder = divmod(distance, speed)
+    if 2 * remainder > speed or (2 * remainder == speed and quotient & 1):
+        return quotient + 1
+    return quotient
+
+
+def batch_distances(rows1, cols1, rows2, cols2):
+    """Return the Manhattan distances between corresponding points of two
+    coordinate arrays.
+
+    @type rows1: list[int]
+    @type cols1: list[int]
+    @type rows2: list[int]
+    @type cols2: list[int]
+    @rtype: list[int]
+
+    >>> batch_distances([0, 10], [0, 10], [5, 0], [6, 0])
+    [11, 20]
+    """
+    return [abs(r2 - r1) + abs(c2 - c1)
+            for r1, c1, r2, c2 in zip(rows1, cols1, rows2, cols2)]
+
+
+def batch_travel_times(distances, speeds):
+    """Return the rounded travel time for each distance at the matching
+    speed.
+
+    @type distances: list[int]
+    @type speeds: list[int]
+    @rtype: list[int]
+
+    >>> batch_travel_times([11, 20], [3, 2])
+    [4, 10]
+    """
+    return [rounded_quotient(distance, speed)
+            for distance, speed in zip(distances, speeds)]
+
+
+class TravelTimeMemo:
+    """A bounded, least-recently-used memo of travel times.
+
+    Keys pack the origin, destination and speed into a single integer when
+    every coordinate and the speed are natural numbers below
+    2 ** FIELD_BITS, and are tuples of them otherwise, so no two queries
+    share a key. A speed of 1 gives the plain distance.
+
+    === Attributes ===
+    @type maxsize: int
+        The largest number of travel times remembered.
+    @type hits: int
+        The number of lookups answered from the memo.
+    @type misses: int
+        The number of lookups that had to compute a distance.
+    """
+
+    # === Private Attributes ===
+    # @type _distance: (int, int, int, int) -> int
+    #     Computes the distance between two points on a miss.
+    # @type _times: OrderedDict[int | tuple, int]
+    #     Remembered travel times, least recently used first.
+
+    def __init__(self, maxsize=65536, distance=grid_distance):
+        """Initialize an empty TravelTimeMemo.
+
+        @type self: TravelTimeMemo
+        @type maxsize: int
+        @type distance: (int, int, int, int) -> int
+        @rtype: None
+        """
+        self.maxsize, self._distance = maxsize, distance
+        self._times = OrderedDict()
+        self.hits, self.misses = 0, 0
+
+    def __str__(self):
+        """Return a string representation.
+
+        @type self: TravelTimeMemo
+        @rtype: str
+
+        >>> memo = TravelTimeMemo(10)
+        >>> memo.lookup(0, 0, 5, 6, 3)
+        4
+        >>> memo.lookup(0, 0, 5, 6, 3)
+        4
+        >>> print(memo)
+        TravelTimeMemo (1/10 entries, 1 hits, 1 misses)
+        """
+        return "TravelTimeMemo ({}/{} entries, {} hits, {} misses)".format(
+            len(self._times), self.maxsize, self.hits, self.misses)
+
+    def __len__(self):
+        """Return the number of remembered travel times.
+
+        @type self: TravelTimeMemo
+        @rtype: int
+        """
+        return len(self._times)
+
+    def lookup(self, row1, col1, row2, col2, speed=1):
+        """Return the travel time from (row1, col1) to (row2, col2) at
+        <speed>, rounded to the nearest integer.
+
+        @type self: TravelTimeMemo
+        @type row1: int
+        @type col1: int
+        @type row2: int
+        @type col2: int
+        @type speed: int
+        @rtype: int
+
+        >>> memo = TravelTimeMemo(2)
+        >>> memo.lookup(10, 10, 0, 0, 2)
+        10
+        >>> memo.lookup(10, 10, 0, 0)
+        20
+        >>> memo.lookup(0, 0, 1, 1)
+        2
+        >>> len(memo)
+        2
+        >>> memo.lookup(0, -1, 5, 5), memo.lookup(-1, 2 ** 32 - 1, 5, 5)
+        (11, 4294967296)
+        """
+        bits = FIELD_BITS
+        # a negative field or one too wide for its bits would spill into
+        # the fields beside it
+        if (row1 | col1 | row2 | col2 | speed) >> bits:
+            key = (row1, col1, row2, col2, speed)
+        else:
+            key = ((((row1 << bits | col1) << bits | row2) << bits | col2)
+                   << bits | speed)
+        times = self._times
+        if key in times:
+            self.hits += 1
+            times.move_to_end(key)
+            return times[key]
+
+        self.misses += 1
+        time = rounded_quotient(self._distance(row1, col1, row2, col2), speed)
+        times[key] = time
+        if len(times) > self.maxsize:
+            times.popitem(last=False)
+        return time
+
+    def hit_rate(self):
+        """Return the fraction of lookups answered from the memo.
+
+        @type self: TravelTimeMemo
+        @rtype: float
+
+        >>> memo = TravelTimeMemo()
+        >>> memo.hit_rate()
+        0.0
+        >>> for _ in range(4): _ = memo.lookup(1, 2, 3, 4)
+        >>> memo.hit_rate()
+        0.75
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        """Forget every remembered travel time and reset the statistics.
+
+        @type self: TravelTimeMemo
+        @rtype: None
+        """
+        self._times.clear()
+        self.hits, self.misses = 0, 0
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    # Report how well the shared memo does on the sample simulation, to help
+    # size it for a grid.
+    from event import create_event_list
+    from location import TRAVEL_TIMES
+    from simulation import Simulation
+
+    Simulation().run(create_event_list('events.txt'))
+    print(TRAVEL_TIMES)
+    print('Hit rate: {:.1%}'.format(TRAVEL_TIMES.hit_rate()))
@@ -1,3 +1,6 @@
+from geometry import grid_distance, TravelTimeMemo
+
+
 class Location:
     """
     A location in the city.
@@ -68,8 +71,107 @@ def manhattan_distance(origin, destination):
     >>> manhattan_distance(l3,l2)
     35
     """
-    return int((((destination.row - origin.row) ** 2) ** 0.5) +
-               (((destination.column - origin.column) ** 2) ** 0.5))
+    return grid_distance(origin.row, origin.column,
+                         destination.row, destination.column)
+
+
+_distance_backend = None
+"""@type _distance_backend: RoadNetwork | None"""
+
+
+def _backend_distance(row1, col1, row2, col2):
+    # Return the distance from (row1, col1) to (row2, col2) using the
+    # current distance backend, or the Manhattan distance if the backend
+    # raises ValueError because it has no route between them.
+    #
+    # @type row1: int
+    # @type col1: int
+    # @type row2: int
+    # @type col2: int
+    # @rtype: int
+    if _distance_backend is not None:
+        try:
+            return _distance_backend.distance(Location(row1, col1),
+                                              Location(row2, col2))
+        except ValueError:
+            pass
+    return grid_distance(row1, col1, row2, col2)
+
+
+TRAVEL_TIMES = TravelTimeMemo(distance=_backend_distance)
+"""@type TRAVEL_TIMES: TravelTimeMemo
+    The memo shared by every travel time and travel distance lookup."""
+
+
+def set_distance_backend(backend):
+    """Measure all travel distances with <backend>, or with Manhattan
+    distance if <backend> is None.
+
+    A backend is any object with a distance(origin, destination) method,
+    such as a road_network.RoadNetwork. Where it raises ValueError, because
+    a location is off its network or there is no route, drivers travel the
+    Manhattan distance instead, so no rider is left unreachable.
+
+    @type backend: object | None
+    @rtype: None
+    """
+    global _distance_backend
+    _distance_backend = backend
+    TRAVEL_TIMES.clear()
+
+
+def distance_backend():
+    """Return the current distance backend, or None if distances are
+    Manhattan distances.
+
+    @rtype: object | None
+    """
+    return _distance_backend
+
+
+def travel_distance(origin, destination):
+    """Return the distance a driver travels from the origin to the
+    destination, using the current distance backend.
+
+    @type origin: Location
+    @type destination: Location
+    @rtype: int
+
+    >>> travel_distance(Location(10, 10), Location(13, 24))
+    17
+    >>> from road_network import RoadNetwork
+    >>> rn = RoadNetwork()
+    >>> rn.add_road(Location(0, 0), Location(0, 1), 5)
+    >>> set_distance_backend(rn)
+    >>> travel_distance(Location(0, 0), Location(0, 1))
+    5
+    >>> travel_distance(Location(0, 0), Location(3, 4))
+    7
+    >>> rn.add_road(Location(0, 1), Location(3, 4), 1, one_way=True)
+    >>> travel_distance(Location(0, 0), Location(3, 4))
+    6
+    >>> travel_distance(Location(3, 4), Location(0, 0))
+    7
+    >>> set_distance_backend(None)
+    """
+    return TRAVEL_TIMES.lookup(origin.row, origin.column,
+                               destination.row, destination.column)
+
+
+def travel_time(origin, destination, speed):
+    """Return the time it takes to travel from the origin to the destination
+    at <speed>, rounded to the nearest integer.
+
+    @type origin: Location
+    @type destination: Location
+    @type speed: int
+    @rtype: int
+
+    >>> travel_time(Location(0, 0), Location(5, 6), 3)
+    4
+    """
+    return TRAVEL_TIMES.lookup(origin.row, origin.column,
+                               destination.row, destination.column, speed)
 
 
 def deserialize_location(location_str):
@@ -1,4 +1,6 @@
-from location import manhattan_distance, Location
+from collections import OrderedDict
+
+from location import travel_distance, Location
 
 """
 The Monitor module contains the Monitor class, the Activity class,
@@ -194,7 +196,7 @@ class Monitor:
                 # Ignore the last activity because it is always a RiderRequest
                 # so there is no movement.
                 while i < len(activities) - 1:
-                    total_distance += (manhattan_distance(
+                    total_distance += (travel_distance(
                         activities[i].location, activities[i + 1].location))
                     i += 1
 
@@ -237,7 +239,7 @@ class Monitor:
                     # Dropoff will never be the first event so it is alright
                     # to index to i-1.
                     if activities[i].description == DROPOFF:
-                        ride_distance += (manhattan_distance(
+                        ride_distance += (travel_distance(
                             activities[i - 1].location, activities[i].location))
                     i += 1
 
@@ -245,3 +247,277 @@ class Monitor:
             count += 1
 
         return ride_distance / count
+
+
+class BoundedMonitor(Monitor):
+    """A monitor that keeps running totals instead of activity histories, so
+    its memory stays flat however long the simulation runs.
+
+    A driver's activities are folded into the distance totals as they
+    happen; only its last location is kept. A rider's request is kept only
+    until the rider's next activity, which gives its wait time; later
+    activities of the rider change nothing in the report. With no eviction,
+    the report is the same as Monitor's.
+
+    Riders still waiting can be evicted, oldest first, when there are more
+    than a ceiling of them or when their request is older than a maximum
+    age. An evicted rider is left out of the average wait time. Optionally,
+    every activity no longer held in memory is appended to a spill file, one
+    line per activity:
+
+        <timestamp> <category> <description> <identifier> <row>,<col>
+
+    Precondition: the first activity of every rider is a request, and
+    activities are notified in timestamp order.
+
+    === Attributes ===
+    @type max_waiting: int | None
+        The most waiting riders held in memory, or None for no limit.
+    @type max_age: int | None
+        The longest time a waiting rider is held in memory, or None for no
+        limit.
+    @type evicted: int
+        The number of riders evicted before their wait time was known.
+    """
+
+    # === Private Attributes ===
+    # @type _waiting: OrderedDict[str, Activity]
+    #     The request of every rider held in memory, oldest first.
+    # @type _drivers: dict[str, Location]
+    #     The location of the last activity of every driver.
+    # @type _riders: int
+    #     The number of riders that have requested a driver.
+    # @type _wait_time: int
+    #     The total wait time of riders whose wait time is known.
+    # @type _waits: int
+    #     The number of riders whose wait time is known.
+    # @type _distance: int
+    #     The total distance driven.
+    # @type _ride_distance: int
+    #     The total distance driven on rides.
+    # @type _spill: str | None
+    #     The name of the file activities are spilled to, if any.
+    # @type _spill_file: file | None
+    #     The spill file, while it is open. It is opened at the first spill
+    #     after the monitor is created or reports.
+
+    def __init__(self, max_waiting=None, max_age=None, spill=None):
+        """Initialize a BoundedMonitor.
+
+        @type self: BoundedMonitor
+        @type max_waiting: int | None
+        @type max_age: int | None
+        @type spill: str | None
+            The name of the file to append spilled activities to, if any.
+        @rtype: None
+        """
+        super().__init__()
+        self.max_waiting, self.max_age, self.evicted = max_waiting, max_age, 0
+        self._waiting, self._drivers = OrderedDict(), {}
+        self._riders, self._wait_time, self._waits = 0, 0, 0
+        self._distance, self._ride_distance = 0, 0
+        self._spill, self._spill_file = spill, None
+
+    def __str__(self):
+        """Return a string representation.
+
+        @type self: BoundedMonitor
+        @rtype: str
+
+        >>> m = BoundedMonitor()
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(3, RIDER, PICKUP, 'Lola', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Bunny', Location(0, 0))
+        >>> print(m)
+        Monitor (1 drivers, 1 riders)
+        """
+        return "Monitor ({} drivers, {} riders)".format(len(self._drivers),
+                                                        self._riders)
+
+    def notify(self, timestamp, category, description, identifier, location):
+        """Notify the monitor of the activity.
+
+        @type self: BoundedMonitor
+        @type timestamp: int
+            The time of the activity.
+        @type category: DRIVER | RIDER
+            The category for the activity.
+        @type description: REQUEST | CANCEL | PICKUP | DROP_OFF
+            A description of the activity.
+        @type identifier: str
+            The identifier for the actor.
+        @type location: Location
+            The location of the activity.
+        @rtype: None
+
+        >>> m = BoundedMonitor(max_waiting=1)
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(2, RIDER, REQUEST, 'Godzilla', Location(0, 0))
+        >>> m.evicted
+        1
+        >>> m.notify(7, RIDER, CANCEL, 'Lola', Location(0, 0))
+        >>> m.notify(12, RIDER, CANCEL, 'Godzilla', Location(0, 0))
+        >>> m._average_wait_time()
+        10.0
+        """
+        if category == DRIVER:
+            last = self._drivers.get(identifier)
+            if last is not None:
+                distance = travel_distance(last, location)
+                self._distance += distance
+                if description == DROPOFF:
+                    self._ride_distance += distance
+            self._drivers[identifier] = location
+            self._spill_activity(timestamp, category, description,
+                                 identifier, location)
+
+        elif description == REQUEST:
+            self._riders += 1
+            self._waiting[identifier] = Activity(timestamp, description,
+                                                 identifier, location)
+            if (self.max_waiting is not None and
+                    len(self._waiting) > self.max_waiting):
+                self._evict()
+
+        else:
+            request = self._waiting.pop(identifier, None)
+            if request is not None:
+                self._wait_time += timestamp - request.time
+                self._waits += 1
+                self._spill_activity(request.time, RIDER, REQUEST,
+                                     identifier, request.location)
+            self._spill_activity(timestamp, category, description,
+                                 identifier, location)
+
+        if self.max_age is not None:
+            # Requests are held oldest first.
+            while self._waiting and (next(iter(self._waiting.values())).time
+                                     < timestamp - self.max_age):
+                self._evict()
+
+    def report(self):
+        """Return a report of the activities that have occurred, and close
+        the spill file, if it is open, so every spilled activity is in it.
+
+        @type self: BoundedMonitor
+        @rtype: dict[str, object]
+
+        >>> import os, tempfile
+        >>> folder = tempfile.TemporaryDirectory()
+        >>> path = os.path.join(folder.name, 'spill.txt')
+        >>> m = BoundedMonitor(spill=path)
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(3, RIDER, PICKUP, 'Lola', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(0, 0))
+        >>> m.report()['rider_wait_time']
+        2.0
+        >>> with open(path) as spilled: print(spilled.read(), end='')
+        1 driver request Charles 0,0
+        1 rider request Lola 0,0
+        3 rider pickup Lola 0,0
+        3 driver pickup Charles 0,0
+        >>> folder.cleanup()
+        """
+        self.close()
+        return super().report()
+
+    def close(self):
+        """Close the spill file, if it is open. Activities spilled later
+        are appended to it again.
+
+        @type self: BoundedMonitor
+        @rtype: None
+        """
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _evict(self):
+        # Evict the oldest waiting rider.
+        #
+        # @type self: BoundedMonitor
+        # @rtype: None
+        identifier, request = self._waiting.popitem(last=False)
+        self.evicted += 1
+        self._spill_activity(request.time, RIDER, REQUEST, identifier,
+                             request.location)
+
+    def _spill_activity(self, timestamp, category, description, identifier,
+                        location):
+        # Append the activity to the spill file, if any, opening it if it is
+        # not open.
+        #
+        # @type self: BoundedMonitor
+        # @rtype: None
+        if self._spill is not None:
+            if self._spill_file is None:
+                self._spill_file = open(self._spill, 'a')
+            self._spill_file.write("{} {} {} {} {},{}\n".format(
+                timestamp, category, description, identifier, location.row,
+                location.column))
+
+    def _average_wait_time(self):
+        """Return the average wait time of riders that have either been picked
+        up or have cancelled their ride.
+
+        @type self: BoundedMonitor
+        @rtype: float
+
+        >>> m = BoundedMonitor()
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(101, RIDER, CANCEL, 'Lola', Location(0, 0))
+        >>> m.notify(101, RIDER, PICKUP, 'Lola', Location(0, 0))
+        >>> m._average_wait_time()
+        100.0
+        """
+        return self._wait_time / self._waits
+
+    def _average_total_distance(self):
+        """Return the average distance drivers have driven.
+
+        @type self: BoundedMonitor
+        @rtype: float
+
+        >>> m = BoundedMonitor()
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(3, 3))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Charles', Location(6, 6))
+        >>> m._average_total_distance()
+        12.0
+        """
+        return self._distance / len(self._drivers)
+
+    def _average_ride_distance(self):
+        """Return the average distance drivers have driven on rides.
+
+        @type self: BoundedMonitor
+        @rtype: float
+
+        >>> m = BoundedMonitor()
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(3, 3))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Charles', Location(6, 6))
+        >>> m._average_ride_distance()
+        6.0
+        """
+        return self._ride_distance / len(self._drivers)
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import tracemalloc
+    from fast_simulation import FastSimulation
+    from scenario import random_events
+
+    # Peak memory of the activity records of a long run.
+    for monitor in (Monitor(), BoundedMonitor()):
+        events = random_events(200, 20000, duration=40000, seed=148)
+        tracemalloc.start()
+        report = FastSimulation(monitor).run(events)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print('{}: peak {:.1f} MB, {}'.format(type(monitor).__name__,
+                                              peak / 2 ** 20, report))
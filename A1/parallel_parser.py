@@ -0,0 +1,246 @@
+"""
+The parallel_parser module reads very large event files on every core.
+
+The file is memory-mapped and split into chunks at line boundaries. A pool
+of processes parses the chunks into compact arrays, each chunk sorted by
+timestamp, and the chunks are then merged by timestamp into the list of
+events Simulation.run takes. Events with the same timestamp keep their
+order in the file, so a simulation of the merged list is the same as one of
+create_event_list.
+
+Blank lines and lines that start with '#' are skipped, as in
+create_event_list. A malformed line does not stop the load: it is reported
+with its offset in the file, and the rest of the file is parsed.
+"""
+import heapq
+import mmap
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from driver import Driver
+from event import DriverRequest, RiderRequest
+from location import Location
+from rider import Rider
+
+# The kinds of parsed records, by the event type in the file.
+_DRIVER, _RIDER = 0, 1
+_KINDS = {b'DriverRequest': _DRIVER, b'RiderRequest': _RIDER}
+# The range of the numbers the arrays of a parsed chunk hold.
+_SMALLEST, _LARGEST = -1 << 63, (1 << 63) - 1
+
+
+def parse_events(filename, workers=None, chunk_size=1 << 24):
+    """Return the events in the file at <filename>, in timestamp order, and
+    the malformed lines of the file, as (offset, line, reason) tuples.
+
+    Files no larger than <chunk_size> bytes are parsed in this process.
+
+    @type filename: str
+    @type workers: int | None
+        The number of processes to parse with; one per core if None.
+    @type chunk_size: int
+        The approximate number of bytes in each chunk.
+    @rtype: (list[Event], list[(int, str, str)])
+
+    >>> events, errors = parse_events('events_small.txt')
+    >>> [str(event) for event in events]
+    ['1 -- Dan: Request a driver', '10 -- Arnold: Request a rider']
+    >>> errors
+    []
+    >>> import os, tempfile
+    >>> with tempfile.TemporaryDirectory() as folder:
+    ...     path = os.path.join(folder, 'events.txt')
+    ...     with open(path, 'w') as out:
+    ...         _ = out.write('1 DriverRequest Dan 1,1 1\\n'
+    ...                       '{} DriverRequest Amy 1,1 1\\n'.format(2 ** 63))
+    ...     events, errors = parse_events(path)
+    >>> [str(event) for event in events]
+    ['1 -- Dan: Request a rider']
+    >>> [(offset, reason) for offset, _, reason in errors]
+    [(26, 'ValueError: 9223372036854775808 does not fit in 64 bits')]
+    """
+    bounds = _chunk_bounds(filename, chunk_size)
+    if len(bounds) <= 1:
+        chunks = [_parse_chunk(filename, start, end) for start, end in bounds]
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(_parse_chunk, [filename] * len(bounds),
+                                   [start for start, _ in bounds],
+                                   [end for _, end in bounds]))
+
+    errors = [error for chunk in chunks for error in chunk[-1]]
+    # Offsets are unique, so records are merged by timestamp, then offset,
+    # without comparing chunks.
+    events = [_build_event(chunk, i) for _, _, chunk, i in
+              heapq.merge(*[_positions(chunk) for chunk in chunks])]
+    return events, errors
+
+
+def _chunk_bounds(filename, chunk_size):
+    # Return the (start, end) byte offsets of chunks of about chunk_size
+    # bytes of the file at filename, each ending just after a newline or at
+    # the end of the file.
+    #
+    # @type filename: str
+    # @type chunk_size: int
+    # @rtype: list[(int, int)]
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+
+    bounds, start = [], 0
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        while start < size:
+            end = data.find(b'\n', min(start + chunk_size, size) - 1)
+            end = size if end == -1 else end + 1
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _parse_chunk(filename, start, end):
+    # Parse the lines of the file at filename from byte offset start up to
+    # end, and return them as parallel arrays sorted by timestamp:
+    # timestamps, file offsets, kinds, five numbers per record (row and
+    # column of the location, then the speed of a driver, or the row and
+    # column of a rider's destination and the rider's patience), the
+    # identifiers, and the malformed lines.
+    #
+    # @type filename: str
+    # @type start: int
+    # @type end: int
+    # @rtype: (array, array, bytes, array, list[str], list[(int, str, str)])
+    records, errors = [], []
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        offset = start
+        for line in data[start:end].split(b'\n'):
+            line_offset, offset = offset, offset + len(line) + 1
+            line = line.strip()
+            if not line or line.startswith(b'#'):
+                continue
+            try:
+                records.append(_parse_line(line, line_offset))
+            except (ValueError, IndexError, KeyError) as error:
+                errors.append((line_offset,
+                               line.decode(errors='replace'),
+                               '{}: {}'.format(type(error).__name__, error)))
+
+    # Offsets increase through the file, so the sort keeps the lines with
+    # equal timestamps in file order.
+    records.sort(key=_first)
+    numbers = array('q')
+    for record in records:
+        numbers.extend(record[4:])
+    return (array('q', [record[0] for record in records]),
+            array('q', [record[1] for record in records]),
+            bytes(record[2] for record in records), numbers,
+            [record[3] for record in records], errors)
+
+
+def _parse_line(line, offset):
+    # Return the record of the event on line, which starts at offset in the
+    # file, as in create_event_list. Raise ValueError, IndexError or KeyError
+    # if it is malformed, or if a number does not fit in the 64 bit arrays
+    # the chunk is returned in.
+    #
+    # @type line: bytes
+    # @type offset: int
+    # @rtype: tuple
+    tokens = line.split()
+    kind = _KINDS[tokens[1]]
+    origin = tokens[3].split(b',')
+    if kind == _DRIVER:
+        record = (int(tokens[0]), offset, kind, tokens[2].decode(),
+                  int(origin[0]), int(origin[1]), int(tokens[4]), 0, 0)
+    else:
+        destination = tokens[4].split(b',')
+        record = (int(tokens[0]), offset, kind, tokens[2].decode(),
+                  int(origin[0]), int(origin[1]), int(destination[0]),
+                  int(destination[1]), int(tokens[-1]))
+    for number in (record[0],) + record[4:]:
+        if not _SMALLEST <= number <= _LARGEST:
+            raise ValueError('{} does not fit in 64 bits'.format(number))
+    return record
+
+
+def _first(record):
+    # Return the timestamp of a record.
+    #
+    # @type record: tuple
+    # @rtype: int
+    return record[0]
+
+
+def _positions(chunk):
+    # Yield (timestamp, offset, chunk, index) for every record of chunk.
+    #
+    # @type chunk: tuple
+    # @rtype: generator[(int, int, tuple, int)]
+    timestamps, offsets = chunk[0], chunk[1]
+    for i in range(len(timestamps)):
+        yield timestamps[i], offsets[i], chunk, i
+
+
+def _build_event(chunk, i):
+    # Return the event of record i of chunk.
+    #
+    # @type chunk: tuple
+    # @type i: int
+    # @rtype: Event
+    timestamps, _, kinds, numbers, names, _ = chunk
+    row, column, a, b, patience = numbers[5 * i:5 * i + 5]
+    if kinds[i] == _DRIVER:
+        return DriverRequest(timestamps[i],
+                             Driver(names[i], Location(row, column), a))
+    return RiderRequest(timestamps[i],
+                        Rider(names[i], Location(row, column),
+                              Location(a, b), patience))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import random
+    import tempfile
+    from time import time
+    from event import create_event_list
+
+    with tempfile.TemporaryDirectory() as folder:
+        # A large generated event file, with comments and a malformed line.
+        random.seed(148)
+        path = os.path.join(folder, 'events.txt')
+        with open(path, 'w') as out:
+            out.write('# A generated event file\n\n')
+            for i in range(1000000):
+                if i % 10 == 0:
+                    out.write('{} DriverRequest driver{} {},{} {}\n'
+                              .format(i // 10, i, random.randrange(50),
+                                      random.randrange(50),
+                                      random.randint(1, 3)))
+                else:
+                    out.write('{} RiderRequest rider{} {},{} {},{} {}\n'
+                              .format(i // 10, i, random.randrange(50),
+                                      random.randrange(50),
+                                      random.randrange(50),
+                                      random.randrange(50),
+                                      random.randint(1, 30)))
+            out.write('12 RiderRequest broken 1,1\n')
+
+        start = time()
+        parsed, malformed = parse_events(path)
+        parallel_time = time() - start
+        print('parse_events: {} events in {:.2f} seconds, malformed: {}'
+              .format(len(parsed), parallel_time, malformed))
+
+        # create_event_list fails on the malformed line, so time it without.
+        with open(path, 'rb+') as out:
+            out.truncate(os.path.getsize(path) - len(b'12 RiderRequest broken '
+                                                     b'1,1\n'))
+        start = time()
+        parsed = create_event_list(path)
+        print('create_event_list: {} events in {:.2f} seconds'.format(
+            len(parsed), time() - start))
@@ -0,0 +1,186 @@
+"""
+The pipeline_monitor module contains the PipelinedMonitor class, a Monitor
+that moves the bookkeeping for each activity off the event loop and onto a
+separate consumer thread.
+"""
+import threading
+from queue import Queue
+
+from location import Location
+from monitor import Monitor, RIDER, DRIVER, REQUEST, CANCEL, PICKUP, DROPOFF
+
+
+class PipelinedMonitor(Monitor):
+    """A monitor that hands activities to another monitor running on a
+    consumer thread.
+
+    notify only appends a compact tuple to a chunk; full chunks go through a
+    bounded queue to the consumer, which passes every activity, in order, to
+    the aggregating monitor. When the consumer falls behind and the queue is
+    full, notify waits for it to catch up. Reports are those of the
+    aggregating monitor once every activity has reached it, so they are
+    identical to notifying the aggregating monitor directly.
+
+    === Attributes ===
+    @type aggregator: Monitor
+        The monitor the consumer thread notifies.
+    @type chunk_size: int
+        The number of activities handed to the consumer at a time.
+    """
+
+    # === Private Attributes ===
+    # @type _chunk: list[(int, str, str, str, Location)]
+    #     Activities not yet handed to the consumer.
+    # @type _queue: Queue[list | None]
+    #     Chunks waiting for the consumer; None tells it to stop.
+    # @type _consumer: threading.Thread | None
+    #     The consumer thread, if it is running.
+    # @type _error: Exception | None
+    #     An error raised while the consumer was notifying the aggregator.
+
+    def __init__(self, aggregator=None, capacity=64, chunk_size=1024):
+        """Initialize a PipelinedMonitor.
+
+        @type self: PipelinedMonitor
+        @type aggregator: Monitor | None
+            The monitor to aggregate with; a new Monitor if None.
+        @type capacity: int
+            The number of chunks that may wait for the consumer.
+        @type chunk_size: int
+        @rtype: None
+        """
+        super().__init__()
+        self.aggregator = Monitor() if aggregator is None else aggregator
+        self.chunk_size, self._chunk = chunk_size, []
+        self._queue = Queue(capacity)
+        self._consumer, self._error = None, None
+
+    def __str__(self):
+        """Return a string representation.
+
+        @type self: PipelinedMonitor
+        @rtype: str
+
+        >>> m = PipelinedMonitor()
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> print(m)
+        Monitor (0 drivers, 1 riders)
+        """
+        self._drain()
+        return str(self.aggregator)
+
+    def notify(self, timestamp, category, description, identifier, location):
+        """Notify the monitor of the activity.
+
+        @type self: PipelinedMonitor
+        @type timestamp: int
+            The time of the activity.
+        @type category: DRIVER | RIDER
+            The category for the activity.
+        @type description: REQUEST | CANCEL | PICKUP | DROP_OFF
+            A description of the activity.
+        @type identifier: str
+            The identifier for the actor.
+        @type location: Location
+            The location of the activity.
+        @rtype: None
+        """
+        self._chunk.append((timestamp, category, description, identifier,
+                            location))
+        if len(self._chunk) >= self.chunk_size:
+            self._hand_off()
+
+    def report(self):
+        """Return a report of the activities that have occurred.
+
+        @type self: PipelinedMonitor
+        @rtype: dict[str, object]
+
+        >>> m = PipelinedMonitor(chunk_size=2)
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(101, RIDER, CANCEL, 'Lola', Location(0, 0))
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(3, 3))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Charles', Location(6, 6))
+        >>> m.report() == {'rider_wait_time': 100.0,
+        ...                'driver_total_distance': 12.0,
+        ...                'driver_ride_distance': 6.0}
+        True
+        """
+        self._drain()
+        return self.aggregator.report()
+
+    def _hand_off(self):
+        # Put the current chunk on the queue, starting the consumer if it is
+        # not running. Wait if the queue is full.
+        #
+        # @type self: PipelinedMonitor
+        # @rtype: None
+        if self._consumer is None:
+            self._consumer = threading.Thread(target=self._consume,
+                                              daemon=True)
+            self._consumer.start()
+        self._queue.put(self._chunk)
+        self._chunk = []
+
+    def _consume(self):
+        # Notify the aggregator of every activity in every chunk on the
+        # queue, until told to stop.
+        #
+        # @type self: PipelinedMonitor
+        # @rtype: None
+        notify = self.aggregator.notify
+        chunk = self._queue.get()
+        while chunk is not None:
+            if self._error is None:
+                try:
+                    for activity in chunk:
+                        notify(*activity)
+                except Exception as error:
+                    # Keep taking chunks so notify never blocks forever; the
+                    # error is raised again when a report is asked for.
+                    self._error = error
+            chunk = self._queue.get()
+
+    def _drain(self):
+        # Wait until the aggregator has been notified of every activity.
+        #
+        # @type self: PipelinedMonitor
+        # @rtype: None
+        if self._chunk:
+            self._hand_off()
+        if self._consumer is not None:
+            self._queue.put(None)
+            self._consumer.join()
+            self._consumer = None
+        if self._error is not None:
+            raise self._error
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import random
+    from time import time
+    from sqlite_monitor import SQLiteMonitor
+
+    # Event loop time spent notifying an inline monitor against a pipelined
+    # one, both aggregating into SQLite.
+    random.seed(148)
+    spots = [Location(random.randrange(50), random.randrange(50))
+             for _ in range(100)]
+    activities = [(i // 10, DRIVER, (REQUEST, PICKUP, DROPOFF)[i % 3],
+                   'driver{}'.format(i % 5000), random.choice(spots))
+                  for i in range(200000)]
+    activities += [(0, RIDER, REQUEST, 'rider', spots[0]),
+                   (1, RIDER, PICKUP, 'rider', spots[0])]
+    for monitor in (SQLiteMonitor(), PipelinedMonitor(SQLiteMonitor())):
+        start = time()
+        for activity in activities:
+            monitor.notify(*activity)
+        loop = time() - start
+        report = monitor.report()
+        print('{}: {:.2f} seconds in the loop, {:.2f} seconds in all'.format(
+            type(monitor).__name__, loop, time() - start))
+        print(report)
@@ -0,0 +1,467 @@
+"""
+The road_network module contains the RoadNetwork class, a distance backend
+that measures travel over a weighted road graph instead of an unobstructed
+grid, and load_road_network, which builds one from a road file.
+
+A road file lists one street segment per line:
+
+    <row>,<col> <row>,<col> <weight> [oneway]
+
+Segments are two-way unless the line ends with 'oneway', in which case the
+segment may only be driven from the first location to the second. Closed
+streets are simply left out. Blank lines and lines starting with '#' are
+skipped, as in the event files.
+
+Point-to-point queries use the ALT algorithm (A*, Landmarks and the Triangle
+inequality): distances to and from a handful of landmarks are computed once,
+and give a lower bound that steers the search straight to the destination.
+The landmark tables can be saved to a file so they are not recomputed at
+every startup.
+"""
+import hashlib
+import heapq
+import json
+from collections import OrderedDict
+
+from location import (Location, TRAVEL_TIMES, deserialize_location,
+                      distance_backend)
+
+
+class RoadNetwork:
+    """A weighted, directed road graph over grid locations.
+
+    === Attributes ===
+    @type cache_size: int
+        The number of recent origin/destination distances remembered.
+    @type hits: int
+        The number of distance queries answered from the cache.
+    @type misses: int
+        The number of distance queries that needed a search.
+    """
+
+    # === Private Attributes ===
+    # @type _roads: dict[(int, int), list[((int, int), int)]]
+    #     For every intersection, the intersections reachable from it by a
+    #     single street segment, and the weight of that segment.
+    # @type _reverse: dict[(int, int), list[((int, int), int)]]
+    #     _roads with every segment reversed.
+    # @type _landmarks: list[(int, int)]
+    #     The landmark intersections chosen by preprocess.
+    # @type _from_landmark: list[dict[(int, int), int]]
+    #     The distance from each landmark to every intersection.
+    # @type _to_landmark: list[dict[(int, int), int]]
+    #     The distance from every intersection to each landmark.
+    # @type _vectors: dict[(int, int), (tuple, tuple)] | None
+    #     For every intersection, its distances from and to each landmark
+    #     (None where there is no route), or None until the next query.
+    # @type _cache: OrderedDict[(int, int, int, int), int | None]
+    #     Recent query results, least recently used first.
+
+    def __init__(self, cache_size=4096):
+        """Initialize an empty RoadNetwork.
+
+        @type self: RoadNetwork
+        @type cache_size: int
+        @rtype: None
+        """
+        self._roads, self._reverse = {}, {}
+        self._landmarks, self._from_landmark, self._to_landmark = [], [], []
+        self._vectors = None
+        self._cache = OrderedDict()
+        self.cache_size, self.hits, self.misses = cache_size, 0, 0
+
+    def __str__(self):
+        """Return a string representation.
+
+        @type self: RoadNetwork
+        @rtype: str
+
+        >>> rn = RoadNetwork()
+        >>> rn.add_road(Location(0, 0), Location(0, 1), 1)
+        >>> print(rn)
+        RoadNetwork (2 intersections, 0 landmarks)
+        """
+        return "RoadNetwork ({} intersections, {} landmarks)".format(
+            len(self._roads), len(self._landmarks))
+
+    def add_road(self, origin, destination, weight, one_way=False):
+        """Add a street segment from origin to destination.
+
+        Adding a road invalidates any landmarks and cached distances,
+        including the travel times remembered in location.TRAVEL_TIMES if
+        self is the installed distance backend.
+
+        @type self: RoadNetwork
+        @type origin: Location
+        @type destination: Location
+        @type weight: int
+            The distance along the segment. Precondition: weight >= 0.
+        @type one_way: bool
+        @rtype: None
+        """
+        start = (origin.row, origin.column)
+        end = (destination.row, destination.column)
+        for node in (start, end):
+            self._roads.setdefault(node, [])
+            self._reverse.setdefault(node, [])
+
+        self._roads[start].append((end, weight))
+        self._reverse[end].append((start, weight))
+        if not one_way:
+            self._roads[end].append((start, weight))
+            self._reverse[start].append((end, weight))
+
+        self._landmarks, self._from_landmark, self._to_landmark = [], [], []
+        self._vectors = None
+        self._cache.clear()
+        if distance_backend() is self:
+            TRAVEL_TIMES.clear()
+
+    def preprocess(self, num_landmarks=4):
+        """Choose landmarks and compute the distance tables for them.
+
+        Landmarks are chosen greedily: each one is the intersection farthest
+        from the landmarks chosen so far.
+
+        @type self: RoadNetwork
+        @type num_landmarks: int
+        @rtype: None
+        """
+        self._landmarks, self._from_landmark, self._to_landmark = [], [], []
+        self._vectors = None
+        self._cache.clear()
+        if not self._roads:
+            return
+
+        closest = None
+        candidate = min(self._roads)
+        while len(self._landmarks) < min(num_landmarks, len(self._roads)):
+            self._landmarks.append(candidate)
+            self._from_landmark.append(_shortest_paths(self._roads,
+                                                       candidate))
+            self._to_landmark.append(_shortest_paths(self._reverse,
+                                                     candidate))
+
+            # The next landmark is the reachable intersection farthest from
+            # every landmark chosen so far.
+            from_last = self._from_landmark[-1]
+            if closest is None:
+                closest = dict(from_last)
+            else:
+                for node, dist in from_last.items():
+                    if dist < closest.get(node, dist + 1):
+                        closest[node] = dist
+            remaining = [node for node in closest
+                         if node not in self._landmarks]
+            if not remaining:
+                break
+            candidate = max(remaining, key=lambda node: (closest[node], node))
+
+    def distance(self, origin, destination):
+        """Return the length of the shortest route from origin to
+        destination.
+
+        Raise ValueError if either location is not on the network, or there
+        is no route between them.
+
+        @type self: RoadNetwork
+        @type origin: Location
+        @type destination: Location
+        @rtype: int
+
+        >>> rn = RoadNetwork()
+        >>> rn.add_road(Location(0, 0), Location(0, 1), 1)
+        >>> rn.add_road(Location(0, 1), Location(1, 1), 1, one_way=True)
+        >>> rn.add_road(Location(1, 1), Location(1, 0), 1)
+        >>> rn.add_road(Location(1, 0), Location(0, 0), 5)
+        >>> rn.preprocess(2)
+        >>> rn.distance(Location(0, 0), Location(1, 0))
+        3
+        >>> rn.distance(Location(1, 0), Location(0, 1))
+        6
+        >>> rn.distance(Location(0, 0), Location(1, 0))
+        3
+        >>> rn.hits, rn.misses
+        (1, 2)
+        """
+        key = (origin.row, origin.column, destination.row, destination.column)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+
+        else:
+            self.misses += 1
+            self._cache[key] = self._search((origin.row, origin.column),
+                                            (destination.row,
+                                             destination.column))
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+        if self._cache[key] is None:
+            raise ValueError("No route between the locations.")
+        return self._cache[key]
+
+    def _search(self, start, goal):
+        # Return the shortest route length from start to goal using A* with
+        # the landmark lower bound, or None if there is no route.
+        #
+        # @type self: RoadNetwork
+        # @type start: (int, int)
+        # @type goal: (int, int)
+        # @rtype: int | None
+        if start not in self._roads or goal not in self._roads:
+            raise ValueError("Location is not on the road network.")
+
+        if self._vectors is None:
+            self._vectors = {
+                node: (tuple(table.get(node) for table in self._from_landmark),
+                       tuple(table.get(node) for table in self._to_landmark))
+                for node in self._roads}
+
+        # If a landmark reaches start but not goal (or goal reaches a
+        # landmark that start does not), start cannot reach goal either.
+        goal_from, goal_to = self._vectors[goal]
+        start_from, start_to = self._vectors[start]
+        for i in range(len(self._landmarks)):
+            if ((start_from[i] is not None and goal_from[i] is None) or
+                    (goal_to[i] is not None and start_to[i] is None)):
+                return None
+
+        vectors = self._vectors
+        pairs_from = [i for i in range(len(goal_from))
+                      if goal_from[i] is not None]
+        pairs_to = [i for i in range(len(goal_to)) if goal_to[i] is not None]
+
+        def lower_bound(node):
+            # Return a lower bound on the distance from node to goal, from
+            # the triangle inequality over every landmark.
+            node_from, node_to = vectors[node]
+            bound = 0
+            for i in pairs_from:
+                if node_from[i] is not None:
+                    diff = goal_from[i] - node_from[i]
+                    if diff > bound:
+                        bound = diff
+            for i in pairs_to:
+                if node_to[i] is not None:
+                    diff = node_to[i] - goal_to[i]
+                    if diff > bound:
+                        bound = diff
+            return bound
+
+        # Ties on the estimate are broken in favour of the longer partial
+        # route, which is closer to the goal on grid-like networks.
+        best = {start: 0}
+        frontier = [(lower_bound(start), 0, start)]
+        while frontier:
+            _, dist, node = heapq.heappop(frontier)
+            dist = -dist
+            if node == goal:
+                return dist
+            # Skip entries superseded by a shorter route.
+            if dist > best[node]:
+                continue
+            for neighbour, weight in self._roads[node]:
+                new_dist = dist + weight
+                if new_dist < best.get(neighbour, new_dist + 1):
+                    best[neighbour] = new_dist
+                    heapq.heappush(frontier,
+                                   (new_dist + lower_bound(neighbour),
+                                    -new_dist, neighbour))
+
+        return None
+
+    def save_preprocessing(self, filename, fingerprint=''):
+        """Save the landmark tables to the file at <filename>, as JSON.
+
+        @type self: RoadNetwork
+        @type filename: str
+        @type fingerprint: str
+            Identifies the road data the tables were computed for.
+        @rtype: None
+        """
+        with open(filename, 'w') as file:
+            json.dump({'fingerprint': fingerprint,
+                       'landmarks': [list(node) for node in self._landmarks],
+                       'from': [_flatten(table)
+                                for table in self._from_landmark],
+                       'to': [_flatten(table)
+                              for table in self._to_landmark]}, file)
+
+    def load_preprocessing(self, filename, fingerprint=''):
+        """Load landmark tables saved by save_preprocessing.
+
+        Return False, leaving self unchanged, if the file is missing, was
+        saved for different road data, or does not hold landmark tables.
+
+        @type self: RoadNetwork
+        @type filename: str
+        @type fingerprint: str
+        @rtype: bool
+
+        >>> import os, tempfile
+        >>> rn = RoadNetwork()
+        >>> rn.add_road(Location(0, 0), Location(0, 1), 1)
+        >>> rn.add_road(Location(0, 1), Location(1, 1), 2, one_way=True)
+        >>> rn.preprocess(2)
+        >>> with tempfile.TemporaryDirectory() as folder:
+        ...     path = os.path.join(folder, 'landmarks.json')
+        ...     rn.save_preprocessing(path, 'roads')
+        ...     loaded = RoadNetwork()
+        ...     found = (loaded.load_preprocessing(path, 'other'),
+        ...              loaded.load_preprocessing(path, 'roads'))
+        ...     with open(path, 'r+') as file:
+        ...         _ = file.truncate(40)
+        ...     found += (RoadNetwork().load_preprocessing(path, 'roads'),)
+        >>> found
+        (False, True, False)
+        >>> loaded._landmarks == rn._landmarks
+        True
+        >>> loaded._to_landmark == rn._to_landmark
+        True
+        """
+        try:
+            with open(filename) as file:
+                saved = json.load(file)
+            if saved['fingerprint'] != fingerprint:
+                return False
+            landmarks = [_node(node) for node in saved['landmarks']]
+            from_landmark = [_unflatten(table) for table in saved['from']]
+            to_landmark = [_unflatten(table) for table in saved['to']]
+        except (OSError, ValueError, TypeError, KeyError):
+            return False
+        if not len(landmarks) == len(from_landmark) == len(to_landmark):
+            return False
+
+        self._landmarks = landmarks
+        self._from_landmark, self._to_landmark = from_landmark, to_landmark
+        self._vectors = None
+        self._cache.clear()
+        return True
+
+
+def _flatten(table):
+    # Return the distances of table as a flat list of the row, column and
+    # distance of each intersection.
+    #
+    # @type table: dict[(int, int), int]
+    # @rtype: list[int]
+    return [number for (row, column), dist in table.items()
+            for number in (row, column, dist)]
+
+
+def _unflatten(numbers):
+    # Return the table of distances flattened into numbers by _flatten.
+    # Raise ValueError or TypeError if numbers is not such a list.
+    #
+    # @type numbers: list[int]
+    # @rtype: dict[(int, int), int]
+    if (len(numbers) % 3 or
+            not all([type(number) is int for number in numbers])):
+        raise ValueError("Not a flattened landmark table.")
+    return {(numbers[i], numbers[i + 1]): numbers[i + 2]
+            for i in range(0, len(numbers), 3)}
+
+
+def _node(pair):
+    # Return the intersection whose row and column are in pair. Raise
+    # ValueError if pair is not two ints.
+    #
+    # @type pair: list[int]
+    # @rtype: (int, int)
+    if len(pair) != 2 or not all([type(number) is int for number in pair]):
+        raise ValueError("Not an intersection.")
+    return pair[0], pair[1]
+
+
+def _shortest_paths(roads, source):
+    # Return the shortest distance from source to every intersection
+    # reachable from it in roads, using Dijkstra's algorithm.
+    #
+    # @type roads: dict[(int, int), list[((int, int), int)]]
+    # @type source: (int, int)
+    # @rtype: dict[(int, int), int]
+    best = {source: 0}
+    frontier = [(0, source)]
+    while frontier:
+        dist, node = heapq.heappop(frontier)
+        if dist > best[node]:
+            continue
+        for neighbour, weight in roads[node]:
+            new_dist = dist + weight
+            if new_dist < best.get(neighbour, new_dist + 1):
+                best[neighbour] = new_dist
+                heapq.heappush(frontier, (new_dist, neighbour))
+    return best
+
+
+def load_road_network(filename, preprocessing_file=None, num_landmarks=4):
+    """Return a RoadNetwork built from the road file at <filename>.
+
+    If <preprocessing_file> is given, landmark tables are loaded from it when
+    they match the road file, and computed and saved to it otherwise.
+
+    Precondition: the file at <filename> is in the road file format.
+
+    @type filename: str
+    @type preprocessing_file: str | None
+    @type num_landmarks: int
+    @rtype: RoadNetwork
+    """
+    network = RoadNetwork()
+
+    with open(filename, 'rb') as file:
+        data = file.read()
+
+    for line in data.decode().splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        tokens = line.split()
+        network.add_road(deserialize_location(tokens[0]),
+                         deserialize_location(tokens[1]),
+                         int(tokens[2]),
+                         len(tokens) > 3 and tokens[3] == 'oneway')
+
+    fingerprint = '{}:{}'.format(hashlib.sha1(data).hexdigest(),
+                                 num_landmarks)
+    if (preprocessing_file is None or
+            not network.load_preprocessing(preprocessing_file, fingerprint)):
+        network.preprocess(num_landmarks)
+        if preprocessing_file is not None:
+            network.save_preprocessing(preprocessing_file, fingerprint)
+
+    return network
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import random
+    from time import time
+
+    # A 60x60 grid city with a tenth of its blocks closed, answering 10000
+    # random dispatch queries.
+    random.seed(148)
+    city = RoadNetwork()
+    for r in range(60):
+        for c in range(60):
+            for dr, dc in ((0, 1), (1, 0)):
+                if r + dr < 60 and c + dc < 60 and random.random() > 0.1:
+                    city.add_road(Location(r, c), Location(r + dr, c + dc), 1)
+    start = time()
+    city.preprocess(8)
+    print('Preprocessed {} in {} seconds.'.format(city, time() - start))
+
+    spots = [Location(random.randrange(60), random.randrange(60))
+             for _ in range(200)]
+    start = time()
+    for _ in range(10000):
+        try:
+            city.distance(random.choice(spots), random.choice(spots))
+        except ValueError:
+            pass
+    print('10000 queries in {} seconds ({} cache hits).'.format(
+        time() - start, city.hits))
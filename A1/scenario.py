@@ -0,0 +1,52 @@
+"""
+The scenario module generates random simulation scenarios, for benchmarks
+and for checking simulation engines against each other.
+"""
+import random
+
+from driver import Driver
+from event import DriverRequest, RiderRequest
+from location import Location
+from rider import Rider
+
+
+def random_events(num_drivers, num_riders, size=50, duration=1000,
+                  max_speed=3, max_patience=30, seed=None):
+    """Return a list of DriverRequest and RiderRequest events for a random
+    scenario on a <size> by <size> grid.
+
+    Drivers all request riders within the first tenth of the scenario, and
+    riders request drivers at any time before <duration>.
+
+    @type num_drivers: int
+    @type num_riders: int
+    @type size: int
+    @type duration: int
+    @type max_speed: int
+    @type max_patience: int
+    @type seed: int | None
+    @rtype: list[Event]
+
+    >>> events = random_events(2, 3, seed=148)
+    >>> len(events)
+    5
+    >>> print(events[0].driver.identifier, events[-1].rider.identifier)
+    driver0 rider2
+    """
+    rng = random.Random(seed)
+
+    def spot():
+        # Return a random location on the grid.
+        return Location(rng.randrange(size), rng.randrange(size))
+
+    events = []
+    for i in range(num_drivers):
+        driver = Driver('driver{}'.format(i), spot(),
+                        rng.randint(1, max_speed))
+        events.append(DriverRequest(rng.randrange(max(duration // 10, 1)),
+                                    driver))
+    for i in range(num_riders):
+        rider = Rider('rider{}'.format(i), spot(), spot(),
+                      rng.randint(1, max_patience))
+        events.append(RiderRequest(rng.randrange(duration), rider))
+    return events
@@ -29,6 +29,10 @@ class Simulation:
     #     sorting order.
     # @type _dispatcher: Dispatcher
     #     The dispatcher associated with the simulation.
+    # @type _monitor: Monitor
+    #     The monitor that records the activities of the simulation.
+    # @type _trace: TraceWriter | None
+    #     The writer every event is recorded with, if any.
 
     def __init__(self):
         """Initialize a Simulation.
@@ -39,6 +43,7 @@ class Simulation:
         self._events = PriorityQueue()
         self._dispatcher = Dispatcher()
         self._monitor = Monitor()
+        self._trace = None
 
     def run(self, initial_events):
         """Run the simulation on the list of events in <initial_events>.
@@ -64,14 +69,55 @@ class Simulation:
         while not self._events.is_empty():
             sub_event = self._events.remove()
             """ @type sub_event: Event """
+            # Cancelled events stay in the queue, but never happen.
+            if sub_event.cancelled:
+                continue
+            if self._trace is not None:
+                self._trace.record_event(sub_event)
             cur_event = sub_event.do(self._dispatcher, self._monitor)
             if cur_event is not None:
                 for thing in cur_event:
                     self._events.add(thing)
 
+        if self._trace is not None:
+            self._trace.flush()
         return self._monitor.report()
 
 
+class ConfiguredSimulation(Simulation):
+    """A Simulation that records its activities with a chosen monitor,
+    records its events with a trace writer, or dispatches with a chosen
+    dispatcher, leaving the interface of Simulation as it is.
+    """
+
+    def __init__(self, monitor=None, trace=None, dispatcher=None):
+        """Initialize a ConfiguredSimulation.
+
+        @type self: ConfiguredSimulation
+        @type monitor: Monitor | None
+            The monitor to record activities with, such as a
+            sqlite_monitor.SQLiteMonitor; a new Monitor if None.
+        @type trace: TraceWriter | None
+            An event_trace.TraceWriter to record every event with, if any.
+        @type dispatcher: Dispatcher | None
+            The dispatcher to use, such as Dispatcher(redispatch=True); a new
+            Dispatcher if None.
+        @rtype: None
+
+        >>> ConfiguredSimulation(dispatcher=Dispatcher(redispatch=True)).run(
+        ...     create_event_list('events_small.txt')) == {
+        ...     'rider_wait_time': 11.0, 'driver_total_distance': 14.0,
+        ...     'driver_ride_distance': 10.0}
+        True
+        """
+        Simulation.__init__(self)
+        if monitor is not None:
+            self._monitor = monitor
+        if dispatcher is not None:
+            self._dispatcher = dispatcher
+        self._trace = trace
+
+
 if __name__ == "__main__":
     events = create_event_list("events.txt")
     sim = Simulation()
@@ -0,0 +1,270 @@
+"""
+The sqlite_monitor module contains the SQLiteMonitor class, a Monitor that
+streams every activity into a SQLite database instead of holding them in
+memory, so the activity history of a run can be kept for audits and
+reported on even when it is far larger than RAM.
+"""
+import sqlite3
+
+from location import Location, TRAVEL_TIMES
+from monitor import Monitor, RIDER, DRIVER, REQUEST, CANCEL, PICKUP, DROPOFF
+
+
+class SQLiteMonitor(Monitor):
+    """A monitor that records activities in a SQLite database.
+
+    Activities are buffered in memory and written in batches, each inside a
+    single transaction. Every monitor records a new run in the database, so
+    earlier runs in the same file are kept.
+
+    === Attributes ===
+    @type batch_size: int
+        The largest number of activities held in memory before they are
+        written to the database.
+    @type run: int
+        The number identifying this monitor's run in the database.
+    """
+
+    # === Private Attributes ===
+    # @type _connection: sqlite3.Connection
+    #     The connection to the database.
+    # @type _batch: list[tuple]
+    #     Activities that have not been written to the database yet.
+
+    def __init__(self, path=':memory:', batch_size=10000):
+        """Initialize a SQLiteMonitor that records to the database at
+        <path>, creating it if needed.
+
+        @type self: SQLiteMonitor
+        @type path: str
+        @type batch_size: int
+        @rtype: None
+        """
+        super().__init__()
+        # A PipelinedMonitor may notify from its consumer thread.
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        # Distances are measured with the current distance backend, exactly
+        # as in Monitor.
+        self._connection.create_function("travel_distance", 4,
+                                         TRAVEL_TIMES.lookup)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS activities ("
+                "seq INTEGER PRIMARY KEY, run INTEGER, time INTEGER, "
+                "category TEXT, description TEXT, identifier TEXT, "
+                "row INTEGER, col INTEGER)")
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS activities_by_actor ON "
+                "activities (run, category, identifier, seq)")
+        self.run = 1 + self._connection.execute(
+            "SELECT COALESCE(MAX(run), 0) FROM activities").fetchone()[0]
+        self.batch_size, self._batch = batch_size, []
+
+    def __str__(self):
+        """Return a string representation.
+
+        @type self: SQLiteMonitor
+        @rtype: str
+
+        >>> m = SQLiteMonitor()
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, REQUEST, 'Bunny', Location(0, 0))
+        >>> print(m)
+        Monitor (2 drivers, 1 riders)
+        """
+        return "Monitor ({} drivers, {} riders)".format(
+            self._count_actors(DRIVER), self._count_actors(RIDER))
+
+    def notify(self, timestamp, category, description, identifier, location):
+        """Notify the monitor of the activity.
+
+        @type self: SQLiteMonitor
+        @type timestamp: int
+            The time of the activity.
+        @type category: DRIVER | RIDER
+            The category for the activity.
+        @type description: REQUEST | CANCEL | PICKUP | DROP_OFF
+            A description of the activity.
+        @type identifier: str
+            The identifier for the actor.
+        @type location: Location
+            The location of the activity.
+        @rtype: None
+        """
+        self._batch.append((self.run, timestamp, category, description,
+                            identifier, location.row, location.column))
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every buffered activity to the database.
+
+        @type self: SQLiteMonitor
+        @rtype: None
+        """
+        if self._batch:
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT INTO activities (run, time, category, "
+                    "description, identifier, row, col) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", self._batch)
+            self._batch = []
+
+    def close(self):
+        """Write every buffered activity and close the database.
+
+        @type self: SQLiteMonitor
+        @rtype: None
+        """
+        self.flush()
+        self._connection.close()
+
+    def _query(self, sql, *parameters):
+        # Return the first row of the result of sql, after writing every
+        # buffered activity.
+        #
+        # @type self: SQLiteMonitor
+        # @type sql: str
+        # @rtype: tuple
+        self.flush()
+        return self._connection.execute(sql, (self.run,) +
+                                        parameters).fetchone()
+
+    def _count_actors(self, category):
+        # Return the number of actors in category that have any activity.
+        #
+        # @type self: SQLiteMonitor
+        # @type category: str
+        # @rtype: int
+        return self._query("SELECT COUNT(DISTINCT identifier) FROM activities "
+                           "WHERE run = ? AND category = ?", category)[0]
+
+    def _driver_distance(self, descriptions):
+        # Return the total distance drivers moved before an activity whose
+        # description is in descriptions.
+        #
+        # @type self: SQLiteMonitor
+        # @type descriptions: tuple[str]
+        # @rtype: int
+        return self._query(
+            "SELECT COALESCE(SUM(travel_distance(prev_row, prev_col, "
+            "row, col)), 0) FROM (SELECT description, row, col, "
+            "LAG(row) OVER actor AS prev_row, LAG(col) OVER actor AS prev_col "
+            "FROM activities WHERE run = ? AND category = ? "
+            "WINDOW actor AS (PARTITION BY identifier ORDER BY seq)) "
+            "WHERE prev_row IS NOT NULL AND description IN ({})".format(
+                ', '.join('?' * len(descriptions))),
+            DRIVER, *descriptions)[0]
+
+    def _average_wait_time(self):
+        """Return the average wait time of riders that have either been picked
+        up or have cancelled their ride.
+
+        @type self: SQLiteMonitor
+        @rtype: float
+
+        >>> m = SQLiteMonitor()
+        >>> m.notify(1, RIDER, REQUEST, 'Lola', Location(0, 0))
+        >>> m.notify(101, RIDER, CANCEL, 'Lola', Location(0, 0))
+        >>> m._average_wait_time()
+        100.0
+        >>> m.notify(1, RIDER, REQUEST, 'Godzilla', Location(10, 10))
+        >>> m.notify(5, RIDER, PICKUP, 'Godzilla', Location(10, 10))
+        >>> m._average_wait_time()
+        52.0
+        >>> SQLiteMonitor()._average_wait_time()
+        Traceback (most recent call last):
+        ...
+        ZeroDivisionError: division by zero
+        """
+        # The first activity is REQUEST, and the second is PICKUP or CANCEL.
+        wait_time, count = self._query(
+            "SELECT COALESCE(SUM(time - first_time), 0), COUNT(*) FROM "
+            "(SELECT time, "
+            "FIRST_VALUE(time) OVER actor AS first_time, "
+            "ROW_NUMBER() OVER actor AS position "
+            "FROM activities WHERE run = ? AND category = ? "
+            "WINDOW actor AS (PARTITION BY identifier ORDER BY seq)) "
+            "WHERE position = 2", RIDER)
+
+        return wait_time / count
+
+    def _average_total_distance(self):
+        """Return the average distance drivers have driven.
+
+        @type self: SQLiteMonitor
+        @rtype: float
+
+        >>> m = SQLiteMonitor()
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(3, 3))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Charles', Location(6, 6))
+        >>> m._average_total_distance()
+        12.0
+        >>> m.notify(1, DRIVER, REQUEST, 'Bunny', Location(10, 10))
+        >>> m.notify(3, DRIVER, PICKUP, 'Bunny', Location(12, 12))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Bunny', Location(14, 14))
+        >>> m._average_total_distance()
+        10.0
+        """
+        return (self._driver_distance((REQUEST, CANCEL, PICKUP, DROPOFF)) /
+                self._count_actors(DRIVER))
+
+    def _average_ride_distance(self):
+        """Return the average distance drivers have driven on rides.
+
+        @type self: SQLiteMonitor
+        @rtype: float
+
+        >>> m = SQLiteMonitor()
+        >>> m.notify(1, DRIVER, REQUEST, 'Charles', Location(0, 0))
+        >>> m.notify(3, DRIVER, PICKUP, 'Charles', Location(3, 3))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Charles', Location(6, 6))
+        >>> m._average_ride_distance()
+        6.0
+        >>> m.notify(1, DRIVER, REQUEST, 'Bunny', Location(10, 10))
+        >>> m.notify(3, DRIVER, PICKUP, 'Bunny', Location(12, 12))
+        >>> m.notify(5, DRIVER, DROPOFF, 'Bunny', Location(14, 14))
+        >>> m._average_ride_distance()
+        5.0
+        """
+        # Ride movement only happens before a Dropoff.
+        return (self._driver_distance((DROPOFF,)) /
+                self._count_actors(DRIVER))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import os
+    import random
+    import tempfile
+    from time import time
+
+    # Sustained write rate for a long run streamed to a database file.
+    random.seed(148)
+    activities = 500000
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'activities.db')
+        monitor = SQLiteMonitor(path)
+        spots = [Location(random.randrange(50), random.randrange(50))
+                 for _ in range(100)]
+        descriptions = (REQUEST, PICKUP, DROPOFF)
+        start = time()
+        for i in range(activities):
+            monitor.notify(i // 10, DRIVER, descriptions[i % 3],
+                           'driver{}'.format(i % 5000), random.choice(spots))
+        monitor.flush()
+        elapsed = time() - start
+        print('{} activities in {:.2f} seconds ({:.0f} activities/sec).'
+              .format(activities, elapsed, activities / elapsed))
+        start = time()
+        monitor.notify(0, RIDER, REQUEST, 'rider', spots[0])
+        monitor.notify(1, RIDER, PICKUP, 'rider', spots[0])
+        print(monitor.report())
+        print('Report in {:.2f} seconds.'.format(time() - start))
+        monitor.close()
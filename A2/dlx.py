@@ -0,0 +1,439 @@
+"""
+Exact cover by Knuth's Algorithm X with dancing links, and a sudoku solver
+built on it.
+
+An exact cover problem asks for a set of rows of a 0-1 matrix with exactly
+one 1 in each column. The matrix is kept as a grid of circular doubly
+linked lists, one of the 1s of each row and one of each column, with a
+header node for each column. Covering a column unlinks it and every row
+that has a 1 in it, and uncovering links them back in the reverse order,
+since an unlinked node still knows its neighbours. Algorithm X covers the
+column with the fewest rows left, tries each of those rows in turn, and
+backtracks when a column has none.
+
+A sudoku of n symbols is the exact cover of 4 * n ** 2 columns: each cell
+holds one symbol, and each row, column and subsquare holds each symbol once.
+There is a matrix row for every symbol in every cell, with a 1 in each of
+the four columns it fills. The clues of a puzzle are chosen before the
+search begins.
+
+The nodes are numbered, and their links are kept in parallel lists of
+ints rather than as objects, which is faster to follow and to change.
+"""
+from itertools import islice
+
+from puzzle_tools import PuzzleNode
+from sudoku_puzzle import SudokuPuzzle
+
+
+class ExactCover:
+    """
+    An exact cover problem, as a matrix of dancing links.
+
+    === Attributes ===
+    @type columns: int
+        The number of columns.
+    @type rows: list[list[int]]
+        The columns with a 1 in each row.
+    """
+
+    # === Private Attributes ===
+    # Node 0 is the root, whose row links the column headers left to right.
+    # Nodes 1 to columns are the headers, and the 1s of the rows follow,
+    # row by row.
+    # @type _left: list[int]
+    # @type _right: list[int]
+    #     The nodes before and after each node in its row.
+    # @type _up: list[int]
+    # @type _down: list[int]
+    #     The nodes above and below each node in its column.
+    # @type _column: list[int]
+    #     The header of the column of each node.
+    # @type _row: list[int]
+    #     The row of each node; -1 for the root and the headers.
+    # @type _starts: list[int]
+    #     The first node of each row.
+    # @type _size: list[int]
+    #     The number of rows left with a 1 in the column of each header.
+    # @type _chosen: list[int]
+    #     The rows chosen before searching.
+
+    def __init__(self, columns, rows):
+        """
+        Create the ExactCover self of the matrix with columns columns, and
+        a 1 in each row in each of the columns listed for it.
+
+        @type self: ExactCover
+        @type columns: int
+        @type rows: list[list[int]]
+        @rtype: None
+
+        >>> problem = ExactCover(3, [[0, 1], [1, 2], [2], [0]])
+        >>> problem.rows[1]
+        [1, 2]
+        """
+        self.columns, self.rows = columns, rows
+        headers = columns + 1
+        self._left = [headers - 1] + list(range(headers - 1))
+        self._right = list(range(1, headers)) + [0]
+        self._up, self._down = list(range(headers)), list(range(headers))
+        self._column, self._row = list(range(headers)), [-1] * headers
+        self._size = [0] * headers
+        self._starts, self._chosen = [], []
+
+        left, right, up, down = self._left, self._right, self._up, self._down
+        for row, cells in enumerate(rows):
+            first = len(left)
+            self._starts.append(first)
+            for node, column in enumerate(cells, first):
+                header = column + 1
+                left.append(node - 1 if node > first else
+                            first + len(cells) - 1)
+                right.append(node + 1 if node < first + len(cells) - 1 else
+                             first)
+                # the new node goes at the bottom of its column
+                up.append(up[header])
+                down.append(header)
+                down[up[header]] = node
+                up[header] = node
+                self._column.append(header)
+                self._row.append(row)
+                self._size[header] += 1
+
+    def choose(self, row):
+        """
+        Put row of ExactCover self in every cover searched for, and return
+        whether it can be: no row chosen before may share a column with it.
+
+        @type self: ExactCover
+        @type row: int
+        @rtype: bool
+
+        >>> problem = ExactCover(3, [[0, 1], [1, 2], [2], [0]])
+        >>> problem.choose(2), problem.choose(1)
+        (True, False)
+        """
+        node = self._starts[row]
+        if any([self._covered(self._column[other])
+                for other in [node] + self._others(node)]):
+            return False
+        self._cover(self._column[node])
+        for other in self._others(node):
+            self._cover(self._column[other])
+        self._chosen.append(row)
+        return True
+
+    def solutions(self, stats=None):
+        """
+        Yield every exact cover of ExactCover self that has the rows
+        chosen, as the sorted list of its rows.
+
+        The search can be stopped after any number of covers, by closing
+        the generator, and the links are restored when it ends either way.
+
+        @type self: ExactCover
+        @type stats: dict[str, int] | None
+            If given, stats['expanded'] counts the rows tried.
+        @rtype: Generator[list[int]]
+
+        >>> problem = ExactCover(3, [[0, 1], [1, 2], [2], [0], [1]])
+        >>> list(problem.solutions())
+        [[0, 2], [1, 3], [2, 3, 4]]
+        >>> problem.choose(2)
+        True
+        >>> list(problem.solutions())
+        [[0, 2], [2, 3, 4]]
+        """
+        right, down = self._right, self._down
+        size, column_of, row_of = self._size, self._column, self._row
+        # the node of the row tried in each column covered so far
+        tried = []
+
+        try:
+            while True:
+                if right[0] == 0:
+                    yield sorted(self._chosen +
+                                 [row_of[node] for node in tried])
+                    node = None
+                else:
+                    # the column with the fewest rows left, which has no row
+                    # left if it is 0
+                    column, fewest = 0, None
+                    header = right[0]
+                    while header != 0:
+                        if fewest is None or size[header] < fewest:
+                            column, fewest = header, size[header]
+                            if fewest <= 1:
+                                break
+                        header = right[header]
+                    self._cover(column)
+                    node = down[column]
+                    if node == column:
+                        self._uncover(column)
+                        node = None
+
+                # backtrack until a covered column has a row left to try
+                while node is None and tried:
+                    last = tried.pop()
+                    for other in self._others(last, backward=True):
+                        self._uncover(column_of[other])
+                    node = down[last]
+                    if node == column_of[last]:
+                        self._uncover(node)
+                        node = None
+                if node is None:
+                    return
+
+                if stats is not None:
+                    stats['expanded'] = stats.get('expanded', 0) + 1
+                tried.append(node)
+                for other in self._others(node):
+                    self._cover(column_of[other])
+        finally:
+            # a search stopped early still has rows to take back
+            while tried:
+                last = tried.pop()
+                for other in self._others(last, backward=True):
+                    self._uncover(column_of[other])
+                self._uncover(column_of[last])
+
+    def copy(self):
+        """
+        Return a copy of ExactCover self, with the same rows chosen, that
+        can be searched and have rows chosen without changing self.
+
+        Copying the links is much faster than building them from the rows,
+        which the copy shares with self.
+
+        @type self: ExactCover
+        @rtype: ExactCover
+
+        >>> problem = ExactCover(3, [[0, 1], [1, 2], [2], [0], [1]])
+        >>> other = problem.copy()
+        >>> other.choose(2)
+        True
+        >>> list(other.solutions()), len(list(problem.solutions()))
+        ([[0, 2], [2, 3, 4]], 3)
+        """
+        other = _new(ExactCover)
+        other.columns, other.rows = self.columns, self.rows
+        other._left, other._right = self._left[:], self._right[:]
+        other._up, other._down = self._up[:], self._down[:]
+        other._column, other._row = self._column, self._row
+        other._size, other._chosen = self._size[:], self._chosen[:]
+        other._starts = self._starts
+        return other
+
+    def _covered(self, column):
+        # Return whether column of ExactCover self, given by its header, is
+        # covered: its neighbours no longer link to it.
+        #
+        # @type self: ExactCover
+        # @type column: int
+        # @rtype: bool
+        return self._right[self._left[column]] != column
+
+    def _others(self, node, backward=False):
+        # Return the other nodes in the row of node of ExactCover self, from
+        # the next to the right, or from the next to the left if backward.
+        #
+        # @type self: ExactCover
+        # @type node: int
+        # @type backward: bool
+        # @rtype: list[int]
+        links = self._left if backward else self._right
+        others, other = [], links[node]
+        while other != node:
+            others.append(other)
+            other = links[other]
+        return others
+
+    def _cover(self, column):
+        # Unlink the header of column of ExactCover self from the headers,
+        # and the other nodes of each of its rows from their columns.
+        #
+        # @type self: ExactCover
+        # @type column: int
+        # @rtype: None
+        left, right, up, down = self._left, self._right, self._up, self._down
+        size, column_of = self._size, self._column
+        right[left[column]], left[right[column]] = right[column], left[column]
+        row = down[column]
+        while row != column:
+            node = right[row]
+            while node != row:
+                down[up[node]], up[down[node]] = down[node], up[node]
+                size[column_of[node]] -= 1
+                node = right[node]
+            row = down[row]
+
+    def _uncover(self, column):
+        # Undo _cover(column) on ExactCover self, which must be the last
+        # column covered and not uncovered yet.
+        #
+        # @type self: ExactCover
+        # @type column: int
+        # @rtype: None
+        left, right, up, down = self._left, self._right, self._up, self._down
+        size, column_of = self._size, self._column
+        row = up[column]
+        while row != column:
+            node = left[row]
+            while node != row:
+                size[column_of[node]] += 1
+                down[up[node]] = up[down[node]] = node
+                node = left[node]
+            row = up[row]
+        right[left[column]] = left[right[column]] = column
+
+
+_new = object.__new__
+
+
+def sudoku_cover(puzzle):
+    """
+    Return the ExactCover of SudokuPuzzle puzzle, with the rows of its
+    clues chosen, and the cell and symbol of each row; or None if its
+    clues break the rules.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: (ExactCover, list[(int, str)]) | None
+
+    >>> s = SudokuPuzzle(4, ['A', 'B', 'C', 'D'] + ['*'] * 12,
+    ...                  {'A', 'B', 'C', 'D'})
+    >>> problem, placements = sudoku_cover(s)
+    >>> problem.columns, len(problem.rows), placements[5]
+    (64, 64, (1, 'B'))
+    >>> sudoku_cover(SudokuPuzzle(4, ['A', 'A'] + ['*'] * 14,
+    ...                           {'A', 'B', 'C', 'D'})) is None
+    True
+    """
+    n, order = puzzle.n, tuple(sorted(puzzle.symbol_set))
+    if (n, order) not in _SUDOKU_COVERS:
+        side = round(n ** (1 / 2))
+        cells = n * n
+        rows, placements = [], []
+        for cell in range(cells):
+            y, x = divmod(cell, n)
+            box = y // side * side + x // side
+            for k, symbol in enumerate(order):
+                rows.append([cell, cells + y * n + k, 2 * cells + x * n + k,
+                             3 * cells + box * n + k])
+                placements.append((cell, symbol))
+        _SUDOKU_COVERS[(n, order)] = (ExactCover(4 * cells, rows),
+                                      placements)
+
+    empty, placements = _SUDOKU_COVERS[(n, order)]
+    problem = empty.copy()
+    index = {symbol: k for k, symbol in enumerate(order)}
+    # the row of a symbol in a cell is the cell's n rows on
+    for cell, symbol in enumerate(puzzle.symbols):
+        if symbol != '*' and not problem.choose(cell * n + index[symbol]):
+            return None
+    return problem, placements
+
+
+# the ExactCover of an empty sudoku, with the cell and symbol of each row,
+# by n and the symbols in order; sudoku_cover copies them rather than
+# building them again
+_SUDOKU_COVERS = {}
+
+
+def solve_sudoku(puzzle, k=1, stats=None):
+    """
+    Return the first k solutions of SudokuPuzzle puzzle found, or all of
+    them if there are fewer.
+
+    @type puzzle: SudokuPuzzle
+    @type k: int
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the rows tried.
+    @rtype: list[SudokuPuzzle]
+
+    >>> grid = ['A', 'B', 'C', 'D']
+    >>> grid += ['*', '*', '*', '*']
+    >>> grid += ['*', '*', '*', '*']
+    >>> grid += ['*', '*', '*', '*']
+    >>> s = SudokuPuzzle(4, grid, {'A', 'B', 'C', 'D'})
+    >>> len(solve_sudoku(s, 100))
+    12
+    >>> print(solve_sudoku(s)[0])
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    """
+    cover = sudoku_cover(puzzle)
+    if cover is None:
+        return []
+    problem, placements = cover
+    solutions = []
+    for rows in islice(problem.solutions(stats), k):
+        symbols = puzzle.symbols
+        for row in rows:
+            cell, symbol = placements[row]
+            symbols[cell] = symbol
+        solutions.append(SudokuPuzzle(puzzle.n, symbols, puzzle.symbol_set))
+    return solutions
+
+
+def dlx_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing its parent's puzzle
+    with one more empty cell filled in, the cells in order.  Return None
+    if this is not possible.
+
+    This is the shape of the paths of depth_first_solve, so the two
+    solvers can stand in for one another.
+
+    @type puzzle: SudokuPuzzle
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the rows tried.
+    @rtype: PuzzleNode | None
+
+    >>> grid = ['A', 'B', 'C', 'D']
+    >>> grid += ['C', 'D', 'A', 'B']
+    >>> grid += ['B', 'A', 'D', 'C']
+    >>> grid += ['D', 'C', '*', '*']
+    >>> print(dlx_solve(SudokuPuzzle(4, grid, {'A', 'B', 'C', 'D'})))
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|**
+    <BLANKLINE>
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|B*
+    <BLANKLINE>
+    AB|CD
+    CD|AB
+    -----
+    BA|DC
+    DC|BA
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    solutions = solve_sudoku(puzzle, 1, stats)
+    if not solutions:
+        return None
+    solved, symbols = solutions[0].symbols, puzzle.symbols
+    root = node = PuzzleNode(puzzle)
+    for cell in range(len(symbols)):
+        if symbols[cell] == '*':
+            child = PuzzleNode(node.puzzle.place(cell, solved[cell]),
+                               parent=node)
+            node.children.append(child)
+            node = child
+    return root
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    # The solver is timed against depth_first_solve in puzzle_benchmark.py.
@@ -1,12 +1,39 @@
 from puzzle import Puzzle
 
+# whether boards that are rotations or reflections of one another have the
+# same state key, so solvers only search one of them
+REDUCE_SYMMETRY = True
+
 
 class GridPegSolitairePuzzle(Puzzle):
     """
     Snapshot of peg solitaire on a rectangular grid. May be solved,
     unsolved, or even unsolvable.
+
+    The pegs are kept as an int with a bit per position, in row-major
+    order, the first position being the most significant. Every jump
+    the shape of the board allows is worked out once, and shared by all
+    the puzzles on boards of that shape, so a jump is tested with two
+    masks and made with one exclusive or. The grid of markers is only
+    built when it is asked for.
+
+    === Attributes ===
+    @type marker: list[list[str]]
+        The grid of markers: '#' for unused, '*' for peg, '.' for empty.
     """
 
+    # === Private Attributes ===
+    # @type _pegs: int
+    #     The bits of the positions with pegs.
+    # @type _shape: _Shape
+    #     The shape of the board.
+    # @type _marker_set: set[str]
+    #     The allowed markers.
+    # @type _marker: list[list[str]]
+    #     The grid of markers, set once it has been built.
+
+    __slots__ = ('_pegs', '_shape', '_marker_set', '_marker')
+
     def __init__(self, marker, marker_set):
         """
         Create a new GridPegSolitairePuzzle self with
@@ -22,7 +49,41 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([len(x) == len(marker[0]) for x in marker[1:]])
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == '*' or x == '.' or x == '#' for x in marker_set])
-        self._marker, self._marker_set = marker, marker_set
+        markers = ''.join([''.join(row) for row in marker])
+        self._shape = _Shape.of(len(marker), len(marker[0]),
+                                int(markers.translate(_UNUSED_BITS), 2))
+        self._pegs = int(markers.translate(_PEG_BITS), 2)
+        self._marker_set = marker_set
+
+    @property
+    def marker(self):
+        """
+        Return the grid of markers of GridPegSolitairePuzzle self, building
+        it from the pegs the first time.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: list[list[str]]
+
+        >>> grid = [['*', '*', '.', '#', '*']]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {'*', '.', '#'})
+        >>> gpsp.extensions()[0].marker
+        [['.', '.', '*', '#', '*']]
+        """
+        try:
+            return self._marker
+        except AttributeError:
+            shape, pegs = self._shape, self._pegs
+            markers = []
+            for bit in shape.bits:
+                if shape.unused & bit:
+                    markers.append('#')
+                elif pegs & bit:
+                    markers.append('*')
+                else:
+                    markers.append('.')
+            self._marker = [markers[row:row + shape.columns]
+                            for row in range(0, len(markers), shape.columns)]
+            return self._marker
 
     def __eq__(self, other):
         """
@@ -57,9 +118,61 @@ class GridPegSolitairePuzzle(Puzzle):
 
         """
         return (type(other) == type(self) and
-                self._marker == other._marker and
+                self._pegs == other._pegs and
+                self._shape is other._shape and
                 self._marker_set == other._marker_set)
 
+    def __hash__(self):
+        """
+        Return a hash of GridPegSolitairePuzzle self, based on its pegs.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+        """
+        return hash(self._pegs)
+
+    def state_key(self):
+        """
+        Return the pegs of GridPegSolitairePuzzle self packed into an int,
+        one bit per position in row-major order, the first position being
+        the most significant. Unused positions never change, so they count
+        as empty.
+
+        A rotation or reflection of the board that keeps its shape, unused
+        positions included, takes solutions to solutions, so a board and
+        its images are solvable alike. While REDUCE_SYMMETRY is set, the
+        key is the least of the pegs of each image of the board under those
+        symmetries, and a search only expands one of them.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid = [['*', '*', '.', '#', '*']]
+        >>> bin(GridPegSolitairePuzzle(grid, {'*', '.', '#'}).state_key())
+        '0b11001'
+        >>> gpsp = GridPegSolitairePuzzle([['*', '*', '.', '*', '*']],
+        ...                               {'*', '.', '#'})
+        >>> [bin(puzzle.state_key()) for puzzle in gpsp.extensions()]
+        ['0b111', '0b111']
+        >>> left = GridPegSolitairePuzzle([['*', '*', '.', '.']],
+        ...                               {'*', '.', '#'})
+        >>> right = GridPegSolitairePuzzle([['.', '.', '*', '*']],
+        ...                                {'*', '.', '#'})
+        >>> bin(left.state_key()), bin(right.state_key())
+        ('0b11', '0b11')
+        """
+        pegs, symmetries = self._pegs, self._shape.symmetries
+        if not (REDUCE_SYMMETRY and symmetries):
+            return pegs
+
+        chunks = pegs.to_bytes(self._shape.size, 'little')
+        key = pegs
+        for tables in symmetries:
+            image = sum(map(_item, tables, chunks))
+            if image < key:
+                key = image
+        return key
+
     def __str__(self):
         """
         Return a human-readable string representation of
@@ -95,7 +208,7 @@ class GridPegSolitairePuzzle(Puzzle):
 
         """
         board = ''
-        for row in self._marker:
+        for row in self.marker:
             for space in row:
                 if space == '#':
                     board += ' -'
@@ -149,48 +262,38 @@ class GridPegSolitairePuzzle(Puzzle):
         if self.is_solved():
             return []
 
-        y = 0
-        lst = []
-
-        while y < len(self._marker):
-            x = 0
-            while x < len(self._marker[y]):
-
-                if self._marker[y][x] == '.':
-
-                    # jump peg on the right of the empty spot
-                    if (x + 2 < len(self._marker[y]) and
-                            self._marker[y][x + 2] == '*' and
-                            self._marker[y][x + 1] == '*'):
-                        lst.append(GridPegSolitairePuzzle(
-                            jump_left(self._marker, y, x), self._marker_set))
-
-                    # jump peg on the left of the empty spot
-                    if (x - 2 >= 0 and
-                            self._marker[y][x - 2] == '*' and
-                            self._marker[y][x - 1] == '*'):
-                        lst.append(GridPegSolitairePuzzle(
-                            jump_right(self._marker, y, x), self._marker_set))
-
-                    # jump peg above the empty spot
-                    if (y - 2 >= 0 and
-                            self._marker[y - 2][x] == '*' and
-                            self._marker[y - 1][x] == '*'):
-                        lst.append(GridPegSolitairePuzzle(
-                            jump_down(self._marker, y, x), self._marker_set))
-
-                    # jump peg below the empty spot
-                    if (y + 2 < len(self._marker) and
-                            self._marker[y + 2][x] == '*' and
-                            self._marker[y + 1][x] == '*'):
-                        lst.append(GridPegSolitairePuzzle(
-                            jump_up(self._marker, y, x), self._marker_set))
-
-                x += 1
-            y += 1
+        pegs, shape, marker_set = self._pegs, self._shape, self._marker_set
+        lst, new = [], _new
+
+        # the jumps are in order of the positions they land in, row by row,
+        # and for each from the right, the left, above and below
+        for need, land, change in shape.jumps:
+            if pegs & need == need and not pegs & land:
+                puzzle = new(GridPegSolitairePuzzle)
+                puzzle._pegs, puzzle._shape = pegs ^ change, shape
+                puzzle._marker_set = marker_set
+                lst.append(puzzle)
 
         return lst
 
+    def heuristic(self):
+        """
+        Return the number of pegs of GridPegSolitairePuzzle self less one.
+
+        Every jump removes one peg, so every solution takes exactly this
+        many moves, and informed solvers go straight down the search tree.
+        A pagoda function gives no better bound here: the last peg may end
+        up anywhere, so no position's weight can be ruled out.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> grid = [['*', '*', '.', '*', '#']]
+        >>> GridPegSolitairePuzzle(grid, {'*', '.', '#'}).heuristic()
+        2
+        """
+        return max(bin(self._pegs).count('1') - 1, 0)
+
     # override is_solved
     # A configuration is solved when there is exactly one '*' left
     def is_solved(self):
@@ -215,132 +318,135 @@ class GridPegSolitairePuzzle(Puzzle):
         >>> gpsp2.is_solved()
         True
         """
-        count = 0
-
-        for row in self._marker:
-            for space in row:
-                if space == '*':
-                    count += 1
-                    if count == 2:
-                        return False
+        # no peg, or one: clearing the lowest bit leaves none
+        return self._pegs & (self._pegs - 1) == 0
 
-        return True
 
-
-def jump_left(board, y, x):
-    """
-    Jump peg on the right of the empty spot.
-
-    Precondition: 0 <= x < len(grid[0]) - 2, 0 <= y < len(grid)
-
-    @type board: list[list[str]]
-    @type y: int
-    @type x: int
-    @rtype: list[list[str]]
-
-    >>> grid = [['*', '*', '.', '*', '*']]
-    >>> print(jump_left(grid, 0, 2))
-    [['*', '*', '*', '.', '.']]
-    """
-    new_board = []
-
-    # create duplicate board to be changed
-    for i in range(len(board)):
-        new_board.append(board[i].copy())
-
-    # change relevant positions on new_board
-    (new_board[y][x], new_board[y][x + 1],
-     new_board[y][x + 2]) = ('*', '.', '.')
-
-    return new_board
-
-
-def jump_right(board, y, x):
-    """
-    Jump peg on the left of the empty spot.
-
-    Precondition: 2 <= x < len(grid[0]), 0 <= y < len(grid)
-
-    @type board: list[list[str]]
-    @type y: int
-    @type x: int
-    @rtype: list[list[str]]
-
-    >>> grid = [['*', '*', '.', '*', '*']]
-    >>> print(jump_right(grid, 0, 2))
-    [['.', '.', '*', '*', '*']]
-    """
-    new_board = []
-
-    for i in range(len(board)):
-        new_board.append(board[i].copy())
-
-    (new_board[y][x], new_board[y][x - 1],
-     new_board[y][x - 2]) = ('*', '.', '.')
-
-    return new_board
-
-
-def jump_up(board, y, x):
+class _Shape:
     """
-    Jump peg below the empty spot, return new grid.
-
-    Precondition: 0 <= y < len(grid) - 2, 0 <= x < len(grid[0])
-
-    @type board: list[list[str]]
-    @type y: int
-    @type x: int
-    @rtype: list[list[str]]
-
-    >>> grid = [['.', '*', '.', '.', '.']]
-    >>> grid += [['*', '*', '.', '.', '.']]
-    >>> grid += [['*', '*', '.', '.', '.']]
-    >>> ans = [['*', '*', '.', '.', '.']]
-    >>> ans += [['.', '*', '.', '.', '.']]
-    >>> ans += [['.', '*', '.', '.', '.']]
-    >>> ans == jump_up(grid, 0, 0)
-    True
+    The shape of a peg solitaire board, and the jumps it allows.
+
+    === Attributes ===
+    @type rows: int
+    @type columns: int
+    @type unused: int
+        The bits of the unused positions.
+    @type bits: list[int]
+        The bit of each position, in row-major order.
+    @type jumps: list[(int, int, int)]
+        Each jump, in the order of extensions, as the bits of the position
+        the peg jumps from and the one it jumps over, the bit of the
+        position it lands in, and the bits of all three.
+    @type size: int
+        The number of bytes of the bits of a board.
+    @type symmetries: list[list[list[int]]]
+        For each rotation and reflection of the board other than the
+        identity that keeps its shape, a table for each byte, giving the
+        bits that the pegs of each value of the byte move to.
     """
-    new_board = []
-
-    for i in range(len(board)):
-        new_board.append(board[i].copy())
-
-    (new_board[y][x], new_board[y + 1][x],
-     new_board[y + 2][x]) = ('*', '.', '.')
-
-    return new_board
 
+    # the shapes made so far, by rows, columns and unused positions
+    _made = {}
 
-def jump_down(board, y, x):
-    """
-    Jump peg above the empty spot, return new grid.
-
-    Precondition: 2 <= y < len(grid), 0 <= x < len(grid[0])
-
-    @type board: list[list[str]]
-    @type y: int
-    @type x: int
-    @rtype: list[list[str]]
-
-    >>> grid = [['*', '*', '.', '.', '.']]
-    >>> grid += [['*', '*', '.', '.', '.']]
-    >>> grid += [['.', '*', '.', '.', '.']]
-    >>> ans = [['.', '*', '.', '.', '.']]
-    >>> ans += [['.', '*', '.', '.', '.']]
-    >>> ans += [['*', '*', '.', '.', '.']]
-    >>> ans == jump_down(grid, 2, 0)
-    True
-    """
-    new_board = []
+    @staticmethod
+    def of(rows, columns, unused):
+        """
+        Return the _Shape of a board of rows and columns with the unused
+        positions whose bits are in unused, made once for each.
 
-    for i in range(len(board)):
-        new_board.append(board[i].copy())
+        @type rows: int
+        @type columns: int
+        @type unused: int
+        @rtype: _Shape
 
-    (new_board[y][x], new_board[y - 1][x],
-     new_board[y - 2][x]) = ('*', '.', '.')
+        >>> _Shape.of(3, 3, 0) is _Shape.of(3, 3, 0)
+        True
+        """
+        key = (rows, columns, unused)
+        if key not in _Shape._made:
+            _Shape._made[key] = _Shape(rows, columns, unused)
+        return _Shape._made[key]
 
-    return new_board
+    def __init__(self, rows, columns, unused):
+        """
+        Create the _Shape self of a board of rows and columns with the
+        unused positions whose bits are in unused.
+
+        @type self: _Shape
+        @type rows: int
+        @type columns: int
+        @type unused: int
+        @rtype: None
+
+        >>> shape = _Shape(1, 4, 0b0001)
+        >>> [(bin(need), bin(land)) for need, land, _ in shape.jumps]
+        [('0b110', '0b1000'), ('0b1100', '0b10')]
+        """
+        self.rows, self.columns, self.unused = rows, columns, unused
+        self.bits = [1 << (rows * columns - 1 - position)
+                     for position in range(rows * columns)]
+
+        self.jumps = []
+        for y in range(rows):
+            for x in range(columns):
+                # the peg jumps two positions in (dy, dx) to land at y, x,
+                # from the right, the left, above and below
+                for dy, dx in ((0, -1), (0, 1), (1, 0), (-1, 0)):
+                    positions = [(y - dy * k, x - dx * k) for k in range(3)]
+                    if all([0 <= row < rows and 0 <= column < columns and
+                            not unused & self.bits[row * columns + column]
+                            for row, column in positions]):
+                        land, over, start = [self.bits[row * columns + column]
+                                             for row, column in positions]
+                        self.jumps.append((start | over, land,
+                                           start | over | land))
+
+        # the images of a position y, x under the rotations and reflections
+        # of a square; those of a rectangle that is not square turn neither
+        # way, and keep its rows and columns apart
+        last_y, last_x = rows - 1, columns - 1
+        images = [lambda y, x: (y, last_x - x),
+                  lambda y, x: (last_y - y, x),
+                  lambda y, x: (last_y - y, last_x - x)]
+        if rows == columns:
+            images += [lambda y, x: (x, y),
+                       lambda y, x: (x, last_x - y),
+                       lambda y, x: (last_y - x, y),
+                       lambda y, x: (last_y - x, last_x - y)]
+
+        self.size = (rows * columns + 7) // 8
+        self.symmetries = []
+        for image in images:
+            # the bit each bit moves to, from the lowest
+            moved = []
+            for bit in range(rows * columns):
+                y, x = image(*divmod(rows * columns - 1 - bit, columns))
+                moved.append(self.bits[y * columns + x])
+            if (sum([moved[bit] for bit in range(rows * columns)
+                     if unused >> bit & 1]) == unused and
+                    moved != [1 << bit for bit in range(rows * columns)]):
+                self.symmetries.append([_table(moved[shift:shift + 8])
+                                        for shift in range(0, len(moved), 8)])
+
+
+def _table(moved):
+    # Return the bits that the bits of each byte move to, where the bit k
+    # of the byte moves to moved[k]; bits past the end of moved are unset.
+    #
+    # @type moved: list[int]
+    # @rtype: list[int]
+    table = [0] * (1 << len(moved))
+    for value in range(1, len(table)):
+        low = value & -value
+        table[value] = table[value ^ low] | moved[low.bit_length() - 1]
+    return table
+
+
+# translate markers into the bits of pegs, and of unused positions
+_PEG_BITS = str.maketrans('*.#', '100')
+_UNUSED_BITS = str.maketrans('*.#', '001')
+_new = object.__new__
+_item = list.__getitem__
 
 
 if __name__ == '__main__':
@@ -362,3 +468,17 @@ if __name__ == '__main__':
     end = time.time()
     print('Solved 5x5 peg solitaire in {} seconds.'.format(end - start))
     print('Using depth-first: \n{}'.format(solution))
+
+    # boards that are rotations or reflections of one another are only
+    # searched once
+    centre = [row[:] for row in grid]
+    centre[2][2], centre[3][2] = '.', '*'
+    for name, board in (('Off-centre', grid), ('Centre', centre)):
+        for reduce in (False, True):
+            REDUCE_SYMMETRY, stats = reduce, {}
+            start = time.time()
+            depth_first_solve(GridPegSolitairePuzzle(board, {'*', '.', '#'}),
+                              stats)
+            print('{} hole, symmetry reduced: {}; {} nodes expanded in '
+                  '{:.2f} seconds.'.format(name, reduce, stats['expanded'],
+                                           time.time() - start))
@@ -1,12 +1,52 @@
 from puzzle import Puzzle
 
+# the pattern databases MNPuzzle.heuristic looks up, by the rows, columns
+# and cell of the blank in the target of their boards; see
+# pattern_database.use_database
+PATTERN_DATABASES = {}
+
 
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    A state is kept as an int with a field per cell, in row-major order
+    from the lowest bits, holding the number of the tile in the cell, and
+    the cell of the blank. A tile is numbered by the cell it fills in the
+    target grid, plus one; the blank is 0. The copies of a symbol that
+    appears more than once cannot be told apart, so they share the number
+    of the first cell the symbol fills. Everything that only depends on
+    the target, like the cells next to each cell, is shared by all the
+    states of a puzzle, so a move takes a few operations on ints, and the
+    grids are only built when they are asked for.
+
+    === Attributes ===
+    @type n: int
+        The number of rows.
+    @type m: int
+        The number of columns.
+    @type from_grid: tuple[tuple[str]]
+        The current configuration.
+    @type to_grid: tuple[tuple[str]]
+        The solution configuration.
     """
 
+    # === Private Attributes ===
+    # @type _key: int
+    #     The tiles of the current configuration, packed.
+    # @type _blank: int
+    #     The cell of the blank in the current configuration.
+    # @type _target: _Target
+    #     What the puzzle's states have in common.
+    # @type _grid: tuple[tuple[str]]
+    #     The current configuration as a grid, set once it has been built.
+    # @type _solvable: bool
+    #     Whether the target can be reached; worked out for the puzzle a
+    #     search starts from, and passed on to every state reached from it.
+
+    __slots__ = ('_key', '_blank', '_target', '_grid', '_solvable')
+
     def __init__(self, from_grid, to_grid):
         """
         MNPuzzle in state from_grid, working towards
@@ -22,8 +62,104 @@ class MNPuzzle(Puzzle):
         assert len(from_grid) > 0
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
-        self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        target = _Target(to_grid)
+        cells = [symbol for row in from_grid for symbol in row]
+        assert sorted(cells) == sorted(target.symbols[1:]), \
+            "The grids do not have the same symbols."
+        key = 0
+        for cell in range(len(cells) - 1, -1, -1):
+            key = (key << target.bits) | target.tiles[cells[cell]]
+        self._key, self._blank = key, cells.index('*')
+        self._target, self._grid = target, tuple(from_grid)
+        self._solvable = _reaches_target(self)
+
+    @property
+    def n(self):
+        """
+        Return the number of rows of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: int
+        """
+        return self._target.rows
+
+    @property
+    def m(self):
+        """
+        Return the number of columns of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: int
+        """
+        return self._target.columns
+
+    @property
+    def to_grid(self):
+        """
+        Return the solution configuration of MNPuzzle self.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+        """
+        return self._target.grid
+
+    @property
+    def from_grid(self):
+        """
+        Return the current configuration of MNPuzzle self, building it from
+        the packed state the first time.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> mnp = MNPuzzle((('1', '2', '3'), ('4', '*', '5')), target_grid)
+        >>> mnp.extensions()[0].from_grid
+        (('1', '*', '3'), ('4', '2', '5'))
+        """
+        try:
+            return self._grid
+        except AttributeError:
+            target, key = self._target, self._key
+            symbols = []
+            for _ in range(target.rows * target.columns):
+                symbols.append(target.symbols[key & target.mask])
+                key >>= target.bits
+            self._grid = tuple([tuple(symbols[row:row + target.columns])
+                                for row in range(0, len(symbols),
+                                                 target.columns)])
+            return self._grid
+
+    def cells(self):
+        """
+        Return the cells of the tiles of MNPuzzle self, by the cells they
+        fill in the target grid; the blank is at the target cell of the
+        blank. The copies of a repeated symbol are matched with its target
+        cells in row-major order.
+
+        @type self: MNPuzzle
+        @rtype: list[int]
+
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> MNPuzzle((('1', '2', '3'), ('4', '*', '5')), target_grid).cells()
+        [0, 1, 2, 3, 5, 4]
+        >>> target_grid = (('a', 'a'), ('b', '*'))
+        >>> MNPuzzle((('a', 'b'), ('a', '*')), target_grid).cells()
+        [0, 2, 1, 3]
+        """
+        target, key = self._target, self._key
+        cells = [0] * (target.rows * target.columns)
+        if target.repeated:
+            homes = [iter(home) for home in target.homes]
+            for cell in range(len(cells)):
+                cells[next(homes[key & target.mask])] = cell
+                key >>= target.bits
+            return cells
+        for cell in range(len(cells)):
+            tile = key & target.mask
+            cells[tile - 1 if tile else target.blank] = cell
+            key >>= target.bits
+        return cells
 
     def __eq__(self, other):
         """
@@ -46,8 +182,25 @@ class MNPuzzle(Puzzle):
         True
         """
         return (type(self) == type(other) and
-                (self.from_grid == other.from_grid) and
-                (self.to_grid == other.to_grid))
+                (self._target is other._target or
+                 self.to_grid == other.to_grid) and
+                self.from_grid == other.from_grid)
+
+    __hash__ = Puzzle.__hash__
+
+    def state_key(self):
+        """
+        Return the packed current configuration of MNPuzzle self; the target
+        grid is the same for every state reachable from it.
+
+        @type self: MNPuzzle
+        @rtype: int
+
+        >>> target_grid = (('1', '2'), ('3', '*'))
+        >>> bin(MNPuzzle((('1', '2'), ('*', '3')), target_grid).state_key())
+        '0b11000010001'
+        """
+        return self._key
 
     def __str__(self):
         """
@@ -143,36 +296,143 @@ class MNPuzzle(Puzzle):
          4 5 *
         <BLANKLINE>
         """
-        y = 0
+        target, key = self._target, self._key
+        mask, lst, new = target.mask, [], _new
+
+        # moves of the empty space up, down, right and left, as far as the
+        # grid goes, each a tile moving into the blank: the tile's number
+        # times step moves it from its field to the blank's
+        solvable = self._solvable
+        for cell, shift, step in target.moves[self._blank]:
+            child = new(MNPuzzle)
+            child._key = key + ((key >> shift) & mask) * step
+            child._blank, child._target = cell, target
+            child._solvable = solvable
+            lst.append(child)
+
+        return lst
+
+    def heuristic(self):
+        """
+        Return the Manhattan distance of the tiles of MNPuzzle self from
+        their places in the target grid, plus the linear conflicts.
 
-        # set y value to row of empty space
-        while '*' not in self.from_grid[y]:
-            y += 1
-        x = self.from_grid[y].index('*')
+        Tiles in their target row, but in the wrong order, must pass one
+        another, and one of each pair has to step out of the row and back;
+        the same goes for columns. For each row and column, two moves are
+        added for every tile outside its longest run in the right order.
 
-        lst = []
+        If a pattern database of the board is in use, its bound is returned
+        instead.
 
-        # shift piece down, empty space goes up
-        if y > 0:
-            lst.append(MNPuzzle(swap_up(self.from_grid, y, x),
-                                self.to_grid))
+        When a symbol repeats, a tile may end in any target cell of its
+        symbol, so each counts the distance to the nearest of them, and the
+        conflicts and databases, which need one home per tile, are left out.
 
-        # shift piece up, empty space goes down
-        if y < len(self.from_grid) - 1:
-            lst.append(MNPuzzle(swap_down(self.from_grid, y, x),
-                                self.to_grid))
+        @type self: MNPuzzle
+        @rtype: int
 
-        # shift piece left, empty space goes right
-        if x < len(self.from_grid[0]) - 1:
-            lst.append(MNPuzzle(swap_right(self.from_grid, y, x),
-                                self.to_grid))
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> mnp = MNPuzzle((('1', '2', '3'), ('4', '*', '5')), target_grid)
+        >>> mnp.heuristic()
+        1
+        >>> mnp = MNPuzzle((('2', '1', '3'), ('4', '5', '*')), target_grid)
+        >>> mnp.heuristic()
+        4
+        >>> mnp = MNPuzzle((('a', 'b'), ('a', '*')), (('a', 'a'), ('b', '*')))
+        >>> mnp.heuristic()
+        3
+        """
+        target = self._target
+        if target.repeated:
+            key, mask, bits = self._key, target.mask, target.bits
+            distance = 0
+            for nearest in target.nearest:
+                distance += nearest[key & mask]
+                key >>= bits
+            return distance
+
+        if PATTERN_DATABASES:
+            database = PATTERN_DATABASES.get((self.n, self.m,
+                                              self._target.blank))
+            if database is not None:
+                return database.heuristic(self)
+
+        key = self._key
+        mask, bits, places = target.mask, target.bits, target.places
+
+        distance = 0
+        # the target columns of the tiles in their target row, by row, and
+        # the target rows of those in their target column, by column
+        rows = [[] for _ in range(target.rows)]
+        lines = [[] for _ in range(target.columns)]
+        for y, x in target.coordinates:
+            tile = key & mask
+            key >>= bits
+            if tile:
+                goal_y, goal_x = places[tile]
+                distance += abs(goal_y - y) + abs(goal_x - x)
+                if goal_y == y:
+                    rows[y].append(goal_x)
+                if goal_x == x:
+                    lines[x].append(goal_y)
+
+        for line in rows + lines:
+            if len(line) > 1:
+                distance += 2 * (len(line) - _longest_increasing(line))
+        return distance
+
+    def goal_state(self):
+        """
+        Return the solved MNPuzzle with the target grid of MNPuzzle self.
 
-        # shift piece right, empty space goes left
-        if x > 0:
-            lst.append(MNPuzzle(swap_left(self.from_grid, y, x),
-                                self.to_grid))
+        Every slide can be undone by sliding back, so the default
+        reverse_extensions apply.
 
-        return lst
+        @type self: MNPuzzle
+        @rtype: MNPuzzle
+
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> mnp = MNPuzzle((('*', '1', '2'), ('3', '4', '5')), target_grid)
+        >>> mnp.goal_state().is_solved()
+        True
+        """
+        target = self._target
+        return _make(target.key, target.blank, target, True)
+
+    # override fail_fast
+    # a slide swaps the blank with a tile, so it changes the parity of the
+    # arrangement of the grid, and moves the blank one row or column
+    def fail_fast(self):
+        """
+        Return True iff the target grid of MNPuzzle self can never be
+        reached from it.
+
+        The test is only made when the puzzle is created; every state a
+        search reaches from it shares the answer, so this takes constant
+        time.
+
+        @type self: MNPuzzle
+        @rtype: bool
+
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> mnp = MNPuzzle((('*', '2', '3'), ('1', '4', '5')), target_grid)
+        >>> mnp.fail_fast()
+        False
+        >>> mnp = MNPuzzle((('2', '1', '3'), ('4', '5', '*')), target_grid)
+        >>> mnp.fail_fast()
+        True
+        >>> mnp = MNPuzzle((('1', '*', '3', '2'),), (('1', '2', '3', '*'),))
+        >>> mnp.fail_fast(), mnp.extensions()[0].fail_fast()
+        (True, True)
+        >>> target_grid = (('a', 'a'), ('b', '*'))
+        >>> MNPuzzle((('a', 'b'), ('a', '*')), target_grid).fail_fast()
+        False
+        >>> MNPuzzle((('a', 'b', 'a', '*'),), (('a', 'a', 'b', '*'),)
+        ...          ).fail_fast()
+        True
+        """
+        return not self._solvable
 
     # override is_solved
     # a configuration is solved when from_grid is the same as to_grid
@@ -191,141 +451,180 @@ class MNPuzzle(Puzzle):
         True
         >>> mnp2.is_solved()
         False
+        >>> target_grid = (('a', 'a'), ('b', '*'))
+        >>> MNPuzzle((('a', 'a'), ('b', '*')), target_grid).is_solved()
+        True
+        >>> MNPuzzle((('a', 'b'), ('a', '*')), target_grid).is_solved()
+        False
         """
-        return self.to_grid == self.from_grid
-
-
-def swap_up(grid, y, x):
-    """
-    Swap empty space with puzzle symbol above it in the grid. y is the index
-    of the tuple containing the empty space in grid, and x is index of empty
-    space in it's tuple.
-
-    Precondition:  0 < y < len(grid), 0 <= x < len(grid[0])
-
-    @type grid: tuple[tuple[str]]
-    @type y: int
-    @type x: int
-    @rtype: tuple[tuple[str]]
-            A grid for mn puzzle
-
-    >>> start_grid = (('1', '2', '3'), ('4', '5', '*'))
-    >>> swap_up(start_grid, 1, 2)
-    (('1', '2', '*'), ('4', '5', '3'))
-    >>> start_grid = (('1','2','3'), ('4', '5', '6'), \
-                        ('7', '8', '*'), ('9', '10', '11'))
-    >>> swap_up(start_grid, 2, 2)
-    (('1', '2', '3'), ('4', '5', '*'), ('7', '8', '6'), ('9', '10', '11'))
-    """
-    symbol = grid[y - 1][x]
-
-    # creates new tuples for the rows changed
-    new_toprow = grid[y - 1][:x] + tuple('*')
-    new_botrow = grid[y][:x] + tuple(symbol)
-
-    # adds the space after the swapped piece for both rows
-    if x < len(grid[y]):
-        new_toprow += tuple(grid[y - 1][x + 1:])
-        new_botrow += tuple(grid[y][x + 1:])
-
-    return grid[:y-1] + (new_toprow, new_botrow) + grid[y+1:]
-
-
-def swap_down(grid, y, x):
-    """
-    Swap empty space with puzzle symbol below it in the grid. y is the index
-    of the tuple containing the empty space in grid, and x is index of empty
-    space in it's tuple.
+        return self._key == self._target.key
 
-    Precondition: 0 <= y < len(grid) - 1, 0 <= x < len(grid[0])
 
-    @type grid: tuple[tuple[str]]
-    @type y: int
-    @type x: int
-    @rtype: tuple[tuple[str]]
-
-    >>> start_grid = (('1', '2', '*'), ('4', '5', '3'))
-    >>> swap_down(start_grid, 0, 2)
-    (('1', '2', '3'), ('4', '5', '*'))
-    >>> start_grid = (('1','2','3'), ('4', '5', '*'), \
-                        ('7', '8', '6'), ('9', '10', '11'))
-    >>> swap_down(start_grid, 1, 2)
-    (('1', '2', '3'), ('4', '5', '6'), ('7', '8', '*'), ('9', '10', '11'))
-    """
-    symbol = grid[y + 1][x]
-
-    new_botrow = grid[y + 1][:x] + ('*',)
-    new_toprow = grid[y][:x] + (symbol,)
-
-    if x < len(grid[y]):
-        new_toprow += tuple(grid[y][x + 1:])
-        new_botrow += tuple(grid[y + 1][x + 1:])
-
-    return grid[:y] + (new_toprow, new_botrow) + grid[y + 2:]
-
-
-def swap_right(grid, y, x):
-    """
-    Swap empty space with puzzle symbol to the right of it in the grid. y is
-    the index of the tuple containing the empty space in grid, and x is index
-    of empty space in it's tuple.
-
-    Precondition: 0 <= x < len(grid[0]) - 1, 0 <= y < len(grid)
-
-    @type grid: tuple[tuple[str]]
-    @type y: int
-    @type x: int
-    @rtype: tuple[tuple[str]]
-
-    >>> start_grid = (('1', '*', '2'), ('3', '4', '5'))
-    >>> swap_right(start_grid, 0, 1)
-    (('1', '2', '*'), ('3', '4', '5'))
-    >>> start_grid = (('1','2','3'), ('4', '*', '5'), \
-                        ('6', '7', '8'), ('9', '10', '11'))
-    >>> swap_right(start_grid, 1, 1)
-    (('1', '2', '3'), ('4', '5', '*'), ('6', '7', '8'), ('9', '10', '11'))
-    """
-    symbol = grid[y][x + 1]
-
-    # creates a new tuple for the changed row
-    new_row = grid[y][:x] + (symbol,) + ('*',)
-
-    # adds the space after the swapped piece for the changed row
-    if x < len(grid[y]) - 2:
-        new_row += tuple(grid[y][x + 2:])
-
-    return grid[:y] + (new_row,) + grid[y+1:]
-
-
-def swap_left(grid, y, x):
+class _Target:
     """
-    Swap empty space with puzzle symbol to the left of it in the grid. y is
-    the index of the tuple containing the empty space in grid, and x is index
-    of empty space in it's tuple.
-
-    Precondition: 0 < x < len(grid[0]), 0 <= y < len(grid)
+    What the states of an MNPuzzle towards a target grid have in common.
 
+    === Attributes ===
     @type grid: tuple[tuple[str]]
-    @type y: int
-    @type x: int
-    @rtype: tuple[tuple[str]]
-
-    >>> start_grid = (('1', '*', '2'), ('3', '4', '5'))
-    >>> swap_left(start_grid, 0, 1)
-    (('*', '1', '2'), ('3', '4', '5'))
-    >>> start_grid = (('1','2','3'), ('4', '5', '*'), \
-                        ('6', '7', '8'), ('9', '10', '11'))
-    >>> swap_left(start_grid, 1, 2)
-    (('1', '2', '3'), ('4', '*', '5'), ('6', '7', '8'), ('9', '10', '11'))
+        The target grid.
+    @type rows: int
+    @type columns: int
+    @type symbols: list[str]
+        The symbol of each tile number.
+    @type tiles: dict[str, int]
+        The number of each symbol's tile: the first cell the symbol fills,
+        plus one.
+    @type homes: list[list[int]]
+        The cells each tile number fills in the target grid, in order.
+    @type repeated: bool
+        Whether some symbol fills more than one cell.
+    @type bits: int
+        The bits of the field of each cell.
+    @type mask: int
+        The bits of the lowest field.
+    @type key: int
+        The packed target grid.
+    @type blank: int
+        The cell of the blank in the target grid.
+    @type coordinates: list[(int, int)]
+        The row and column of each cell.
+    @type places: list[(int, int)]
+        The row and column of the target cell of each tile number; 0 is
+        the blank, not a tile.
+    @type nearest: list[list[int]]
+        For each cell, the distance from it to the nearest target cell of
+        each tile number; only kept when a symbol repeats.
+    @type moves: list[list[(int, int, int)]]
+        For the blank in each cell, the cells next to it, in the order of
+        extensions, each with the shift of its field, and the number that
+        moves a tile from its field to the blank's when multiplied by it.
     """
-    symbol = grid[y][x - 1]
-
-    new_row = grid[y][:x - 1] + ('*',) + (symbol,)
 
-    if x < len(grid[y]) - 1:
-        new_row += grid[y][x + 1:]
+    def __init__(self, grid):
+        """
+        Create the _Target self of the target grid.
 
-    return grid[:y] + (new_row,) + grid[y+1:]
+        @type self: _Target
+        @type grid: tuple[tuple[str]]
+        @rtype: None
+        """
+        self.grid = tuple(grid)
+        self.rows, self.columns = len(grid), len(grid[0])
+        cells = [symbol for row in grid for symbol in row]
+        self.blank = cells.index('*')
+        self.symbols = ['*'] + cells
+        self.tiles = {'*': 0}
+        for cell, symbol in enumerate(cells):
+            self.tiles.setdefault(symbol, cell + 1)
+        self.homes = [[] for _ in range(len(cells) + 1)]
+        for cell, symbol in enumerate(cells):
+            self.homes[self.tiles[symbol]].append(cell)
+        self.repeated = len(self.tiles) < len(cells)
+        self.bits = len(cells).bit_length()
+        self.mask = (1 << self.bits) - 1
+
+        self.key = 0
+        for cell in range(len(cells) - 1, -1, -1):
+            self.key = (self.key << self.bits) | self.tiles[cells[cell]]
+        self.coordinates = [divmod(cell, self.columns)
+                            for cell in range(len(cells))]
+        self.places = [None] + self.coordinates
+        self.nearest = []
+        if self.repeated:
+            # the blank and the unused tile numbers count nothing
+            for y, x in self.coordinates:
+                self.nearest.append([0] + [
+                    min([abs(goal_y - y) + abs(goal_x - x)
+                         for goal_y, goal_x in
+                         [self.coordinates[goal] for goal in home]],
+                        default=0)
+                    for home in self.homes[1:]])
+
+        self.moves = []
+        for cell in range(len(cells)):
+            y, x = divmod(cell, self.columns)
+            neighbours = []
+            if y > 0:
+                neighbours.append(cell - self.columns)
+            if y < self.rows - 1:
+                neighbours.append(cell + self.columns)
+            if x < self.columns - 1:
+                neighbours.append(cell + 1)
+            if x > 0:
+                neighbours.append(cell - 1)
+            self.moves.append([(neighbour, neighbour * self.bits,
+                                (1 << cell * self.bits) -
+                                (1 << neighbour * self.bits))
+                               for neighbour in neighbours])
+
+
+def _make(key, blank, target, solvable):
+    # Return the MNPuzzle towards target whose packed state is key, with the
+    # blank in cell blank, and which can reach target iff solvable.
+    #
+    # @type key: int
+    # @type blank: int
+    # @type target: _Target
+    # @type solvable: bool
+    # @rtype: MNPuzzle
+    puzzle = _new(MNPuzzle)
+    puzzle._key, puzzle._blank, puzzle._target = key, blank, target
+    puzzle._solvable = solvable
+    return puzzle
+
+
+def _reaches_target(puzzle):
+    # Return whether the target grid of puzzle can be reached from it.
+    #
+    # Every slide swaps the blank with a tile, which flips the parity of the
+    # permutation taking the current grid to the target, and moves the blank
+    # by one row or column, which flips the parity of its distance from its
+    # target cell. With two or more rows and columns, the states with the
+    # two parities equal are exactly those that reach the target; this is
+    # the inversion count and blank row rule of the 15-puzzle, for any
+    # target. The parity of the permutation is that of its cells less its
+    # cycles. When a symbol repeats, swapping two of its copies changes the
+    # parity without changing the grid, so every state reaches the target.
+    # In a single row or column the tiles can never pass one another, so
+    # they must already be in the target order.
+    #
+    # @type puzzle: MNPuzzle
+    # @rtype: bool
+    target, cells = puzzle._target, puzzle.cells()
+    if target.rows == 1 or target.columns == 1:
+        order = [cell for cell in sorted(range(len(cells)),
+                                         key=cells.__getitem__)
+                 if cell != target.blank]
+        return order == sorted(order)
+    if target.repeated:
+        return True
+
+    swaps = len(cells)
+    visited = [False] * len(cells)
+    for cell in range(len(cells)):
+        if not visited[cell]:
+            swaps -= 1
+            while not visited[cell]:
+                visited[cell] = True
+                cell = cells[cell]
+    (y, x), (goal_y, goal_x) = (target.coordinates[puzzle._blank],
+                                target.coordinates[target.blank])
+    return swaps % 2 == (abs(y - goal_y) + abs(x - goal_x)) % 2
+
+
+_new = object.__new__
+
+
+def _longest_increasing(numbers):
+    # Return the length of the longest increasing subsequence of numbers.
+    #
+    # @type numbers: list[int]
+    # @rtype: int
+    longest = []
+    for i in range(len(numbers)):
+        longest.append(1 + max([longest[j] for j in range(i)
+                                if numbers[j] < numbers[i]] + [0]))
+    return max(longest + [0])
 
 
 if __name__ == '__main__':
@@ -345,3 +644,12 @@ if __name__ == '__main__':
     end = time()
     print('DFS solved: \n\n{} \n\nin {} seconds'.format(
         solution, end - start))
+    # two tiles of a 4x4 target swapped cannot be slid back in place
+    target_grid = (('1', '2', '3', '4'), ('5', '6', '7', '8'),
+                   ('9', '10', '11', '12'), ('13', '14', '15', '*'))
+    start_grid = (('2', '1', '3', '4'),) + target_grid[1:]
+    start = time()
+    solution = breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    end = time()
+    print('BFS gave {} for an unsolvable 4x4 in {} seconds'.format(
+        solution, end - start))
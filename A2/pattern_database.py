@@ -0,0 +1,406 @@
+"""
+Additive pattern databases, a heuristic for MNPuzzle.
+
+The tiles of a board, named by the cells they fill in the target grid, are
+split into disjoint groups. For each group, a breadth-first search back from
+the target finds the fewest moves of the group's tiles that bring any
+placement of them home, while the other tiles are left unnamed and move for
+free. Since no move is counted for two groups, the sum of the tables of all
+groups never overestimates the moves needed, and it is far closer to them
+than the Manhattan distance.
+
+A placement of k tiles on a board of n cells is ranked as a k-permutation
+of the cells, a perfect hash onto range(n! / (n - k)!), and each table is a
+byte per rank. A database is saved to a single file, and loaded by mapping
+the file into memory, so its tables are not read or copied until they are
+used, and processes that load the same file share them.
+
+Databases only depend on the shape of the board and the cell of the blank
+in the target grid, not on the symbols of the tiles.
+"""
+import mmap
+import struct
+from collections import deque
+
+import mn_puzzle
+
+# the file starts with the magic number, the rows, columns, cell of the
+# blank in the target and number of groups, then the size and cells of each
+# group; the tables follow in the order of the groups
+_MAGIC = b'MNPDB\x00\x00\x01'
+_HEADER = struct.Struct('<8sHHHH')
+_UNSEEN = 255
+
+
+class PatternDatabase:
+    """
+    The pattern tables of a board.
+
+    === Attributes ===
+    @type rows: int
+        The number of rows of the board.
+    @type columns: int
+        The number of columns of the board.
+    @type blank: int
+        The cell of the blank in the target grid, in row-major order.
+    @type groups: list[tuple[int]]
+        The tiles of each pattern, by the cells they fill in the target.
+    @type tables: list[bytearray | memoryview]
+        The fewest moves of each pattern's tiles that bring them home, by
+        the rank of their cells.
+    """
+
+    # === Private Attributes ===
+    # @type _map: mmap.mmap | None
+    #     The memory map of the file the tables were loaded from, if any.
+
+    def __init__(self, rows, columns, blank, groups, tables):
+        """
+        Create a new PatternDatabase self of the given tables.
+
+        @type self: PatternDatabase
+        @type rows: int
+        @type columns: int
+        @type blank: int
+        @type groups: list[tuple[int]]
+        @type tables: list[bytearray | memoryview]
+        @rtype: None
+        """
+        self.rows, self.columns, self.blank = rows, columns, blank
+        self.groups, self.tables = groups, tables
+        self._map = None
+
+    def lookup(self, cells):
+        """
+        Return the sum of the tables of PatternDatabase self for the board
+        where the tile of target cell i is in cell cells[i].
+
+        @type self: PatternDatabase
+        @type cells: list[int]
+        @rtype: int
+
+        >>> database = build_database(2, 2, [(0, 1, 2)])
+        >>> database.lookup([0, 1, 2, 3]), database.lookup([1, 3, 2, 0])
+        (0, 2)
+        """
+        size, total = len(cells), 0
+        for group, table in zip(self.groups, self.tables):
+            total += table[rank([cells[goal] for goal in group], size)]
+        return total
+
+    def heuristic(self, puzzle):
+        """
+        Return the sum of the tables of PatternDatabase self for MNPuzzle
+        puzzle.
+
+        Precondition: puzzle has the shape and target blank of self.
+
+        @type self: PatternDatabase
+        @type puzzle: MNPuzzle
+        @rtype: int
+
+        >>> from mn_puzzle import MNPuzzle
+        >>> database = build_database(2, 3, [(0, 1, 2), (3, 4)])
+        >>> target_grid = (('1', '2', '3'), ('4', '5', '*'))
+        >>> database.heuristic(MNPuzzle((('1', '2', '3'), ('*', '4', '5')),
+        ...                             target_grid))
+        2
+        """
+        return self.lookup(puzzle.cells())
+
+    def save(self, filename):
+        """
+        Write PatternDatabase self to the file at filename.
+
+        @type self: PatternDatabase
+        @type filename: str
+        @rtype: None
+        """
+        with open(filename, 'wb') as out:
+            out.write(_HEADER.pack(_MAGIC, self.rows, self.columns,
+                                   self.blank, len(self.groups)))
+            for group in self.groups:
+                out.write(struct.pack('<H{}H'.format(len(group)), len(group),
+                                      *group))
+            for table in self.tables:
+                out.write(table)
+
+    def close(self):
+        """
+        Release the memory map PatternDatabase self was loaded from, if
+        any. Its tables cannot be used afterwards.
+
+        @type self: PatternDatabase
+        @rtype: None
+        """
+        if self._map is not None:
+            for table in self.tables:
+                table.release()
+            self._map.close()
+            self._map, self.tables = None, []
+
+
+def rank(cells, size):
+    """
+    Return the rank of the distinct cells among all the sequences of
+    len(cells) distinct cells of a board of size cells.
+
+    Each cell is counted among the cells not used before it, as a digit in
+    a mixed radix of size, size - 1, and so on, so the ranks are exactly
+    range(size! / (size - len(cells))!).
+
+    @type cells: list[int]
+    @type size: int
+    @rtype: int
+
+    >>> [rank(cells, 3) for cells in ([0, 1], [0, 2], [1, 0], [2, 1])]
+    [0, 1, 2, 5]
+    """
+    result = 0
+    for i, cell in enumerate(cells):
+        smaller = 0
+        for earlier in cells[:i]:
+            if earlier < cell:
+                smaller += 1
+        result = result * (size - i) + cell - smaller
+    return result
+
+
+def default_groups(rows, columns, blank=None, height=2, width=2):
+    """
+    Return the tiles of a board, by their target cells, split into blocks of
+    height by width cells of the target, smaller along the edges.
+
+    Tiles close together in the target usually get in one another's way,
+    so blocks count more of the moves than rows or columns of tiles do.
+
+    @type rows: int
+    @type columns: int
+    @type blank: int | None
+        The cell of the blank in the target; the last cell if None.
+    @type height: int
+    @type width: int
+    @rtype: list[tuple[int]]
+
+    >>> default_groups(3, 3)
+    [(0, 1, 3, 4), (2, 5), (6, 7)]
+    """
+    if blank is None:
+        blank = rows * columns - 1
+    groups = []
+    for top in range(0, rows, height):
+        for left in range(0, columns, width):
+            group = tuple([y * columns + x
+                           for y in range(top, min(top + height, rows))
+                           for x in range(left, min(left + width, columns))
+                           if y * columns + x != blank])
+            if group:
+                groups.append(group)
+    return groups
+
+
+def build_database(rows, columns, groups=None, blank=None):
+    """
+    Return the PatternDatabase of a board of rows by columns cells, with
+    the blank of the target at cell blank, for the given groups.
+
+    @type rows: int
+    @type columns: int
+    @type groups: list[tuple[int]] | None
+        Disjoint groups of tiles, by their target cells; default_groups if
+        None.
+    @type blank: int | None
+        The cell of the blank in the target; the last cell if None.
+    @rtype: PatternDatabase
+
+    >>> database = build_database(2, 2)
+    >>> database.groups, len(database.tables[0])
+    ([(0, 1, 2)], 24)
+    """
+    if blank is None:
+        blank = rows * columns - 1
+    if groups is None:
+        groups = default_groups(rows, columns, blank=blank)
+    tables = [_build_table(rows, columns, group, blank) for group in groups]
+    return PatternDatabase(rows, columns, blank, list(groups), tables)
+
+
+def load_database(filename):
+    """
+    Return the PatternDatabase saved in the file at filename, with its
+    tables mapped into memory.
+
+    @type filename: str
+    @rtype: PatternDatabase
+
+    >>> import os, tempfile
+    >>> with tempfile.TemporaryDirectory() as folder:
+    ...     path = os.path.join(folder, 'mn2x3.pdb')
+    ...     build_database(2, 3, [(0, 1, 2), (3, 4)]).save(path)
+    ...     database = load_database(path)
+    ...     found = database.groups, database.lookup([0, 1, 2, 3, 4, 5])
+    ...     database.close()
+    >>> found
+    ([(0, 1, 2), (3, 4)], 0)
+    """
+    with open(filename, 'rb') as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, rows, columns, blank, count = _HEADER.unpack_from(data)
+    if magic != _MAGIC:
+        data.close()
+        raise ValueError("{} is not a pattern database.".format(filename))
+
+    groups, offset = [], _HEADER.size
+    for _ in range(count):
+        size = struct.unpack_from('<H', data, offset)[0]
+        groups.append(struct.unpack_from('<{}H'.format(size), data,
+                                         offset + 2))
+        offset += 2 + 2 * size
+
+    view, tables = memoryview(data), []
+    for group in groups:
+        length = _permutations(rows * columns, len(group))
+        tables.append(view[offset:offset + length])
+        offset += length
+    view.release()
+
+    database = PatternDatabase(rows, columns, blank, groups, tables)
+    database._map = data
+    return database
+
+
+def use_database(database):
+    """
+    Make MNPuzzle.heuristic look up database for the boards of its shape
+    and target blank, or stop looking up any database if it is None.
+
+    @type database: PatternDatabase | None
+    @rtype: None
+    """
+    if database is None:
+        mn_puzzle.PATTERN_DATABASES.clear()
+    else:
+        mn_puzzle.PATTERN_DATABASES[(database.rows, database.columns,
+                                     database.blank)] = database
+
+
+def _build_table(rows, columns, group, blank):
+    # Return the table of the tiles of group, which fill the cells of group
+    # in the target, on a board of rows by columns with the blank at cell
+    # blank in the target.
+    #
+    # The search tracks the cells of the group's tiles and of the blank.
+    # Moving one of the tiles costs one move and moving another tile costs
+    # none, so states are searched in order of cost with a double-ended
+    # queue: free moves at the front, counted ones at the back. The cell of
+    # the blank is the last digit of a state's rank, so the states of a
+    # placement of the tiles are consecutive.
+    #
+    # @type rows: int
+    # @type columns: int
+    # @type group: tuple[int]
+    # @type blank: int
+    # @rtype: bytearray
+    size = rows * columns
+    free = size - len(group)
+    neighbours = [_neighbours(cell, rows, columns) for cell in range(size)]
+    costs = bytearray([_UNSEEN]) * _permutations(size, len(group) + 1)
+
+    start = tuple(group) + (blank,)
+    costs[rank(start, size)] = 0
+    states = deque([(start, rank(start, size), 0)])
+    while states:
+        state, position, cost = states.popleft()
+        if costs[position] < cost:
+            continue
+        empty = state[-1]
+        for cell in neighbours[empty]:
+            if cell in state:
+                following = list(state)
+                following[state.index(cell)], following[-1] = empty, cell
+                following, step = tuple(following), 1
+            else:
+                following, step = state[:-1] + (cell,), 0
+            following_position = rank(following, size)
+            if cost + step < costs[following_position]:
+                costs[following_position] = cost + step
+                if step:
+                    states.append((following, following_position, cost + 1))
+                else:
+                    states.appendleft((following, following_position, cost))
+
+    return bytearray([min(costs[i:i + free])
+                      for i in range(0, len(costs), free)])
+
+
+def _neighbours(cell, rows, columns):
+    # Return the cells next to cell on a board of rows by columns.
+    #
+    # @type cell: int
+    # @type rows: int
+    # @type columns: int
+    # @rtype: list[int]
+    y, x = divmod(cell, columns)
+    return [ny * columns + nx for ny, nx in
+            ((y - 1, x), (y + 1, x), (y, x - 1), (y, x + 1))
+            if 0 <= ny < rows and 0 <= nx < columns]
+
+
+def _permutations(size, length):
+    # Return the number of sequences of length distinct cells out of size.
+    #
+    # @type size: int
+    # @type length: int
+    # @rtype: int
+    result = 1
+    for i in range(length):
+        result *= size - i
+    return result
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    import os
+    import tempfile
+    from time import time
+    from mn_puzzle import MNPuzzle
+    from puzzle_benchmark import scrambled_mn
+    from puzzle_tools import astar_solve
+
+    start = time()
+    built = build_database(4, 4)
+    print('Built the 4x4 database ({} tables, {} bytes) in {:.1f} s'.format(
+        len(built.tables), sum([len(t) for t in built.tables]),
+        time() - start))
+    # the database file is removed with its folder, once it is closed
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'mn4x4.pdb')
+        built.save(path)
+        start = time()
+        loaded = load_database(path)
+        print('Loaded it in {:.4f} s'.format(time() - start))
+
+        puzzles = [scrambled_mn(100, seed, 4, 4) for seed in range(2000)]
+        for name, heuristic in (('Manhattan and linear conflicts',
+                                 MNPuzzle.heuristic),
+                                ('pattern database', loaded.heuristic)):
+            start = time()
+            for p in puzzles:
+                heuristic(p)
+            print('{}: {:.0f} lookups/sec'.format(
+                name, len(puzzles) / (time() - start)))
+
+        # A* with each heuristic on boards scrambled further and further
+        for depth in (40, 60, 80):
+            p = scrambled_mn(depth, 0, 4, 4)
+            for name, database in (('Manhattan', None), ('database', loaded)):
+                use_database(database)
+                stats = {}
+                start = time()
+                astar_solve(p, stats)
+                print('depth {} {:9}: {:7} expanded in {:.2f} s'.format(
+                    depth, name, stats['expanded'], time() - start))
+        use_database(None)
+        loaded.close()
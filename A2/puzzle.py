@@ -4,6 +4,9 @@ class Puzzle:
     or even unsolvable.
     """
 
+    # no instance attributes here, so subclasses may use __slots__
+    __slots__ = ()
+
     def fail_fast(self):
         """
         Return True if Puzzle self can never be extended to a solution.
@@ -16,6 +19,74 @@ class Puzzle:
         """
         return False
 
+    def state_key(self):
+        """
+        Return a compact, hashable key for the state of Puzzle self.
+
+        Two states that can be reached from one another have the same key
+        only if they are equal, or the same but for a symmetry of the
+        puzzle that takes solutions to solutions, so solvers use keys to
+        remember the states they have seen. Override this in a subclass
+        with something cheaper than the string representation.
+
+        @type self: Puzzle
+        @rtype: object
+        """
+        return str(self)
+
+    def __hash__(self):
+        """
+        Return a hash of Puzzle self, based on its state key.
+
+        A subclass that overrides __eq__ must set __hash__ = Puzzle.__hash__
+        to stay hashable.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return hash(self.state_key())
+
+    def heuristic(self):
+        """
+        Return a lower bound on the number of moves from Puzzle self to a
+        solution.
+
+        Informed solvers search the states with the smallest bound first,
+        and find shortest paths as long as the bound is never more than the
+        true number of moves. Override this in a subclass with a bound
+        better than the default of 0.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def goal_state(self):
+        """
+        Return the solved Puzzle that every solution of Puzzle self ends
+        in, or None if there is no single such state.
+
+        Override this, along with reverse_extensions, in a subclass whose
+        solved state is known, so solvers can also search back from it.
+
+        @type self: Puzzle
+        @rtype: Puzzle | None
+        """
+        return None
+
+    def reverse_extensions(self):
+        """
+        Return the puzzles that extend to Puzzle self in one move.
+
+        By default these are the extensions of self, which is right for
+        puzzles where every move can be undone by another. Override this in
+        a subclass where it is not, or whose extensions stop at a solution.
+
+        @type self: Puzzle
+        @rtype: list[Puzzle]
+        """
+        return self.extensions()
+
     def is_solved(self):
         """
         Return True iff Puzzle self is solved.
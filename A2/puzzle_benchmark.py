@@ -0,0 +1,398 @@
+"""
+A benchmark suite for the puzzle solvers.
+
+Every family of generated instances grows in difficulty with a parameter:
+MN boards by the number of random moves scrambling them, with 4x4 boards
+for the informed solvers only, 9x9 and 16x16 sudoku by the number of clues
+left, peg solitaire by the board, and word ladders by the length of the
+shortest ladder. Each solver of a family is run on each
+instance, and the nodes expanded, nodes per second, peak memory and wall
+time are recorded. Wall time is measured in a separate run from peak
+memory, since tracing memory slows the solvers down. A parameter with no
+instance, such as a ladder longer than any in the word list, is listed
+as skipped.
+
+Word ladder extensions follow the iteration order of a set of strings,
+which changes with the hash seed, so set PYTHONHASHSEED to compare runs of
+the word ladder benchmarks node for node.
+
+Run the module to write the results to a JSON file, and to compare them
+with the results of an earlier run:
+
+    python puzzle_benchmark.py results.json [--quick] [--compare old.json]
+
+or to compare the seen sets the solvers would build from state keys with
+those built from the strings of the puzzles:
+
+    python puzzle_benchmark.py --keys
+
+=== Constants ===
+@type SOLVERS: dict[str, (Puzzle, dict) -> PuzzleNode | None]
+    The solvers to benchmark, by name. Each takes a puzzle and a dict in
+    which it counts the nodes it expands as 'expanded'; dlx solves only
+    sudoku.
+@type FAMILIES: dict[str, (tuple, int, dict[str, int])]
+    The instance families, by name: the parameters of the instances, in
+    increasing difficulty; how many of them a quick run covers; and the
+    names of the solvers to run, each with how many of the instances it is
+    fast enough for.
+"""
+import json
+import platform
+import random
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+
+from dlx import dlx_solve
+from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
+from mn_puzzle import MNPuzzle
+from puzzle_tools import (astar_solve, breadth_first_solve,
+                          bidirectional_solve, depth_first_solve,
+                          ida_star_solve)
+from sudoku_puzzle import SudokuPuzzle
+from word_ladder_puzzle import WordLadderPuzzle
+
+SOLVERS = {
+    'depth_first': depth_first_solve,
+    'breadth_first': breadth_first_solve,
+    'bidirectional': bidirectional_solve,
+    'astar': astar_solve,
+    'ida_star': ida_star_solve,
+    'dlx': dlx_solve
+}
+
+FAMILIES = {
+    'mn': ((4, 8, 12, 16, 20), 2,
+           {'breadth_first': 5, 'depth_first': 5, 'bidirectional': 5,
+            'astar': 5, 'ida_star': 5}),
+    'mn4x4': ((20, 40, 60), 1, {'astar': 3, 'ida_star': 3}),
+    'sudoku': ((45, 35, 28, 25, 22), 2, {'depth_first': 5, 'dlx': 5}),
+    'sudoku16': ((160, 120, 100, 80, 60), 2, {'depth_first': 5, 'dlx': 5}),
+    'peg': (('3x3', '4x4', '3x6', '5x4', '5x5'), 2,
+            {'depth_first': 5, 'breadth_first': 4, 'astar': 5,
+             'ida_star': 3}),
+    'word_ladder': ((2, 4, 6, 8), 2,
+                    {'breadth_first': 4, 'depth_first': 4, 'bidirectional': 4,
+                     'astar': 4, 'ida_star': 4})
+}
+
+
+def scrambled_mn(depth, seed=0, rows=2, columns=4):
+    """Return a <rows>x<columns> MNPuzzle scrambled from its solution by
+    <depth> random moves, none of which undoes the move before it.
+
+    The default board is small enough for depth-first search to exhaust.
+
+    @type depth: int
+    @type seed: int
+    @type rows: int
+    @type columns: int
+    @rtype: MNPuzzle
+
+    >>> print(scrambled_mn(0))
+    Current State:
+     1 2 3 4
+     5 6 7 *
+    Target State:
+     1 2 3 4
+     5 6 7 *
+    <BLANKLINE>
+    """
+    rng = random.Random(seed)
+    tiles = [str(tile) for tile in range(1, rows * columns)] + ['*']
+    goal = tuple([tuple(tiles[row * columns:(row + 1) * columns])
+                  for row in range(rows)])
+    puzzle, previous = MNPuzzle(goal, goal), None
+    for _ in range(depth):
+        moves = [move for move in puzzle.extensions()
+                 if previous is None or
+                 move.state_key() != previous.state_key()]
+        previous, puzzle = puzzle, rng.choice(moves)
+    return puzzle
+
+
+def sudoku_with_clues(clues, seed=0, n=9):
+    """Return an <n>x<n> SudokuPuzzle with <clues> cells of a random solved
+    grid left filled in. The symbols are the numbers from 1 to n.
+
+    @type clues: int
+    @type seed: int
+    @type n: int
+    @rtype: SudokuPuzzle
+
+    >>> s = sudoku_with_clues(81)
+    >>> s.is_solved()
+    True
+    >>> str(sudoku_with_clues(30)).count('*')
+    51
+    >>> sudoku_with_clues(256, n=16).is_solved()
+    True
+    """
+    rng = random.Random(seed)
+    side = round(n ** (1 / 2))
+    digits = [str(digit) for digit in range(1, n + 1)]
+    rng.shuffle(digits)
+    # Rows and columns are shuffled within their bands and stacks, and the
+    # bands and stacks among themselves, which keeps the grid solved.
+    rows = [band * side + row for band in rng.sample(range(side), side)
+            for row in rng.sample(range(side), side)]
+    columns = [stack * side + column
+               for stack in rng.sample(range(side), side)
+               for column in rng.sample(range(side), side)]
+    symbols = [digits[(r * side + r // side + c) % n]
+               for r in rows for c in columns]
+    for position in rng.sample(range(n * n), n * n - clues):
+        symbols[position] = '*'
+    return SudokuPuzzle(n, symbols, set(digits))
+
+
+def peg_board(size):
+    """Return a GridPegSolitairePuzzle on a board of <size>, given as
+    '<rows>x<columns>', full of pegs but for a hole near the middle of the
+    bottom row.
+
+    @type size: str
+    @rtype: GridPegSolitairePuzzle
+
+    >>> print(peg_board('3x3'))
+     * * *
+     * * *
+     * . *
+    """
+    rows, columns = [int(part) for part in size.split('x')]
+    marker = [['*'] * columns for _ in range(rows)]
+    marker[rows - 1][columns // 2] = '.'
+    return GridPegSolitairePuzzle(marker, {'*', '.', '#'})
+
+
+def word_ladder(length, words, seed=0):
+    """Return a WordLadderPuzzle on four-letter lower case <words> whose
+    shortest ladder takes <length> steps, or None if there is none.
+
+    @type length: int
+    @type words: set[str]
+    @type seed: int
+    @rtype: WordLadderPuzzle | None
+
+    >>> ws = {'cost', 'cast', 'case', 'cave', 'save'}
+    >>> print(word_ladder(4, ws))
+    cost -> save
+    """
+    words = {word for word in words
+             if len(word) == 4 and word.isalpha() and word.islower()}
+    # Words one letter apart share a pattern with that letter blanked out.
+    patterns = {}
+    for word in words:
+        for i in range(4):
+            patterns.setdefault(word[:i] + '_' + word[i + 1:], []).append(word)
+
+    rng = random.Random(seed)
+    for start in rng.sample(sorted(words), len(words)):
+        distances, frontier = {start: 0}, [start]
+        for step in range(1, length + 1):
+            frontier = [neighbour for word in frontier for i in range(4)
+                        for neighbour in
+                        patterns[word[:i] + '_' + word[i + 1:]]
+                        if neighbour not in distances]
+            for word in frontier:
+                distances[word] = step
+        ends = sorted(word for word, distance in distances.items()
+                      if distance == length)
+        if ends:
+            return WordLadderPuzzle(start, rng.choice(ends), words)
+    return None
+
+
+def instance(family, parameter, words):
+    """Return the instance of <family> for <parameter>.
+
+    @type family: str
+    @type parameter: object
+    @type words: set[str]
+    @rtype: Puzzle | None
+    """
+    if family == 'mn':
+        return scrambled_mn(parameter)
+    elif family == 'mn4x4':
+        return scrambled_mn(parameter, rows=4, columns=4)
+    elif family == 'sudoku':
+        return sudoku_with_clues(parameter)
+    elif family == 'sudoku16':
+        return sudoku_with_clues(parameter, n=16)
+    elif family == 'peg':
+        return peg_board(parameter)
+    return word_ladder(parameter, words)
+
+
+def measure(solver, puzzle):
+    """Return the measurements of <solver> solving <puzzle>.
+
+    @type solver: (Puzzle, dict) -> PuzzleNode | None
+    @type puzzle: Puzzle
+    @rtype: dict[str, object]
+
+    >>> result = measure(breadth_first_solve, scrambled_mn(2))
+    >>> result['solved'], result['path_length'], result['expanded']
+    (True, 2, 3)
+    """
+    stats = {'expanded': 0}
+    start = perf_counter()
+    path = solver(puzzle, stats)
+    seconds = perf_counter() - start
+
+    tracemalloc.start()
+    solver(puzzle, {})
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    length = None
+    if path is not None:
+        length, node = 0, path
+        while node.children:
+            length, node = length + 1, node.children[0]
+    return {'solved': path is not None, 'path_length': length,
+            'expanded': stats['expanded'], 'seconds': seconds,
+            'nodes_per_sec': stats['expanded'] / seconds if seconds else None,
+            'peak_kb': peak / 1024}
+
+
+def run(quick=False, words_file='words'):
+    """Run the benchmarks, and return their results, with the family
+    and parameter of each instance that could not be made as skipped.
+
+    @type quick: bool
+        Run only the easier instances.
+    @type words_file: str
+    @rtype: dict[str, object]
+    """
+    with open(words_file) as file:
+        words = set(file.read().split())
+    results, skipped = [], []
+    for family, (parameters, easy, solvers) in FAMILIES.items():
+        for i, parameter in enumerate(parameters[:easy] if quick
+                                      else parameters):
+            puzzle = instance(family, parameter, words)
+            if puzzle is None:
+                skipped.append({'family': family, 'parameter': parameter})
+                print('{:12} {!s:>5} no instance, skipped'.format(
+                    family, parameter))
+                continue
+            for name in [name for name in solvers if i < solvers[name]]:
+                result = {'family': family, 'parameter': parameter,
+                          'solver': name}
+                result.update(measure(SOLVERS[name], puzzle))
+                results.append(result)
+                print('{family:12} {parameter!s:>5} {solver:14} '
+                      '{expanded:>9} nodes {seconds:9.3f} s '
+                      '{peak_kb:10.0f} KB'.format(**result))
+    return {'commit': _commit(), 'python': platform.python_version(),
+            'results': results, 'skipped': skipped}
+
+
+def compare(old, new):
+    """Print how the wall time and peak memory of each benchmark in the
+    results <new> changed from those in <old>.
+
+    @type old: dict[str, object]
+    @type new: dict[str, object]
+    @rtype: None
+    """
+    before = {(r['family'], str(r['parameter']), r['solver']): r
+              for r in old['results']}
+    for result in new['results']:
+        key = (result['family'], str(result['parameter']), result['solver'])
+        if key in before and before[key]['seconds']:
+            print('{:12} {:>5} {:14} time x{:.2f}  memory x{:.2f}'.format(
+                *key, result['seconds'] / before[key]['seconds'],
+                result['peak_kb'] / max(before[key]['peak_kb'], 1)))
+
+
+def compare_keys(states=5000, words_file='words'):
+    """Print, for up to <states> states reachable from the hardest instance
+    of each family, how long computing their strings and their state keys
+    takes, and the memory of a seen set of each.
+
+    @type states: int
+    @type words_file: str
+    @rtype: None
+    """
+    with open(words_file) as file:
+        words = set(file.read().split())
+    for family, (parameters, _, _) in FAMILIES.items():
+        puzzle = instance(family, parameters[-1], words)
+        if puzzle is None:
+            continue
+        puzzles = _reachable(puzzle, states)
+        for name, key in (('str', str), ('state_key', _state_key)):
+            start = perf_counter()
+            for puzzle in puzzles:
+                key(puzzle)
+            seconds = perf_counter() - start
+
+            tracemalloc.start()
+            seen = {key(puzzle) for puzzle in puzzles}
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            print('{:12} {:10} {:6} states {:8.2f} us/key {:8.0f} KB'.format(
+                family, name, len(seen), seconds / len(puzzles) * 1e6,
+                size / 1024))
+
+
+def _state_key(puzzle):
+    # Return the state key of puzzle.
+    #
+    # @type puzzle: Puzzle
+    # @rtype: object
+    return puzzle.state_key()
+
+
+def _reachable(puzzle, limit):
+    # Return up to limit distinct puzzles reachable from puzzle, nearest
+    # first.
+    #
+    # @type puzzle: Puzzle
+    # @type limit: int
+    # @rtype: list[Puzzle]
+    found, seen, position = [puzzle], {puzzle.state_key()}, 0
+    while position < len(found) and len(found) < limit:
+        for extension in found[position].extensions():
+            if extension.state_key() not in seen and len(found) < limit:
+                seen.add(extension.state_key())
+                found.append(extension)
+        position += 1
+    return found
+
+
+def _commit():
+    # Return the git commit of the working tree, or None if it is unknown.
+    #
+    # @rtype: str | None
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    arguments = sys.argv[1:]
+    if '--keys' in arguments:
+        compare_keys()
+        sys.exit()
+    if arguments and not arguments[0].startswith('--'):
+        output = arguments[0]
+    else:
+        output = 'benchmark.json'
+    report = run(quick='--quick' in arguments)
+    with open(output, 'w') as out:
+        json.dump(report, out, indent=2)
+    print('Results written to {}.'.format(output))
+    if '--compare' in arguments:
+        with open(arguments[arguments.index('--compare') + 1]) as earlier:
+            compare(json.load(earlier), report)
@@ -1,41 +1,37 @@
 """
 Some functions for working with puzzles
 """
+import heapq
+from array import array
+from collections import deque
+from itertools import count
+
 from puzzle import Puzzle
 from sudoku_puzzle import SudokuPuzzle
 from grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
 
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# uncomment the next two lines on a unix platform, say CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
-sys.setrecursionlimit(10**6)
-
 
-def depth_first_solve(puzzle):
+def depth_first_solve(puzzle, stats=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
     in its parent.  Return None if this is not possible.
 
     @type puzzle: Puzzle
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
     @rtype: PuzzleNode
 
     # examples unfeasible due to length and unpredictability of solved path
     """
-    node = PuzzleNode(puzzle)
-
-    seen = set({})
-
-    # solution is the first node that has a solved state for the puzzle
-    solution = depth_search_ans(node, seen)
-
-    # traces back by parents to create a path from start to solved
-    path = get_path(solution)
+    path = depth_first_search(puzzle, set(), stats)
+    if path is None:
+        return None
 
-    return path
+    # only the puzzles on the path to the solution become PuzzleNodes
+    root = PuzzleNode(puzzle)
+    _extend(root, path[1:])
+    return root
 
 
 def get_path(pn):
@@ -48,21 +44,25 @@ def get_path(pn):
 
     # examples unfeasible due to length and unpredictability of solved path
     """
-    if pn.parent is None:
-        return pn
+    # creates new node with only one child, for each ancestor of pn
+    while pn.parent is not None:
+        pn = PuzzleNode(pn.parent.puzzle, [pn], pn.parent.parent)
 
-    # creates new node with only one child
-    else:
-        return get_path(PuzzleNode(pn.parent.puzzle, [pn], pn.parent.parent))
+    return pn
 
 
-def depth_search_ans(pn, seen=set({})):
+def depth_search_ans(pn, seen=None, stats=None):
     """
-    Find and return the first node with the final state. Not following paths
-    that contain the same state as previously seen.
+    Find and return the first node with the final state, or None if there is
+    none. Not following paths that contain the same state as previously seen.
+
+    The search is done by depth_first_search, and only the path to the
+    solution is added below pn as PuzzleNodes.
 
     @type pn: PuzzleNode
-    @type seen: set
+    @type seen: set | None
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
     @rtype: PuzzleNode
 
     >>> grid = [['*', '*', '*', '*', '*'],\
@@ -107,75 +107,375 @@ def depth_search_ans(pn, seen=set({})):
     <BLANKLINE>
     <BLANKLINE>
     """
-    if pn.puzzle.is_solved():
-        return pn
-
-    elif pn.puzzle.extensions() is None:
+    if seen is None:
+        seen = set()
+    path = depth_first_search(pn.puzzle, seen, stats)
+    if path is None:
         return None
+    return _extend(pn, path[1:])
 
-    elif pn.puzzle.fail_fast():
-        return None
 
-    elif str(pn.puzzle) in seen:
-        return None
+def depth_first_search(puzzle, seen, stats=None):
+    """
+    Return the puzzles on the path from puzzle to the first solved state
+    found depth first, starting with puzzle, or None if there is none.
+    States whose keys are in seen are not followed, and the keys of the
+    states expanded are added to it.
+
+    The search keeps an explicit stack of the puzzles on the current path,
+    each with an iterator over its extensions not visited yet, so it is not
+    limited by the recursion limit, and the stack is the path once a
+    solution is found. No other node of the search is kept.
 
-    seen.add(str(pn.puzzle))
+    @type puzzle: Puzzle
+    @type seen: set
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
+    @rtype: list[Puzzle] | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> w = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
+    >>> [str(step) for step in depth_first_search(w, set())]
+    ['on -> no', 'oo -> no', 'no -> no']
+    """
+    stack = []
+    current = puzzle
 
-    extensions = pn.puzzle.extensions()
+    while True:
+        if current.is_solved():
+            return [step for step, _ in stack] + [current]
 
-    # create a node for each next move that hasn't been seen before
-    for extension in extensions:
-        if str(extension) not in seen:
-            node = PuzzleNode(extension, parent=pn)
-            pn.children.append(node)
+        elif not current.fail_fast():
+            key = current.state_key()
+            if key not in seen:
+                seen.add(key)
+                if stats is not None:
+                    stats['expanded'] = stats.get('expanded', 0) + 1
+                stack.append((current, iter(current.extensions())))
 
-    # recursive call
-    else:
-        for child in pn.children:
-            state = depth_search_ans(child, seen)
+        # backtrack until a puzzle on the path has an extension left to visit
+        current = None
+        while stack and current is None:
+            current = next(stack[-1][1], None)
+            if current is None:
+                stack.pop()
 
-            # if it's not None it must be the solution
-            if state is not None:
-                return state
+        if current is None:
+            return None
 
 
-def breadth_first_solve(puzzle):
+def breadth_first_solve(puzzle, stats=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
     of the puzzle in its parent.  Return None if this is not possible.
 
+    Only puzzle itself is checked with fail_fast, so a puzzle that can
+    tell it is unsolvable is given up on before searching.
+
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
+    @rtype: PuzzleNode | None
     """
+    if puzzle.is_solved():
+        return PuzzleNode(puzzle)
+    if puzzle.fail_fast():
+        return None
+
+    # the queue holds the puzzles of the frontier with their indices in the
+    # arena, which holds every other node as numbers
+    arena = SearchArena()
     nodes = Queue()
-    pn = PuzzleNode(puzzle)
-    seen = set({})
-    seen.add(str(pn))
+    seen = {puzzle.state_key()}
+    nodes.add((puzzle, arena.add(puzzle.state_key(), -1, 0)))
+
+    # there are still potential moves left
+    while not nodes.is_empty():
+
+        removed, index = nodes.remove()
+        """@type removed: Puzzle"""
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + 1
 
-    if pn.puzzle.is_solved():
-        return pn
+        for move, state in enumerate(removed.extensions()):
 
-    else:
-        nodes.add(pn)
-        # there are still potential moves left
-        while not nodes.is_empty():
+            # found the correct solution, return the path to it
+            if state.is_solved():
+                return arena.path(PuzzleNode(puzzle),
+                                  arena.add(state.state_key(), index, move))
+
+            # keep looking
+            key = state.state_key()
+            if key not in seen:
+                seen.add(key)
+                nodes.add((state, arena.add(key, index, move)))
+    return None
+
+
+def bidirectional_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
+
+    Breadth-first searches run from puzzle forward and from its goal
+    state backward, a layer of the smaller frontier at a time, until they
+    meet, so each only goes about half as deep as breadth_first_solve
+    would. The path is a shortest one. As in breadth_first_solve, only
+    puzzle itself is checked with fail_fast. Puzzles without a goal state
+    are solved by breadth_first_solve.
+
+    @type puzzle: Puzzle
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
+    @rtype: PuzzleNode | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cost", "cast", "case", "cave", "save", "most"}
+    >>> print(bidirectional_solve(WordLadderPuzzle("cost", "save", ws)))
+    cost -> save
+    <BLANKLINE>
+    cast -> save
+    <BLANKLINE>
+    case -> save
+    <BLANKLINE>
+    cave -> save
+    <BLANKLINE>
+    save -> save
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    if puzzle.is_solved():
+        return PuzzleNode(puzzle)
+    if puzzle.fail_fast():
+        return None
+    goal = puzzle.goal_state()
+    if goal is None:
+        return breadth_first_solve(puzzle, stats)
+
+    # each direction has an arena, the indices of the states it reached by
+    # key, and the frontier of puzzles it has yet to expand
+    arenas = (SearchArena(), SearchArena())
+    reached = ({puzzle.state_key(): arenas[0].add(puzzle.state_key(), -1, 0)},
+               {goal.state_key(): arenas[1].add(goal.state_key(), -1, 0)})
+    frontiers = (deque([(puzzle, 0)]), deque([(goal, 0)]))
+
+    while frontiers[0] and frontiers[1]:
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        meeting = _expand_layer(frontiers[side], arenas[side], reached[side],
+                                arenas[1 - side], reached[1 - side],
+                                side == 1, stats)
+        if meeting is not None:
+            if side == 1:
+                meeting = meeting[::-1]
+            forward = arenas[0].puzzles(puzzle, meeting[0])
+            backward = arenas[1].puzzles(goal, meeting[1], reverse=True)
+            root = PuzzleNode(puzzle)
+            _extend(root, forward[1:] + backward[-2::-1])
+            return root
+    return None
+
+
+def _expand_layer(frontier, arena, reached, other_arena, other_reached,
+                  reverse, stats):
+    # Expand every puzzle in frontier, which holds a layer of a search with
+    # its indices in arena, adding the new states to arena, reached and
+    # frontier. If any new state was reached by the other search, return
+    # the indices in arena and other_arena of one on a shortest path, and
+    # otherwise None.
+    #
+    # @type frontier: deque[(Puzzle, int)]
+    # @type arena: SearchArena
+    # @type reached: dict[object, int]
+    # @type other_arena: SearchArena
+    # @type other_reached: dict[object, int]
+    # @type reverse: bool
+    #     Whether to expand by reverse extensions.
+    # @type stats: dict[str, int] | None
+    # @rtype: (int, int) | None
+    best = None
+    for _ in range(len(frontier)):
+        removed, index = frontier.popleft()
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + 1
+        if reverse:
+            extensions = removed.reverse_extensions()
+        else:
+            extensions = removed.extensions()
+
+        for move, state in enumerate(extensions):
+            key = state.state_key()
+            if key not in reached:
+                reached[key] = arena.add(key, index, move)
+                if key in other_reached:
+                    # the whole layer is expanded, since a later state in it
+                    # may meet the other search closer to its root
+                    other = other_reached[key]
+                    length = other_arena.depths[other]
+                    if best is None or length < best[0]:
+                        best = (length, reached[key], other)
+                else:
+                    frontier.append((state, reached[key]))
+    return None if best is None else best[1:]
+
+
+def astar_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
 
-            removed = nodes.remove()
-            """@type removed: PuzzleNode"""
-            pot_ans = removed.puzzle.extensions()
+    States are expanded in order of the moves to reach them plus their
+    heuristic, so the path is a shortest one whenever the heuristic never
+    overestimates. Ties go to the state with the smaller heuristic. A
+    state reached again by a shorter path is pushed again, and the entry
+    of the longer path is skipped when it comes off the heap.
 
-            for state in pot_ans:
-                next_node = PuzzleNode(state, parent=removed)
+    @type puzzle: Puzzle
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded.
+    @rtype: PuzzleNode | None
+
+    >>> from mn_puzzle import MNPuzzle
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> stats = {}
+    >>> path = astar_solve(MNPuzzle(start_grid, target_grid), stats)
+    >>> print(path.children[0].children[0].children[0])
+    Current State:
+     1 2 3
+     4 5 *
+    Target State:
+     1 2 3
+     4 5 *
+    <BLANKLINE>
+    <BLANKLINE>
+    <BLANKLINE>
+    >>> stats['expanded']
+    3
+    """
+    arena = SearchArena()
+    key = puzzle.state_key()
+    # the fewest moves found to each state, by key
+    best = {key: 0}
+    sequence = count()
+    heuristic = puzzle.heuristic()
+    heap = [(heuristic, heuristic, next(sequence), arena.add(key, -1, 0),
+             puzzle)]
+
+    while heap:
+        _, _, _, index, current = heapq.heappop(heap)
+        moves = arena.depths[index]
+        if moves > best[arena.keys[index]]:
+            continue
+        if current.is_solved():
+            return arena.path(PuzzleNode(puzzle), index)
+        if current.fail_fast():
+            continue
+
+        if stats is not None:
+            stats['expanded'] = stats.get('expanded', 0) + 1
+        for move, state in enumerate(current.extensions()):
+            key = state.state_key()
+            if key not in best or moves + 1 < best[key]:
+                best[key] = moves + 1
+                heuristic = state.heuristic()
+                heapq.heappush(heap, (moves + 1 + heuristic, heuristic,
+                                      next(sequence),
+                                      arena.add(key, index, move), state))
+    return None
+
+
+def ida_star_solve(puzzle, stats=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
+    a solution, with each child PuzzleNode containing an extension
+    of the puzzle in its parent.  Return None if this is not possible.
 
-                # found the correct solution, return the path to it
-                if state.is_solved():
-                    return get_path(next_node)
+    Depth-first searches are repeated with a growing bound on the moves to
+    a state plus its heuristic, each bound the smallest that went over the
+    one before. Only the current path is kept, so memory grows with the
+    length of the path rather than with the states seen, and the path is
+    a shortest one whenever the heuristic never overestimates. States are
+    not repeated along a path, but may be searched again on others.
 
-                # keep looking
-                if str(next_node) not in seen:
-                    seen.add(str(next_node))
-                    nodes.add(next_node)
+    @type puzzle: Puzzle
+    @type stats: dict[str, int] | None
+        If given, stats['expanded'] counts the nodes expanded, in every
+        iteration.
+    @rtype: PuzzleNode | None
+
+    >>> from word_ladder_puzzle import WordLadderPuzzle
+    >>> ws = {"cost", "cast", "case", "cave", "save", "most"}
+    >>> print(ida_star_solve(WordLadderPuzzle("cost", "save", ws)))
+    cost -> save
+    <BLANKLINE>
+    cast -> save
+    <BLANKLINE>
+    case -> save
+    <BLANKLINE>
+    cave -> save
+    <BLANKLINE>
+    save -> save
+    <BLANKLINE>
+    <BLANKLINE>
+    """
+    bound = puzzle.heuristic()
+    while bound is not None:
+        path, bound = _bounded_search(puzzle, bound, stats)
+        if path is not None:
+            root = PuzzleNode(puzzle)
+            _extend(root, path[1:])
+            return root
+    return None
+
+
+def _bounded_search(puzzle, bound, stats):
+    # Search depth first from puzzle for a solved state, following only
+    # states whose moves from puzzle plus heuristic are at most bound. Return
+    # the puzzles on the path to the first solved state found, or None, and
+    # the smallest moves plus heuristic that went over bound, or None if
+    # none did.
+    #
+    # @type puzzle: Puzzle
+    # @type bound: int
+    # @type stats: dict[str, int] | None
+    # @rtype: (list[Puzzle] | None, int | None)
+    if puzzle.is_solved():
+        return [puzzle], None
+    if puzzle.fail_fast():
+        return None, None
+
+    if stats is not None:
+        stats['expanded'] = stats.get('expanded', 0) + 1
+    # each entry is a puzzle on the current path, its key, and its
+    # extensions not visited yet
+    stack = [(puzzle, puzzle.state_key(), iter(puzzle.extensions()))]
+    on_path = {stack[0][1]}
+    over = None
+
+    while stack:
+        state = next(stack[-1][2], None)
+        if state is None:
+            on_path.discard(stack.pop()[1])
+            continue
+
+        key = state.state_key()
+        if key in on_path:
+            continue
+        estimate = len(stack) + state.heuristic()
+        if estimate > bound:
+            if over is None or estimate < over:
+                over = estimate
+        elif state.is_solved():
+            return [entry[0] for entry in stack] + [state], over
+        elif not state.fail_fast():
+            if stats is not None:
+                stats['expanded'] = stats.get('expanded', 0) + 1
+            on_path.add(key)
+            stack.append((state, key, iter(state.extensions())))
+    return None, over
 
 
 # Class PuzzleNode helps build trees of PuzzleNodes that have
@@ -186,6 +486,8 @@ class PuzzleNode:
     can be extended to.
     """
 
+    __slots__ = ('puzzle', 'children', 'parent')
+
     def __init__(self, puzzle=None, children=None, parent=None):
         """
         Create a new puzzle node self with configuration puzzle.
@@ -219,24 +521,195 @@ class PuzzleNode:
         >>> pn1.__eq__(pn3)
         False
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        if (type(self) != type(other) or self.puzzle != other.puzzle or
+                len(self.children) != len(other.children)):
+            return False
+        # children in the same order are matched pairwise; only children in
+        # another order need each to be looked for among the others
+        return (all(x == y for x, y in zip(self.children, other.children)) or
+                (all(x in self.children for x in other.children) and
+                 all(x in other.children for x in self.children)))
 
     def __str__(self):
         """
         Return a human-readable string representing PuzzleNode self.
 
-        # doctest not feasible.
+        Nodes are written out from an explicit stack, so long paths do not
+        hit the recursion limit.
+
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> pn = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no"}))
+        >>> pn.children.append(PuzzleNode(WordLadderPuzzle("no", "no", {})))
+        >>> print(pn)
+        on -> no
+        <BLANKLINE>
+        no -> no
+        <BLANKLINE>
+        <BLANKLINE>
+        """
+        parts, stack = [], [self]
+        while stack:
+            item = stack.pop()
+            # separators between children are pushed as strings
+            if isinstance(item, str):
+                parts.append(item)
+            else:
+                parts.append("{}\n\n".format(item.puzzle))
+                for i in range(len(item.children) - 1, -1, -1):
+                    stack.append(item.children[i])
+                    if i > 0:
+                        stack.append("\n")
+        return "".join(parts)
+
+
+class SearchArena:
+    """
+    The nodes of a search, stored as parallel arrays indexed by node number
+    instead of as a tree of PuzzleNodes.
+
+    A node is kept as the key of its state and the way it was reached, so
+    the puzzles of a path are rebuilt by replaying its moves from the
+    puzzle the search started from.
+
+    === Attributes ===
+    @type keys: list[object]
+        The state key of each node.
+    @type parents: array
+        The index of the parent of each node, or -1 for the root.
+    @type depths: array
+        The number of moves from the root to each node.
+    @type moves: array
+        The position of each node's puzzle among the extensions of its
+        parent's puzzle.
+    """
+
+    def __init__(self):
+        """
+        Create a new empty SearchArena self.
+
+        @type self: SearchArena
+        @rtype: None
+        """
+        self.keys = []
+        self.parents, self.depths, self.moves = (array('l'), array('l'),
+                                                 array('l'))
+
+    def __len__(self):
+        """
+        Return the number of nodes in SearchArena self.
+
+        @type self: SearchArena
+        @rtype: int
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        return len(self.keys)
 
+    def add(self, key, parent, move):
+        """
+        Add a node with state key key, reached from the node at index parent
+        by its extension number move, to SearchArena self, and return its
+        index. A parent of -1 makes the node a root.
+
+        @type self: SearchArena
+        @type key: object
+        @type parent: int
+        @type move: int
+        @rtype: int
+
+        >>> arena = SearchArena()
+        >>> arena.add("a", -1, 0), arena.add("b", 0, 3), arena.add("c", 1, 0)
+        (0, 1, 2)
+        >>> list(arena.depths), list(arena.parents)
+        ([0, 1, 2], [-1, 0, 1])
+        """
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.moves.append(move)
+        self.depths.append(0 if parent < 0 else self.depths[parent] + 1)
+        return len(self.keys) - 1
+
+    def path(self, root, index):
+        """
+        Return root, a PuzzleNode for the puzzle of the root of SearchArena
+        self, extended with a chain of PuzzleNodes, each the only child of
+        the one before, down to the node at index.
+
+        Each node's puzzle is found by its move among the extensions of the
+        puzzle before it; if the extensions come in another order than
+        during the search, it is found by its state key instead.
+
+        @type self: SearchArena
+        @type root: PuzzleNode
+        @type index: int
+        @rtype: PuzzleNode
 
-# added Queue class from labs, because we are more familiar with it, as
-# opposed to hoping that the deque from collections works how we hope it
-# works.
+        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> arena = SearchArena()
+        >>> w = WordLadderPuzzle("on", "no", {"on", "oo", "no"})
+        >>> step = arena.add("oo", arena.add("on", -1, 0), 0)
+        >>> print(arena.path(PuzzleNode(w), arena.add("no", step, 0)))
+        on -> no
+        <BLANKLINE>
+        oo -> no
+        <BLANKLINE>
+        no -> no
+        <BLANKLINE>
+        <BLANKLINE>
+        """
+        _extend(root, self.puzzles(root.puzzle, index)[1:])
+        return root
+
+    def puzzles(self, puzzle, index, reverse=False):
+        """
+        Return the puzzles from puzzle, the puzzle of the root of
+        SearchArena self, to that of the node at index, by replaying the
+        moves between them.
+
+        @type self: SearchArena
+        @type puzzle: Puzzle
+        @type index: int
+        @type reverse: bool
+            Whether the nodes were reached by reverse extensions.
+        @rtype: list[Puzzle]
+        """
+        chain = []
+        while self.parents[index] >= 0:
+            chain.append(index)
+            index = self.parents[index]
+
+        puzzles = [puzzle]
+        for index in reversed(chain):
+            if reverse:
+                extensions = list(puzzles[-1].reverse_extensions())
+            else:
+                extensions = list(puzzles[-1].extensions())
+            move, key = self.moves[index], self.keys[index]
+            if (move < len(extensions) and
+                    extensions[move].state_key() == key):
+                puzzles.append(extensions[move])
+            else:
+                puzzles.append([e for e in extensions
+                                if e.state_key() == key][0])
+        return puzzles
+
+
+def _extend(node, puzzles):
+    # Extend PuzzleNode node with a chain of new PuzzleNodes for puzzles, each
+    # the only child of the one before, and return the last of them, or node
+    # if puzzles is empty.
+    #
+    # @type node: PuzzleNode
+    # @type puzzles: list[Puzzle]
+    # @rtype: PuzzleNode
+    for puzzle in puzzles:
+        child = PuzzleNode(puzzle, parent=node)
+        node.children.append(child)
+        node = child
+    return node
+
+
+# added Queue class from labs, because we are more familiar with it; its
+# contents are kept in a deque, so removing from the front takes constant
+# time instead of shifting the whole list.
 class Queue:
     """
     A first-in, first-out (FIFO) queue.
@@ -249,7 +722,7 @@ class Queue:
         @param Queue self: this queue
         @rtype: None
         """
-        self._contents = []
+        self._contents = deque()
 
     def add(self, obj):
         """
@@ -278,7 +751,7 @@ class Queue:
         >>> q.remove()
         5
         """
-        return self._contents.pop(0)
+        return self._contents.popleft()
 
     def is_empty(self):
         """
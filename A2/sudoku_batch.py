@@ -0,0 +1,340 @@
+"""
+Solve files of sudoku puzzles, one per line, over a pool of processes.
+
+A puzzle is a line of its 81 cells row by row, or 16 for a 4x4 one, with
+the digits of the clues and '.', '0' or '*' for the blanks; empty lines and
+lines starting with '#' are skipped. Each puzzle is written back as a line
+of its solution, or of itself if it has none, followed by the number of
+nodes the solver expanded:
+
+    python sudoku_batch.py puzzles.txt [solutions.txt] [--workers <n>]
+        [--chunk <n>] [--solver dlx|depth_first]
+
+Either file may be '-', for standard input or output, which are the
+defaults. The number of puzzles solved per second is reported on standard
+error at the end. Arguments that cannot be read print this usage and exit
+with status 2, and a line that is not a puzzle exits with status 1.
+
+    python sudoku_batch.py --test
+
+runs the doctests of the module instead.
+
+The lines are read as they are needed and sent to the workers in chunks.
+Chunks come back in the order they finish, and are held in a reorder
+buffer until the chunks before them are written, so the solutions come out
+in the order of the puzzles. No more than two chunks per worker are sent
+and not yet written at a time, so the memory used does not grow with the
+file. A line that is not a puzzle stops the batch with its line number.
+
+=== Constants ===
+@type SOLVERS: dict[str, (SudokuPuzzle, dict) -> SudokuPuzzle | None]
+    The solvers that may be used, by name, each returning the solution of
+    a puzzle, or None, and counting the nodes it expands in a dict as
+    'expanded'; dlx is the fastest, and the default.
+@type BLANKS: str
+    The characters that stand for an empty cell.
+@type USAGE: str
+    The usage printed when the arguments cannot be read.
+"""
+import sys
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                wait)
+from itertools import islice
+from os import cpu_count
+from time import perf_counter
+
+from dlx import solve_sudoku
+from puzzle_tools import depth_first_solve
+from sudoku_puzzle import SudokuPuzzle
+
+
+def _dlx(puzzle, stats):
+    # Return the first solution of puzzle found by dancing links, or None.
+    #
+    # @type puzzle: SudokuPuzzle
+    # @type stats: dict[str, int]
+    # @rtype: SudokuPuzzle | None
+    solutions = solve_sudoku(puzzle, 1, stats)
+    return solutions[0] if solutions else None
+
+
+def _depth_first(puzzle, stats):
+    # Return the solution of puzzle at the end of the path found by
+    # depth_first_solve, or None.
+    #
+    # @type puzzle: SudokuPuzzle
+    # @type stats: dict[str, int]
+    # @rtype: SudokuPuzzle | None
+    path = depth_first_solve(puzzle, stats)
+    if path is None:
+        return None
+    while path.children:
+        path = path.children[0]
+    return path.puzzle
+
+
+SOLVERS = {'dlx': _dlx, 'depth_first': _depth_first}
+BLANKS = '.0*'
+USAGE = ('usage: python sudoku_batch.py puzzles.txt [solutions.txt] '
+         '[--workers <n>]\n'
+         '           [--chunk <n>] [--solver dlx|depth_first]\n'
+         '       python sudoku_batch.py --test')
+
+# the side of the puzzles with each number of cells, and the characters
+# their cells may hold
+_SIDES = {16: 4, 81: 9}
+_CELLS = {size: set(BLANKS + ''.join([str(digit)
+                                      for digit in range(1, n + 1)]))
+          for size, n in _SIDES.items()}
+
+
+def parse_puzzle(line):
+    """
+    Return the SudokuPuzzle of line, a puzzle in the one line format.
+
+    @type line: str
+    @rtype: SudokuPuzzle
+
+    >>> print(parse_puzzle('12.4' '3.1.' '2..1' '0.2*'))
+    12|*4
+    3*|1*
+    -----
+    2*|*1
+    **|2*
+    >>> parse_puzzle('12345')
+    Traceback (most recent call last):
+    ...
+    ValueError: a puzzle has 16 or 81 cells, not 5
+    """
+    line = line.strip()
+    n = _SIDES.get(len(line))
+    if n is None:
+        raise ValueError('a puzzle has 16 or 81 cells, not {}'.format(
+            len(line)))
+    digits = [str(digit) for digit in range(1, n + 1)]
+    symbols = ['*' if cell in BLANKS else cell for cell in line]
+    for cell in symbols:
+        if cell != '*' and cell not in digits:
+            raise ValueError('{!r} is not a digit from 1 to {}, or a '
+                             'blank'.format(cell, n))
+    return SudokuPuzzle(n, symbols, set(digits))
+
+
+def format_puzzle(puzzle):
+    """
+    Return SudokuPuzzle puzzle in the one line format, with '.' for the
+    blanks.
+
+    @type puzzle: SudokuPuzzle
+    @rtype: str
+
+    >>> format_puzzle(parse_puzzle('12.4' '3.1.' '2..1' '0.2*'))
+    '12.43.1.2..1..2.'
+    """
+    return ''.join(['.' if cell == '*' else cell
+                    for cell in puzzle.symbols])
+
+
+def solve_lines(lines, workers=None, chunk=64, solver='dlx'):
+    """
+    Yield the solution of each puzzle in lines, in order, as a tuple of
+    the solution in the one line format, or the puzzle if it has no
+    solution, whether it was solved, and the nodes expanded.
+
+    The lines are solved in chunks of chunk puzzles by workers processes,
+    as many as there are processors if workers is None; with one worker
+    they are solved in this process.
+
+    @type lines: Iterable[str]
+    @type workers: int | None
+    @type chunk: int
+    @type solver: str
+    @rtype: Generator[(str, bool, int)]
+
+    >>> puzzles = ['12.43.1.2..1..2.', '# a comment', '', '11..' * 4]
+    >>> for result in solve_lines(puzzles, workers=1): print(result)
+    ('1234341223414123', True, 8)
+    ('11..11..11..11..', False, 0)
+    >>> list(solve_lines(puzzles + ['1x.43.1.2..1..2.'], workers=2))
+    Traceback (most recent call last):
+    ...
+    ValueError: line 5: 'x' is not a digit from 1 to 4, or a blank
+    """
+    if solver not in SOLVERS:
+        raise ValueError('no solver named {!r}'.format(solver))
+    chunks = _chunks(lines, chunk)
+    if workers is None:
+        workers = cpu_count() or 1
+    if workers == 1:
+        for lines in chunks:
+            yield from _solve_chunk(lines, solver)
+        return
+
+    with ProcessPoolExecutor(workers) as pool:
+        # the chunks being solved, by the futures of their results, and
+        # the results of the chunks finished before the next to be written,
+        # by their numbers
+        running, finished = {}, {}
+        sent = written = 0
+        while True:
+            # no more than 2 * workers chunks are sent but not written, so
+            # a slow chunk holds back the others instead of letting the
+            # reorder buffer grow
+            for lines in islice(chunks, 2 * workers - (sent - written)):
+                running[pool.submit(_solve_chunk, lines, solver)] = sent
+                sent += 1
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[running.pop(future)] = future.result()
+            while written in finished:
+                yield from finished.pop(written)
+                written += 1
+
+
+def _chunks(lines, size):
+    # Yield the puzzles in lines, skipping the empty lines and comments, in
+    # lists of size, but for the last, checking each is the right length and
+    # holds only digits and blanks.
+    #
+    # @type lines: Iterable[str]
+    # @type size: int
+    # @rtype: Generator[list[str]]
+    chunk = []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            cells = _CELLS.get(len(line))
+            if cells is None:
+                raise ValueError('line {}: a puzzle has 16 or 81 cells, not '
+                                 '{}'.format(number, len(line)))
+            if not cells.issuperset(line):
+                cell = next(cell for cell in line if cell not in cells)
+                raise ValueError('line {}: {!r} is not a digit from 1 to {}, '
+                                 'or a blank'.format(number, cell,
+                                                     _SIDES[len(line)]))
+            chunk.append(line)
+            if len(chunk) == size:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+
+def _solve_chunk(lines, solver):
+    # Return the solutions of the puzzles in lines with the solver named
+    # solver, each as a tuple of the solution in the one line format, or the
+    # puzzle if it has no solution, whether it was solved, and the nodes
+    # expanded.
+    #
+    # @type lines: list[str]
+    # @type solver: str
+    # @rtype: list[(str, bool, int)]
+    results = []
+    for line in lines:
+        puzzle, stats = parse_puzzle(line), {}
+        solution = SOLVERS[solver](puzzle, stats)
+        results.append((format_puzzle(solution or puzzle),
+                        solution is not None, stats.get('expanded', 0)))
+    return results
+
+
+def main(arguments):
+    """
+    Solve the puzzles of the files and options in arguments, as described
+    at the top of the module, and report how fast on standard error.
+
+    Exit with status 2, after printing USAGE, if the arguments cannot be
+    read, and with status 1 if a line is not a puzzle.
+
+    @type arguments: list[str]
+    @rtype: None
+
+    >>> main(['puzzles.txt', '--workers'])
+    Traceback (most recent call last):
+    ...
+    SystemExit: 2
+    >>> main(['puzzles.txt', '--chunk', 'many'])
+    Traceback (most recent call last):
+    ...
+    SystemExit: 2
+    """
+    options = {'--workers': None, '--chunk': '64', '--solver': 'dlx'}
+    files = []
+    arguments = list(arguments)
+    while arguments:
+        argument = arguments.pop(0)
+        if argument in options:
+            if not arguments:
+                _usage('{} needs a value'.format(argument))
+            options[argument] = arguments.pop(0)
+        else:
+            files.append(argument)
+    if len(files) > 2:
+        _usage('too many files: {}'.format(' '.join(files)))
+    files += ['-'] * (2 - len(files))
+    if options['--solver'] not in SOLVERS:
+        _usage('no solver named {!r}'.format(options['--solver']))
+    workers = _count('--workers', options['--workers'])
+    chunk = _count('--chunk', options['--chunk'])
+
+    source = sys.stdin if files[0] == '-' else open(files[0])
+    target = sys.stdout if files[1] == '-' else open(files[1], 'w')
+    solved = count = nodes = most = 0
+    start = perf_counter()
+    try:
+        for line, success, expanded in solve_lines(
+                source, workers, chunk, options['--solver']):
+            target.write('{} {}\n'.format(line, expanded))
+            count, solved = count + 1, solved + success
+            nodes, most = nodes + expanded, max(most, expanded)
+    except ValueError as error:
+        print('sudoku_batch.py: {}'.format(error), file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if target is not sys.stdout:
+            target.close()
+    seconds = perf_counter() - start
+    print('{} puzzles, {} solved, in {:.2f} s: {:.0f} puzzles/sec; '
+          '{:.1f} nodes per puzzle, at most {}'.format(
+              count, solved, seconds, count / seconds if seconds else 0,
+              nodes / count if count else 0, most), file=sys.stderr)
+
+
+def _count(option, value):
+    # Return value, the value given to option, as a positive int, or None
+    # if it was not given, exiting with the usage if it is not one.
+    #
+    # @type option: str
+    # @type value: str | None
+    # @rtype: int | None
+    if value is None:
+        return None
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        _usage('{} needs a positive whole number, not {!r}'.format(option,
+                                                                 value))
+    return number
+
+
+def _usage(message):
+    # Print message and USAGE on standard error, and exit with status 2.
+    #
+    # @type message: str
+    # @rtype: None
+    print('sudoku_batch.py: {}\n{}'.format(message, USAGE), file=sys.stderr)
+    sys.exit(2)
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--test']:
+        import doctest
+        doctest.testmod()
+    else:
+        main(sys.argv[1:])
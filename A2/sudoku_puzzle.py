@@ -4,8 +4,43 @@ from puzzle import Puzzle
 class SudokuPuzzle(Puzzle):
     """
     A sudoku puzzle that may be solved, unsolved, or even unsolvable.
+
+    The symbols used in each row, column and subsquare are kept as
+    bitmasks, with a bit per symbol, and passed from a puzzle to its
+    extensions with the bits of the new symbol added, so the symbols
+    still allowed in a cell take a few operations on ints. So does
+    fail_fast, from a count of the empty cells with no symbol allowed
+    that is also passed on and updated.
+
+    Extensions branch on the empty cell with the fewest symbols allowed,
+    and fill in every cell that is forced before they are returned.
     """
 
+    # === Private Attributes ===
+    # @type _n: int
+    #     The number of symbols, and of cells in a row.
+    # @type _symbols: list[str]
+    #     The symbol in each cell, row by row; '*' for an empty cell.
+    # @type _symbol_set: set[str]
+    #     The symbols that fill the cells.
+    # @type _board: _Board
+    #     What puzzles with the same n and symbol_set have in common.
+    # @type _rows: list[int]
+    #     The bits of the symbols used in each row.
+    # @type _columns: list[int]
+    #     The bits of the symbols used in each column.
+    # @type _boxes: list[int]
+    #     The bits of the symbols used in each subsquare, row by row.
+    # @type _empty: int
+    #     The number of empty cells.
+    # @type _dead: int
+    #     The number of empty cells with no symbol allowed in them, plus one
+    #     if a row, column or subsquare was found with no cell left for a
+    #     symbol it lacks; more than 0 iff there is no solution to be had.
+
+    __slots__ = ('_n', '_symbols', '_symbol_set', '_board', '_rows',
+                 '_columns', '_boxes', '_empty', '_dead')
+
     def __init__(self, n, symbols, symbol_set):
         """
         Create a new nxn SudokuPuzzle self with symbols
@@ -21,7 +56,64 @@ class SudokuPuzzle(Puzzle):
         assert all([d in (symbol_set | {'*'}) for d in symbols])
         assert len(symbol_set) == n
         assert len(symbols) == n ** 2
+        # copied, since the bits of each row, column and subsquare are kept
+        # in step with it
+        symbols = list(symbols)
         self._n, self._symbols, self._symbol_set = n, symbols, symbol_set
+        board = _Board.of(n, symbol_set)
+        self._board = board
+        self._rows, self._columns, self._boxes = [0] * n, [0] * n, [0] * n
+        for i, d in enumerate(symbols):
+            if d != '*':
+                bit = board.bits[d]
+                self._rows[board.rows[i]] |= bit
+                self._columns[board.columns[i]] |= bit
+                self._boxes[board.boxes[i]] |= bit
+        empty = [i for i in range(n ** 2) if symbols[i] == '*']
+        self._empty = len(empty)
+        self._dead = len([i for i in empty if not self._allowed(i)])
+
+    @property
+    def n(self):
+        """
+        Return the number of symbols of SudokuPuzzle self, and of cells in
+        each of its rows.
+
+        @type self: SudokuPuzzle
+        @rtype: int
+        """
+        return self._n
+
+    @property
+    def symbols(self):
+        """
+        Return a copy of the symbols of SudokuPuzzle self, row by row, with
+        '*' for an empty cell.
+
+        @type self: SudokuPuzzle
+        @rtype: list[str]
+
+        >>> s = SudokuPuzzle(4, ['A', 'B', 'C', 'D'] + ['*'] * 12,
+        ...                  {'A', 'B', 'C', 'D'})
+        >>> s.symbols[:5]
+        ['A', 'B', 'C', 'D', '*']
+        >>> grid = ['A', 'B', 'C', 'D'] + ['*'] * 12
+        >>> s = SudokuPuzzle(4, grid, {'A', 'B', 'C', 'D'})
+        >>> grid[4] = 'A'
+        >>> s.symbols[:5]
+        ['A', 'B', 'C', 'D', '*']
+        """
+        return self._symbols[:]
+
+    @property
+    def symbol_set(self):
+        """
+        Return the symbols that fill the cells of SudokuPuzzle self.
+
+        @type self: SudokuPuzzle
+        @rtype: set[str]
+        """
+        return set(self._symbol_set)
 
     def __eq__(self, other):
         """
@@ -55,6 +147,25 @@ class SudokuPuzzle(Puzzle):
                 self._n == other._n and self._symbols == other._symbols and
                 self._symbol_set == other._symbol_set)
 
+    __hash__ = Puzzle.__hash__
+
+    def state_key(self):
+        """
+        Return the symbols of SudokuPuzzle self joined into a string, or as a
+        tuple if some symbols are longer than one character.
+
+        @type self: SudokuPuzzle
+        @rtype: str | tuple[str]
+
+        >>> s = SudokuPuzzle(4, ['A', 'B', 'C', 'D'] + ['*'] * 12,
+        ...                  {'A', 'B', 'C', 'D'})
+        >>> s.state_key()
+        'ABCD************'
+        """
+        if self._board.short:
+            return ''.join(self._symbols)
+        return tuple(self._symbols)
+
     def __str__(self):
         """
         Return a human-readable string representation of SudokuPuzzle self.
@@ -130,19 +241,26 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # no '*' left and all rows, column, subsquares have correct symbols
-        return ('*' not in symbols and
-                all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(i) == self._symbol_set and
-                      self._subsquare_set(i) ==
-                      self._symbol_set) for i in range(n ** 2)]))
+        # no '*' left and all rows, column, subsquares have every symbol;
+        # with all the cells filled, a row that has every symbol has each
+        # only once
+        full = self._board.full
+        return (self._empty == 0 and
+                all([mask == full for mask in self._rows]) and
+                all([mask == full for mask in self._columns]) and
+                all([mask == full for mask in self._boxes]))
 
     def extensions(self):
         """
         Return list of extensions of SudokuPuzzle self.
 
+        An extension puts each symbol allowed in the empty cell with the
+        fewest, the first of them if there is a tie, and then fills in the
+        forced cells until there are none: the empty cells with one symbol
+        allowed, and the cells that are the only ones left for a symbol in
+        their row, column or subsquare. Filling in stops early if it shows
+        the extension has no solution, which fail_fast then reports.
+
         @type self: SudokuPuzzle
         @rtype: list[SudokuPuzzle]
 
@@ -160,26 +278,60 @@ class SudokuPuzzle(Puzzle):
         True
         >>> all([s in L1 for s in L2])
         True
+        >>> grid = ['A', 'B', 'C', 'D']
+        >>> grid += ['C', 'D', 'A', 'B']
+        >>> grid += ['B', 'A', '*', '*']
+        >>> grid += ['*', '*', 'B', 'A']
+        >>> s = SudokuPuzzle(4, grid, {'A', 'B', 'C', 'D'})
+        >>> [extension.is_solved() for extension in s.extensions()]
+        [True]
+        """
+        if self._empty == 0 or self._dead:
+            return []
+
+        # the first empty position with the fewest allowed symbols
+        fewest, i = self._n + 1, None
+        for j, d in enumerate(self._symbols):
+            if d == '*':
+                count = bin(self._allowed(j)).count('1')
+                if count < fewest:
+                    fewest, i = count, j
+                    if count <= 1:
+                        break
+        # allowed symbols at position i, as bits
+        allowed = self._allowed(i)
+        # list of SudokuPuzzles with each legal digit at position i, with
+        # the cells it forces filled in
+        extensions = []
+        for d, bit in self._board.symbol_bits:
+            if allowed & bit:
+                puzzle = self._copy()
+                puzzle._put(i, d, bit)
+                puzzle._propagate()
+                extensions.append(puzzle)
+        return extensions
+
+    def place(self, i, d):
+        """
+        Return a copy of SudokuPuzzle self with symbol d put in position i.
+
+        Precondition: position i is empty, and d is allowed in it.
+
+        @type self: SudokuPuzzle
+        @type i: int
+        @type d: str
+        @rtype: SudokuPuzzle
+
+        >>> s = SudokuPuzzle(4, ['A', 'B', 'C', '*'] + ['*'] * 12,
+        ...                  {'A', 'B', 'C', 'D'})
+        >>> s.place(3, 'D').state_key()
+        'ABCD************'
+        >>> s.state_key()
+        'ABC*************'
         """
-        # convenient names
-        symbols, symbol_set, n = self._symbols, self._symbol_set, self._n
-        if '*' not in symbols:
-            # return an empty generator
-            return [_ for _ in []]
-        else:
-            # position of first empty position
-            i = symbols.index('*')
-            # allowed symbols at position i
-            # A | B == A.union(B)
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
-            # list of SudokuPuzzles with each legal digit at position i
-            return (
-                [SudokuPuzzle(n,
-                 symbols[:i] + [d] + symbols[i + 1:], symbol_set)
-                 for d in allowed_symbols])
+        puzzle = self._copy()
+        puzzle._put(i, d, self._board.bits[d])
+        return puzzle
 
     # override fail_fast
     # Notice that it is not possible to complete a sudoku puzzle if there
@@ -210,69 +362,201 @@ class SudokuPuzzle(Puzzle):
         >>> s1.fail_fast()
         False
         """
-        for i in range(self._n ** 2):
-            # check only empty spaces
-            if self._symbols[i] == '*':
-                # set of all symbols appearing at least once relevant to the
-                # spot
-                used_sym = (self._row_set(i) | self._column_set(i) |
-                            self._subsquare_set(i))
-
-                # There is not any available symbol to fill in
-                if self._symbol_set.difference(used_sym) == set():
-                    return True
-
-        return False
+        return self._dead > 0
 
     # some helper methods
-    def _row_set(self, m):
+    def _allowed(self, i):
+        # Return the bits of the symbols not used in the row, column or
+        # subsquare of position i of SudokuPuzzle self's symbols.
         #
-        # Return set of symbols in row of SudokuPuzzle self's symbols
-        # where position m occurs.
+        # @type self: SudokuPuzzle
+        # @type i: int
+        # @rtype: int
+        board = self._board
+        return board.full & ~(self._rows[board.rows[i]] |
+                              self._columns[board.columns[i]] |
+                              self._boxes[board.boxes[i]])
+
+    def _copy(self):
+        # Return a copy of SudokuPuzzle self that can be changed without
+        # changing self.
         #
         # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # first position in m's row
-        r = (m // n) * n
-        # set of elements from symbols[r] .. symbols[r+n-1]
-        return set([symbols[r + i] for i in range(n)])
-
-    def _column_set(self, m):
-        # Return set of symbols in column of SudokuPuzzle self's symbols
-        # where position m occurs.
+        # @rtype: SudokuPuzzle
+        puzzle = _new(SudokuPuzzle)
+        puzzle._n, puzzle._symbols = self._n, self._symbols[:]
+        puzzle._symbol_set, puzzle._board = self._symbol_set, self._board
+        puzzle._rows, puzzle._columns = self._rows[:], self._columns[:]
+        puzzle._boxes = self._boxes[:]
+        puzzle._empty, puzzle._dead = self._empty, self._dead
+        return puzzle
+
+    def _put(self, i, d, bit):
+        # Put symbol d, whose bit is bit, in empty position i of SudokuPuzzle
+        # self, where it is allowed.
         #
         # @type self: SudokuPuzzle
-        # @type m: int
-        assert 0 <= m <= self._n ** 2
-        # convenient names
-        symbols, n = self._symbols, self._n
-        # first position in m's column
-        c = m % n
-        # set of elements from symbols[c], symbols[c + n],
-        # ... symbols[c + (n * (n-1))]
-        return set([symbols[c + (i * n)] for i in range(n)])
-
-    def _subsquare_set(self, m):
-        # Return set of symbols in subsquare of SudokuPuzzle self's symbols
-        # where position m occurs.
+        # @type i: int
+        # @type d: str
+        # @type bit: int
+        # @rtype: None
+        board, symbols = self._board, self._symbols
+        rows, columns, boxes = self._rows, self._columns, self._boxes
+        full, board_rows = board.full, board.rows
+        board_columns, board_boxes = board.columns, board.boxes
+        symbols[i] = d
+
+        # the empty cells seeing position i that only allowed d allow
+        # nothing once it is placed
+        for j in board.peers[i]:
+            if (symbols[j] == '*' and
+                    full & ~(rows[board_rows[j]] |
+                             columns[board_columns[j]] |
+                             boxes[board_boxes[j]]) == bit):
+                self._dead += 1
+
+        rows[board_rows[i]] |= bit
+        columns[board_columns[i]] |= bit
+        boxes[board_boxes[i]] |= bit
+        self._empty -= 1
+
+    def _propagate(self):
+        # Fill in the forced cells of SudokuPuzzle self until there are none
+        # left, or it is found to have no solution.
         #
-        # @type self: Sudoku Puzzle
-        # @type m: int
-        assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # row, column where m occur
-        row, col = m // n, m % n
+        # @type self: SudokuPuzzle
+        # @rtype: None
+        board, symbols = self._board, self._symbols
+        symbol_bits, full = board.symbol_bits, board.full
+        forced = True
+        while forced and self._empty and not self._dead:
+            forced = False
+
+            # naked singles: empty cells with only one symbol allowed
+            for i in range(len(symbols)):
+                if symbols[i] == '*':
+                    allowed = self._allowed(i)
+                    if allowed and allowed & (allowed - 1) == 0:
+                        d = symbol_bits[allowed.bit_length() - 1][0]
+                        self._put(i, d, allowed)
+                        forced = True
+            if self._dead:
+                return
+
+            # hidden singles: symbols with one cell left in a unit, found
+            # from the symbols allowed in at least one and two of its cells
+            for unit in board.units:
+                once = twice = used = 0
+                for i in unit:
+                    if symbols[i] == '*':
+                        allowed = self._allowed(i)
+                        twice |= once & allowed
+                        once |= allowed
+                    else:
+                        used |= board.bits[symbols[i]]
+                if full & ~(used | once):
+                    # a symbol the unit lacks has nowhere left to go
+                    self._dead += 1
+                    return
+                single = once & ~twice
+                for i in unit:
+                    if single and symbols[i] == '*':
+                        bit = self._allowed(i) & single
+                        if bit and bit & (bit - 1) == 0:
+                            self._put(i, symbol_bits[bit.bit_length() - 1][0],
+                                      bit)
+                            single &= ~bit
+                            forced = True
+                if self._dead:
+                    return
+
+
+class _Board:
+    """
+    What the SudokuPuzzles with the same size and symbols have in common.
+
+    === Attributes ===
+    @type n: int
+        The number of symbols, and of cells in a row.
+    @type bits: dict[str, int]
+        The bit of each symbol.
+    @type symbol_bits: list[(str, int)]
+        The symbols in order, each with its bit.
+    @type full: int
+        The bits of all the symbols.
+    @type short: bool
+        Whether every symbol is one character.
+    @type rows: list[int]
+        The row of each cell.
+    @type columns: list[int]
+        The column of each cell.
+    @type boxes: list[int]
+        The subsquare of each cell, numbered row by row.
+    @type peers: list[tuple[int]]
+        The other cells in the row, column or subsquare of each cell.
+    @type units: list[tuple[int]]
+        The cells of each row, column and subsquare.
+    """
+
+    # the boards made so far, by n and symbols
+    _made = {}
+
+    @staticmethod
+    def of(n, symbol_set):
+        """
+        Return the _Board of n by n puzzles of the symbols in symbol_set,
+        made once for each.
+
+        @type n: int
+        @type symbol_set: set[str]
+        @rtype: _Board
+
+        >>> _Board.of(4, {'A', 'B', 'C', 'D'}) is _Board.of(4, set('DCBA'))
+        True
+        """
+        key = (n, tuple(sorted(symbol_set)))
+        if key not in _Board._made:
+            _Board._made[key] = _Board(n, key[1])
+        return _Board._made[key]
+
+    def __init__(self, n, symbols):
+        """
+        Create the _Board self of n by n puzzles of symbols.
+
+        @type self: _Board
+        @type n: int
+        @type symbols: tuple[str]
+        @rtype: None
+
+        >>> board = _Board(4, ('A', 'B', 'C', 'D'))
+        >>> board.boxes[:8]
+        [0, 0, 1, 1, 0, 0, 1, 1]
+        >>> board.peers[0]
+        (1, 2, 3, 4, 5, 8, 12)
+        """
+        self.n = n
+        self.bits = {d: 1 << k for k, d in enumerate(symbols)}
+        self.symbol_bits = [(d, self.bits[d]) for d in symbols]
+        self.full = (1 << n) - 1
+        self.short = all([len(d) == 1 for d in symbols])
         # length of subsquares
         ss = round(n ** (1 / 2))
-        # upper-left position of m's subsquare
-        ul = (((row // ss) * ss) * n) + ((col // ss) * ss)
-        # return set of symbols from subsquare starting at ul
-        return set(
-            [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
+        self.rows = [i // n for i in range(n ** 2)]
+        self.columns = [i % n for i in range(n ** 2)]
+        self.boxes = [(i // n) // ss * ss + (i % n) // ss
+                      for i in range(n ** 2)]
+        self.peers = [tuple([j for j in range(n ** 2)
+                             if j != i and
+                             (self.rows[j] == self.rows[i] or
+                              self.columns[j] == self.columns[i] or
+                              self.boxes[j] == self.boxes[i])])
+                      for i in range(n ** 2)]
+        self.units = [tuple([i for i in range(n ** 2) if cells[i] == unit])
+                      for cells in (self.rows, self.columns, self.boxes)
+                      for unit in range(n)]
+
+
+_new = object.__new__
 
 
 if __name__ == "__main__":
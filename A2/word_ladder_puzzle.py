@@ -47,6 +47,20 @@ class WordLadderPuzzle(Puzzle):
                 (self._to_word == other._to_word) and
                 (self._word_set == other._word_set))
 
+    __hash__ = Puzzle.__hash__
+
+    def state_key(self):
+        """
+        Return the current word of WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: str
+
+        >>> WordLadderPuzzle("cost", "save", {"cost", "save"}).state_key()
+        'cost'
+        """
+        return self._from_word
+
     def __str__(self):
         """
         Return a human-readable string representation of WordLadderPuzzle
@@ -93,14 +107,58 @@ class WordLadderPuzzle(Puzzle):
             return []
 
         # list all possible one letter changes for self._from_word
-        else:
-            lst = []
-            length = len(self._from_word)
-
-            for word in self._word_set:
-                if len(word) == length and valid_swap(self._from_word, word):
-                    lst.append(WordLadderPuzzle(word, self._to_word,
-                                                self._word_set))
+        return self.reverse_extensions()
+
+    def heuristic(self):
+        """
+        Return the number of letters in which the word of WordLadderPuzzle
+        self differs from the target word; each step changes one letter.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> WordLadderPuzzle("cost", "cave", {"cost", "cave"}).heuristic()
+        3
+        """
+        return sum([1 for a, b in zip(self._from_word, self._to_word)
+                    if a != b])
+
+    def goal_state(self):
+        """
+        Return the solved WordLadderPuzzle with the target word of
+        WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: WordLadderPuzzle
+
+        >>> print(WordLadderPuzzle("cost", "save", {"cost"}).goal_state())
+        save -> save
+        """
+        return WordLadderPuzzle(self._to_word, self._to_word, self._word_set)
+
+    def reverse_extensions(self):
+        """
+        Return the WordLadderPuzzles whose word is one letter away from the
+        word of WordLadderPuzzle self, even if self is solved.
+
+        A word one letter from another is one letter from it in turn, so
+        these are also the puzzles self extends to.
+
+        @type self: WordLadderPuzzle
+        @rtype: list[WordLadderPuzzle]
+
+        >>> ws = {"cost", "cast", "case", "cave", "save"}
+        >>> for x in WordLadderPuzzle("save", "save", ws).reverse_extensions():
+        ...     print(x)
+        cave -> save
+        """
+        lst = []
+        length = len(self._from_word)
+
+        for word in self._word_set:
+            if len(word) == length and valid_swap(self._from_word, word):
+                lst.append(WordLadderPuzzle(word, self._to_word,
+                                            self._word_set))
 
         return lst
 